@@ -1,10 +1,18 @@
 import json
+import os
 import streamlit as st
-import pymongo
 import pandas as pd
-from pymongo import MongoClient
-import plotly
 import plotly.express as px
+from network_tools.graph_loader import load_network
+from network_tools.layout import read_positions
+import network_tools.network_calculation as nc
+from network_tools.path_query import get_landmarks, path_query
+from network_tools.metrics_io import read_metrics_table
+from network_tools.network_figure import network_figure
+from network_tools.ranked_metrics import get_ranked_metrics
+import data_tools.mongo_access as mongo
+from data_tools.mongo_snapshot import get_snapshot, snapshot_exists
+from data_tools.word_index import get_word_index
 
 st.set_page_config(
     page_title="Rap Français ",
@@ -28,41 +36,45 @@ st.sidebar.subheader("Plus d'informations sur l'app :")
 
 ######## loading the data with func
 
-# loading the json from pymongo
+# la copie locale des collections si elle existe (python sync_mongo_snapshot.py), sinon mongo
+# avec un seul client pour tout le process et les requêtes en cache (voir data_tools.mongo_access)
 
-cluster = MongoClient(st.secrets["uri"], tls=True, tlsAllowInvalidCertificates=True)
+SNAPSHOT_DIRECTORY = "./data/snapshot"
 
-db = cluster[st.secrets['db_name']]
+if snapshot_exists(SNAPSHOT_DIRECTORY):
+    db = None
+    source = get_snapshot(SNAPSHOT_DIRECTORY)
+    word_dump = source.word_dump
+else:
+    db = mongo.get_database(st.secrets["uri"], st.secrets['db_name'])
+    source = mongo.MongoSource(db)
+    word_dump = None
 
-collection = db['artist']
 
 @st.cache
-def get_all_artist():
+def load_network_indiv():
 
-    all_artist = list(db.artist_all_details.find())
+    return read_metrics_table("./data/network_indiv_metrics.arrow")
 
-    return all_artist
 
+# le réseau est chargé une fois, partagé par la figure et les réseaux ego
+@st.cache(allow_output_mutation=True)
+def load_featuring_network():
 
-@st.cache
-def query_a_single_rapper(rapper_name):
+    return load_network("./data/reseau_version_finale.gml")
 
-    return dict(db.artist_all_details.find_one({"name": rapper_name}))
 
+@st.cache(allow_output_mutation=True)
+def load_network_figure():
 
-@st.cache
-def load_network_indiv():
-
-    return pd.read_csv("./data/network_indiv_metrics.csv", sep=',', encoding='utf8')
+    # les positions du dernier layout du batch, sinon celles du gml
+    network = load_featuring_network()
+    positions = None
+    if os.path.exists("./data/network_positions.json"):
+        positions = read_positions("./data/network_positions.json")
 
-
-@st.cache
-def rapper_in_lyrics():
-
-    rappeur_in_lyrics = list(db.lyrics.find({}, {"rappeur": 1, "_id": 0}))
-    rappeur_lyrics_select = [artist['rappeur'] for artist in rappeur_in_lyrics]
-
-    return rappeur_lyrics_select
+    # au delà, on n'affiche que les rappeurs les plus connectés pour que la page reste fluide
+    return network_figure(network, positions=positions, max_nodes=50000, max_edges=200000)
 
 
 # on rajoute le texte dans la sidebar
@@ -96,9 +108,7 @@ st.sidebar.write("Le nombre de mots unique, correspond on différents mots uniqu
                  " souvent de déterminants ...), cette liste provient de spacy.")
 
 # on retourne sur le fonctionnement de l'app
-result = get_all_artist()
-
-max_albums = list(db.artist_all_details.find({"nombre_albums": {"$gte": 5}}).sort("nombre_albums", -1))
+max_albums = source.top_artists_by_albums(number=3)
 
 st.write("le rappeur avec le plus d'albums est : ", max_albums[0]['name'], "avec un total de ", max_albums[0]['nombre_albums'])
 st.write("le deuxième rappeur avec le plus d'albums est : ", max_albums[1]['name'], "avec un total de ",
@@ -110,18 +120,18 @@ st.write("Selectionnez un rappeur dans la liste déroulante suivante (vous pouve
          "son nom plutot que de scroller indéfiniment) :")
 
 # au préalable il faut faire une liste de tous les rappeurs dans la db
-rappeur_liste = [i['name'] for i in result]
+rappeur_liste = source.artist_names()
 selected_rapper = st.selectbox('rappeur sélectionné :', options=rappeur_liste, key='rappeur_1')
 
 # on affiche les stats du rappeur sélectionné:
-query_rappeur_stats = query_a_single_rapper(selected_rapper)
+query_rappeur_stats = source.artist_details(selected_rapper)
 
 # on fait 2 colonnes pour pas que ce ne soit ignoble
 rap_c1, rap_c2 = st.columns(2)
 
 with rap_c1:
     st.write("Nombre d'albums :", query_rappeur_stats['nombre_albums'])
-    st.write("Nombre de morceaux :", len(query_rappeur_stats['all_unique_song']))
+    st.write("Nombre de morceaux :", query_rappeur_stats['nombre_morceaux'])
     try:
         st.write("Beatmaker favoris : ", max(query_rappeur_stats['beatmakers_repartition'],
                                             key=query_rappeur_stats['beatmakers_repartition'].get))
@@ -160,7 +170,7 @@ st.write("Cette représentation du réseau, a été effectué avec l'algorithme
 st.write("Le graph (comme les prochains) est inétractif ! Vous pouvez zoomer à l'intérieur et vous déplacer "
          "comme vous le souhaitez.")
 
-fig = plotly.io.read_json("./data/network_atlas_version_finale.json")
+fig = load_network_figure()
 
 st.plotly_chart(fig, use_container_width=True)
 
@@ -196,8 +206,11 @@ df = load_network_indiv()
 with open("./data/distance_barycenter.json", encoding='utf-8') as fh:
     dist_bary = json.load(fh)
 
+# les metrics triées par le batch, pour les tops et les stats d'un rappeur sans trier ni copier le df
+ranked = get_ranked_metrics("./data/network_indiv_ranks.arrow")
+
 # on fait une liste des rappeurs présents pour
-rapper_in_the_network = list(set(df['node']))
+rapper_in_the_network = ranked.nodes
 
 st.write("Cliquez ci-dessous pour afficher quelques graphiques sur le réseau :")
 
@@ -207,19 +220,19 @@ with st.expander("Cliquez ici pour afficher les différents graphiques : "):
 
     st.write("Voici les rappeurs avec le plus de degrés :")
 
-    degree_df = df.sort_values(by=['degree'], ascending=False).head(30)
+    degree_df = ranked.top('degree', 30)
     degree_rank = px.bar(degree_df, x='degree', y='node', orientation='h')
 
     st.plotly_chart(degree_rank, use_container_width=True)
 
     st.write("Voici les rappeurs avec le plus haut niveau de clustering :")
-    clustering_df = df.sort_values(by=['clustering'], ascending=False).head(30)
+    clustering_df = ranked.top('clustering', 30)
     clustering_rank = px.bar(clustering_df, x='clustering', y='node', orientation='h')
 
     st.plotly_chart(clustering_rank, use_container_width=True)
 
     st.write("Voici les rappeurs avec le plus de triangles:")
-    triangles_df = df.sort_values(by=['triangles'], ascending=False).head(30)
+    triangles_df = ranked.top('triangles', 30)
     triangles_rank = px.bar(triangles_df, x='triangles', y='node', orientation='h')
 
     st.plotly_chart(triangles_rank, use_container_width=True)
@@ -237,27 +250,83 @@ with st.expander("Cliquez ici pour afficher les stats pour chaque rappeur : "):
 
     network_rapper = st.selectbox("choisissez un rappeur :", options=rapper_in_the_network, key="rapper_network")
 
-    data = df.copy()
-    unique_rapper = data.loc[data['node'] == network_rapper]
+    unique_rapper = ranked.row(network_rapper)
 
     # on fait 2 colonnes pour que ce soit moins ignoble visuellement :
     c1, c2 = st.columns(2)
 
     with c1:
 
-        st.write("Clustering :", unique_rapper['clustering'].iloc[0])
-        st.write("Nombre de triangles :", unique_rapper['triangles'].iloc[0])
-        st.write("Score Page Rank : ", unique_rapper['page_rank'].iloc[0])
-        st.write('Eccentricity :', unique_rapper['eccentricity'].iloc[0])
+        st.write("Clustering :", unique_rapper['clustering'])
+        st.write("Nombre de triangles :", unique_rapper['triangles'])
+        st.write("Score Page Rank : ", unique_rapper['page_rank'])
+        st.write('Eccentricity :', unique_rapper['eccentricity'])
         st.write("Distance du barycentre ", dist_bary[network_rapper])
 
     with c2:
 
-        st.write("Nombre de liens  :", unique_rapper['degree'].iloc[0])
-        st.write("Betweeness :", unique_rapper['betweeness'].iloc[0])
-        st.write("closeness: ", unique_rapper['closeness'].iloc[0])
-        st.write("Eigen Centrality ", unique_rapper['eigen_centrality'].iloc[0])
-        st.write("Nombre de cliques : ", unique_rapper['clique'].iloc[0])
+        st.write("Nombre de liens  :", unique_rapper['degree'])
+        st.write("Rang par nombre de liens :", ranked.rank(network_rapper, 'degree'), " sur ", len(ranked),
+                 " (plus de liens que ", round(ranked.percentile(network_rapper, 'degree'), 1), "% des rappeurs)")
+        st.write("Betweeness :", unique_rapper['betweeness'])
+        st.write("closeness: ", unique_rapper['closeness'])
+        st.write("Eigen Centrality ", unique_rapper['eigen_centrality'])
+        st.write("Nombre de cliques : ", unique_rapper['clique'])
+
+    st.write("Le rappeur dans sa scène (les rappeurs à quelques featurings de lui) :")
+
+    radius = st.slider("nombre de featurings d'écart :", min_value=1, max_value=3, value=2, key="ego_radius")
+
+    # seulement le voisinage, borné à 500 rappeurs, sans la betweeness dont le coût explose avec la taille de la scène
+    ego_df = nc.ego_network_metrics(load_featuring_network(), network_rapper, radius=radius,
+                                    metrics=['degree', 'closeness', 'page_rank', 'clustering'], max_nodes=500)
+
+    st.write("Taille de la scène :", len(ego_df), "rappeurs, dont", int((ego_df['hops'] == 1).sum()),
+             "featurings directs")
+    for metric in ['closeness', 'page_rank']:
+        ego_rank = int((ego_df[metric] > ego_df[metric].iloc[0]).sum()) + 1
+        st.write("Rang dans la scène par", metric, ":", ego_rank, " sur ", len(ego_df))
+
+st.write("Cliquez ci-dessous pour savoir comment deux rappeurs sont reliés :")
+
+with st.expander("Cliquez ici pour relier deux rappeurs : "):
+
+    c1, c2 = st.columns(2)
+
+    with c1:
+        first_rapper = st.selectbox("premier rappeur :", options=rapper_in_the_network, key="path_first")
+
+    with c2:
+        second_rapper = st.selectbox("second rappeur :", options=rapper_in_the_network, key="path_second")
+
+    every_path = st.checkbox("afficher tous les plus courts chemins", key="path_all")
+
+    # les bornes du batch si elles sont là, le BFS bidirectionnel ne visite que le voisinage des deux rappeurs
+    landmarks = None
+    if os.path.exists("./data/landmark_distances.arrow"):
+        landmarks = get_landmarks("./data/landmark_distances.arrow")
+
+    connection = path_query(load_featuring_network(), first_rapper, second_rapper, landmarks=landmarks,
+                            all_paths=every_path, limit=10)
+
+    if connection['distance'] is None:
+        st.write(first_rapper, "et", second_rapper, "ne sont pas reliés par des featurings.")
+    else:
+        st.write("Nombre de featurings d'écart :", connection['distance'])
+        if connection['number_of_paths'] is not None:
+            st.write("Nombre de plus courts chemins :", connection['number_of_paths'],
+                     "(les 10 premiers sont affichés)" if connection['number_of_paths'] > 10 else "")
+
+        for path in connection['paths']:
+            for hop in path:
+                # le réseau n'a pas de poids, on prend le nombre de morceaux en commun dans les détails
+                collaborations = hop['collaborations']
+                if collaborations is None:
+                    details = source.artist_details(hop['source']) or {}
+                    collaborations = (details.get('featuring_repartition') or {}).get(hop['target'])
+                st.write(hop['source'], " → ", hop['target'],
+                         "({} morceaux ensemble)".format(collaborations) if collaborations is not None else "")
+            st.write("----------")
 
 st.write("----------")
 
@@ -268,36 +337,32 @@ st.write("Tous les rappeurs ne sont pas présent (en tout cas pour le moment) de
 
 st.write("Choisissez un rappeur pour découvrir les mots qu'ils utilisent le plus et dans quel mesure ils sont unqiue :")
 
-rapper_lyrics_selection = rapper_in_lyrics()
+rapper_lyrics_selection = source.lyrics_rappers()
 
 lyrics_rapper_selected = st.selectbox('rappeur sélectionné :', options=rapper_lyrics_selection, key='rappeur_lyrics')
 
 # on affiche les stats du rappeur en question
 
 # on fait une query où l'on ne retourne pas tout
-query_lyrics_rapper = list(db.lyrics.find({"rappeur": lyrics_rapper_selected}, {"_id": 0, "nombre_titres": 1,
-                                                                           "nombre_mots_par_titre": 1,
-                                                                           "ratio_unique": 1,
-                                                                           "avg_non_commun_tire": 1}))
+query_lyrics_rapper = source.lyrics_stats(lyrics_rapper_selected)
 c1_lyrics, c2_lyrics = st.columns(2)
 
 with c1_lyrics:
 
-    st.write("Nombre  de titres", query_lyrics_rapper[0]['nombre_titres'])
-    st.write("Nombre  de mots par titre", query_lyrics_rapper[0]['nombre_mots_par_titre'])
+    st.write("Nombre  de titres", query_lyrics_rapper['nombre_titres'])
+    st.write("Nombre  de mots par titre", query_lyrics_rapper['nombre_mots_par_titre'])
 
 with c2_lyrics:
 
-    st.write("Ratio de mot unique", query_lyrics_rapper[0]['ratio_unique'])
-    st.write("Nombre moyen de mots non communs par titre", query_lyrics_rapper[0]['avg_non_commun_tire'])
+    st.write("Ratio de mot unique", query_lyrics_rapper['ratio_unique'])
+    st.write("Nombre moyen de mots non communs par titre", query_lyrics_rapper['avg_non_commun_tire'])
 
 st.write('------------')
 
 st.write("Voici deux scatter plots permettant de représenter les différences en termes de myrics entre ces différents"
          "rappeurs.")
 
-query_rapper_graph = list(db.lyrics.find({}, {"_id": 0, "rappeur": 1, "nombre_mots_par_titre": 1,
-                                              "ratio_unique": 1, "avg_non_commun_tire": 1}))
+query_rapper_graph = source.lyrics_scatter()
 
 dff = pd.DataFrame(query_rapper_graph)
 
@@ -318,17 +383,28 @@ st.plotly_chart(last_fig, use_container_width=True)
 st.write("---------")
 
 st.write("Tapez ci-dessous un mot pour connaitre son occurence, parmi les lyrics de tous les rappeurs "
-         "attention les majuscules et accents sont importants.")
+         "(les majuscules et les accents sont ignorés, toutes les écritures du mot sont comptées).")
 
 word_query_param = st.text_input("Ecrivez un mot pour connaitre son occurence totale. Il faut appuyer sur Entrée pour"
                                  " effectuer la requete.", "Marseille")
 
-word_query = db.global_lyrics_v2.find_one({"word": word_query_param})
+# l'index des mots est chargé une fois par process, depuis la copie locale s'il y en a une
+word_index = get_word_index(db=db, path=word_dump)
+word_query = word_index.count(word_query_param)
 
 
 if word_query is not None:
-    st.write("Le mot ", word_query_param, " apparait un total de ", word_query['count'], " fois, dans notre "
+    st.write("Le mot ", word_query_param, " apparait un total de ", word_query, " fois, dans notre "
                                                                                          "echantilllon de lyrics")
+    spellings = word_index.spellings(word_query_param)
+    if len(spellings) > 1:
+        st.write("En comptant les différentes écritures : ",
+                 ", ".join("{} ({})".format(spelling, count) for spelling, count in spellings))
 else:
-    st.write("Le mot ", word_query_param, " n' apparait pas dans nos lyrics. Vous pouvez essayer de changer les "
-                                          "majusucules ou les accents, si vous pensez qu'il devrait être présent")
+    st.write("Le mot ", word_query_param, " n' apparait pas dans nos lyrics (les majuscules et les accents sont "
+                                          "ignorés).")
+
+suggestions = word_index.complete(word_query_param, limit=10) if word_query_param.strip() else []
+if suggestions:
+    st.write("Les mots les plus fréquents qui commencent par ", word_query_param, " : ",
+             ", ".join("{} ({})".format(word, count) for word, count in suggestions))
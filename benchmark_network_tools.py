@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:47:31 2026
+
+@author: gabri
+
+Benchmark of network_tools on synthetic graphs shaped like the featurings
+network, plus the real network as a fixed reference.
+
+Each metric of calculation_individual_metrics is timed alone (with the BFS it
+needs), as well as overall_calculations and distance_to_barycenter_for_each_node.
+For the graphs of at most INCREMENTAL_MAX_NODES nodes, snapshot_measures is
+also timed on a few cumulative snapshots adding SNAPSHOT_NEW_EDGES edges each,
+with and without the incremental distances.
+The results are written in json, and compared to a baseline file if given:
+
+    python benchmark_network_tools.py --sizes 200 2000 --output bench.json
+    python benchmark_network_tools.py --sizes 200 2000 --baseline bench.json
+
+Above --exact-limit nodes the distance metrics use the pivot sampling, the
+exact all-pairs BFS is too long for the big graphs.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+import scipy as sp
+
+import network_tools.network_calculation as nc
+from network_tools.graph_loader import load_network
+from network_tools.snapshot_calculation import INCREMENTAL_MAX_NODES, cumulative_snapshots, snapshot_measures
+
+
+# le réseau réel, toujours mesuré pour comparer à des données connues
+REFERENCE_GML = './data/reseau_version_finale.gml'
+
+# les formes de graphes synthétiques
+GRAPH_KINDS = ['power_law', 'small_world']
+
+# les snapshots du benchmark de snapshot_measures : le graphe moins quelques arêtes, puis ces arêtes par lots
+NUMBER_OF_SNAPSHOTS = 5
+SNAPSHOT_NEW_EDGES = 50
+
+
+def synthetic_graph(kind, number_of_nodes, seed):
+    """
+    Generate a connected synthetic graph with about 3.5 featurings per artist like the real one.
+
+    Parameters
+    ----------
+    kind : str
+        'power_law' (Holme-Kim, power-law degree with triangles) or
+        'small_world' (Watts-Strogatz).
+    number_of_nodes : int
+        The number of nodes.
+    seed : int
+        The seed of the generator.
+
+    Raises
+    ------
+    ValueError
+        If kind is unknown.
+
+    Returns
+    -------
+    network : nx.classes.graph.Graph
+        The graph, the largest connected component if it is not connected.
+
+    """
+    if kind == 'power_law':
+        network = nx.powerlaw_cluster_graph(number_of_nodes, 2, 0.1, seed=seed)
+    elif kind == 'small_world':
+        network = nx.connected_watts_strogatz_graph(number_of_nodes, 4, 0.1, seed=seed)
+    else:
+        raise ValueError('Unknown graph kind {}, expected one of {}'.format(kind, GRAPH_KINDS))
+
+    # les metrics de distance demandent un réseau connexe
+    if not nx.is_connected(network):
+        network = network.subgraph(max(nx.connected_components(network), key=len)).copy()
+
+    return network
+
+
+def measure(function, memory=True):
+    """
+    Run a function, measuring its wall time, its cpu time and its peak memory.
+
+    The peak memory is measured with tracemalloc in a second run, so that
+    the tracing doesn't slow down the timed run.
+
+    Returns
+    -------
+    dict
+        seconds, cpu_seconds and peak_bytes (None without memory).
+
+    """
+    start, start_cpu = time.perf_counter(), time.process_time()
+    function()
+    seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - start_cpu
+
+    peak_bytes = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {'seconds': seconds, 'cpu_seconds': cpu_seconds, 'peak_bytes': peak_bytes}
+
+
+def benchmark_network(case, network, metrics, exact_limit, pivots, seed, backend, repeat, memory):
+    """
+    Measure each step on one network.
+
+    Returns
+    -------
+    results : list
+        One dict per step, with the case, the size of the network and the measures.
+
+    """
+    # les metrics de distance en mode approché au dessus de exact_limit
+    approximate = {}
+    if network.number_of_nodes() > exact_limit:
+        approximate = {'pivots': pivots, 'seed': seed}
+
+    steps = [(name, lambda name=name: nc.calculation_individual_metrics(
+        network, metrics=[name], backend=backend, cache=False, **approximate)) for name in metrics]
+    steps.append(('overall_calculations', lambda: nc.overall_calculations(network, cache=False, **approximate)))
+    # le barycentre des distances (approchées au dessus de exact_limit), sinon nx.barycenter refait l'all pairs
+    barycenter = nc.overall_calculations(network, **approximate)['barycenter']
+    steps.append(('distance_to_barycenter_for_each_node',
+                  lambda: nc.distance_to_barycenter_for_each_node(network, barycenter=barycenter, as_array=True)))
+
+    results = []
+    for step, function in steps:
+        # on garde le meilleur des essais, le moins perturbé
+        runs = [measure(function, memory=memory and index == 0) for index in range(repeat)]
+        result = {
+            'case': case,
+            'step': step,
+            'nodes': network.number_of_nodes(),
+            'edges': network.number_of_edges(),
+            'approximate': bool(approximate),
+            'seconds': min(run['seconds'] for run in runs),
+            'cpu_seconds': min(run['cpu_seconds'] for run in runs),
+            'peak_bytes': runs[0]['peak_bytes'],
+        }
+        print('{:<28} {:<38} {:>10.4f} s'.format(case, step, result['seconds']))
+        results.append(result)
+
+    return results
+
+
+def benchmark_snapshots(case, network, metrics, seed, repeat, memory):
+    """
+    Measure snapshot_measures with and without the incremental distances.
+
+    The snapshots are the network without (NUMBER_OF_SNAPSHOTS - 1) *
+    SNAPSHOT_NEW_EDGES random edges, then the network with these edges added
+    SNAPSHOT_NEW_EDGES at a time, like the featurings of a new year.
+
+    Returns
+    -------
+    results : list
+        One dict per mode, like benchmark_network.
+
+    """
+    edges = list(network.edges)
+    order = np.random.default_rng(seed).permutation(len(edges))
+    edges = [edges[index] for index in order]
+    start = len(edges) - (NUMBER_OF_SNAPSHOTS - 1) * SNAPSHOT_NEW_EDGES
+    batches = [(0, edges[:start])]
+    batches += [(index + 1, edges[start + index * SNAPSHOT_NEW_EDGES:start + (index + 1) * SNAPSHOT_NEW_EDGES])
+                for index in range(NUMBER_OF_SNAPSHOTS - 1)]
+    snapshots = list(cumulative_snapshots(batches))
+
+    results = []
+    for incremental in (True, False):
+        step = 'snapshot_measures-{}'.format('incremental' if incremental else 'full')
+        function = lambda incremental=incremental: snapshot_measures(snapshots, incremental=incremental,
+                                                                      metrics=metrics, cache=False)
+        runs = [measure(function, memory=memory and index == 0) for index in range(repeat)]
+        result = {
+            'case': case,
+            'step': step,
+            'nodes': network.number_of_nodes(),
+            'edges': network.number_of_edges(),
+            'approximate': False,
+            'seconds': min(run['seconds'] for run in runs),
+            'cpu_seconds': min(run['cpu_seconds'] for run in runs),
+            'peak_bytes': runs[0]['peak_bytes'],
+        }
+        print('{:<28} {:<38} {:>10.4f} s'.format(case, step, result['seconds']))
+        results.append(result)
+
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold, min_seconds):
+    """
+    Find the steps slower (or using more memory) than in the baseline.
+
+    Parameters
+    ----------
+    results : list
+        The results of this run.
+    baseline : list
+        The results of the baseline run.
+    threshold : float
+        The allowed relative increase, 0.25 for 25 %.
+    min_seconds : float
+        The increases of time below this are ignored, they are noise.
+
+    Returns
+    -------
+    regressions : list
+        The (case, step, measure, baseline value, new value) of the regressions.
+
+    """
+    reference = {(result['case'], result['step']): result for result in baseline}
+
+    regressions = []
+    for result in results:
+        old = reference.get((result['case'], result['step']))
+        if old is None:
+            continue
+        if (result['seconds'] > old['seconds'] * (1 + threshold)
+                and result['seconds'] - old['seconds'] > min_seconds):
+            regressions.append((result['case'], result['step'], 'seconds', old['seconds'], result['seconds']))
+        if (result['peak_bytes'] is not None and old['peak_bytes'] is not None
+                and result['peak_bytes'] > old['peak_bytes'] * (1 + threshold)):
+            regressions.append((result['case'], result['step'], 'peak_bytes', old['peak_bytes'], result['peak_bytes']))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200, 2000, 20000],
+                        help='number of nodes of the synthetic graphs (up to 1000000)')
+    parser.add_argument('--kinds', nargs='+', default=GRAPH_KINDS, choices=GRAPH_KINDS)
+    parser.add_argument('--metrics', nargs='+', default=nc.INDIVIDUAL_METRICS, choices=nc.INDIVIDUAL_METRICS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', default='networkx', choices=['networkx', 'sparse'])
+    parser.add_argument('--exact-limit', type=int, default=5000,
+                        help='above this number of nodes the distance metrics use pivots')
+    parser.add_argument('--pivots', type=int, default=64)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help="don't measure the peak memory")
+    parser.add_argument('--no-snapshots', action='store_true', help="don't measure snapshot_measures")
+    parser.add_argument('--no-reference', action='store_true', help="don't measure the real network")
+    parser.add_argument('--output', help='json file of the results')
+    parser.add_argument('--baseline', help='json file of a previous run to compare to')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    parser.add_argument('--min-seconds', type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    memory = not args.no_memory
+    common = (args.metrics, args.exact_limit, args.pivots, args.seed, args.backend, args.repeat, memory)
+
+    results = []
+    if not args.no_reference:
+        results += benchmark_network('reseau_version_finale', load_network(REFERENCE_GML), *common)
+    for kind in args.kinds:
+        for size in args.sizes:
+            network = synthetic_graph(kind, size, args.seed)
+            results += benchmark_network('{}-{}'.format(kind, size), network, *common)
+            if not args.no_snapshots and network.number_of_nodes() <= INCREMENTAL_MAX_NODES:
+                results += benchmark_snapshots('{}-{}'.format(kind, size), network, args.metrics, args.seed,
+                                               args.repeat, memory)
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'networkx': nx.__version__,
+            'numpy': np.__version__,
+            'scipy': sp.__version__,
+        },
+        'parameters': {name: value for name, value in vars(args).items() if name not in ('output', 'baseline')},
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as outfile:
+            json.dump(report, outfile, ensure_ascii=False, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as infile:
+            baseline = json.load(infile)['results']
+        regressions = compare_to_baseline(results, baseline, args.threshold, args.min_seconds)
+        for case, step, name, old, new in regressions:
+            print('Regression {} {} {} : {:.4g} -> {:.4g}'.format(case, step, name, old, new))
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
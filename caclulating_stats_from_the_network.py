@@ -5,27 +5,62 @@ Created on Fri Jan 28 18:43:19 2022
 @author: Gabriel Letty
 """
 
-import networkx as nx
 import network_tools.network_calculation as nc
+from network_tools.metrics_cache import MetricsDiskCache
+from network_tools.metrics_io import write_metrics_table
+from network_tools.ranked_metrics import write_ranked_metrics
+from network_tools.layout import forceatlas2_layout, write_positions
+from network_tools.path_query import landmark_table, write_landmarks
+from network_tools.graph_loader import load_network
 import pandas as pd
 import json
+import logging
 
-# on charge le reseau : 
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s %(message)s')
+
+
+def log_step(record):
+    # le temps de chaque metric, pour voir ce qui est lent dans le batch
+    logging.info('%s %s : %.3f s (cpu %.3f s)%s', record['function'], record['step'], record['seconds'],
+                 record['cpu_seconds'], ' [cache]' if record['cached'] else '')
+
+# on charge le reseau, le gml n'est parsé que la première fois puis relu depuis le .npz à côté : 
     
-data = nx.read_gml("./data/reseau_version_finale.gml")
+data = load_network("./data/reseau_version_finale.gml")
+
+# on calcule les stats, les distances ne sont calculées qu'une fois pour tout le monde
+# et les metrics déjà calculées pour ce réseau sont relues depuis le cache:
 
-# on calcule les stats:
+disk_cache = MetricsDiskCache('./data/cache')
 
-dataclean_info = nc.overall_calculations(data)  
+with nc.instrument(log_step):
 
-dataclean_indiv = nc.network_measures_to_dataframe(data, include_node_value=False)    
+    dataclean_info = nc.overall_calculations(data, disk_cache=disk_cache)  
+
+    dataclean_indiv = nc.network_measures_to_dataframe(data, include_node_value=False, disk_cache=disk_cache)    
     
-dist_bary_clean = nc.distance_to_barycenter_for_each_node(data)   
+    dist_bary_clean = nc.distance_to_barycenter_for_each_node(data, barycenter=dataclean_info['barycenter'])   
+
+# le layout ForceAtlas2 repart des positions du gml, quelques itérations suffisent quand le réseau bouge peu
+
+positions = forceatlas2_layout(data, iterations=50, seed=0)
+
+# les distances depuis les hubs, pour que l'app borne la distance entre deux rappeurs sans chercher
+
+landmarks = landmark_table(data)
 
 # on exporte tout ça pour pouvoir le mettre dans streamlit 
 
 dataclean_indiv.to_csv('data/network_indiv_metrics.csv', sep=',', encoding='utf8', index=False)
 
+# en arrow aussi, l'app le lit en memory map sans parser le csv
+
+write_metrics_table(dataclean_indiv, 'data/network_indiv_metrics.arrow')
+
+# les rangs de chaque metric, triés une fois ici plutôt qu'à chaque rerun de l'app
+
+write_ranked_metrics(dataclean_indiv, 'data/network_indiv_ranks.arrow')
+
 # le reste en json, mais on ne mettra pas sur mongo
 
 with open('data/overall_metrics.json', 'w',encoding='utf-8') as outfile:
@@ -33,3 +68,7 @@ with open('data/overall_metrics.json', 'w',encoding='utf-8') as outfile:
     
 with open('data/distance_barycenter.json', 'w',encoding='utf-8') as outfile:
     json.dump(dist_bary_clean, outfile,ensure_ascii=False, indent=4)
+
+write_landmarks(landmarks, 'data/landmark_distances.arrow')
+
+write_positions(positions, 'data/network_positions.json')
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:58:21 2026
+
+@author: gabri
+
+Metrics of the network over time, for the evolution charts of the app.
+
+The snapshots are either several GML files (one per year, labelled by the
+name of the file), or one GML file whose edges have a year attribute (the
+snapshot of a year has all the featurings up to this year):
+
+    python caclulating_stats_over_time.py data/snapshots/*.gml --n-jobs -1
+    python caclulating_stats_over_time.py data/reseau_dates.gml --attribute year
+
+The individual metrics are written in one long table (one row per snapshot
+and node) and the overall metrics in json, by snapshot.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+from network_tools.graph_loader import read_gml_streaming
+from network_tools.metrics_cache import MetricsDiskCache
+from network_tools.metrics_io import write_metrics_table
+from network_tools.snapshot_calculation import snapshot_measures, snapshots_by_edge_attribute
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('gml', nargs='+', help='one GML file per snapshot, or one GML file with --attribute')
+    parser.add_argument('--attribute', help='the edge attribute giving the snapshot of each featuring')
+    parser.add_argument('--n-jobs', type=int, default=None, help='number of snapshots computed in parallel')
+    parser.add_argument('--cache', default='./data/cache', help='the disk cache of the metrics')
+    parser.add_argument('--output', default='data/network_metrics_over_time.arrow')
+    parser.add_argument('--overall-output', default='data/overall_metrics_over_time.json')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s %(message)s')
+
+    # les attributs des arêtes sont gardés, pas de passage par le .npz
+    if args.attribute is not None:
+        if len(args.gml) != 1:
+            parser.error('--attribute takes a single GML file')
+        snapshots = snapshots_by_edge_attribute(read_gml_streaming(args.gml[0]), args.attribute)
+    else:
+        snapshots = ((os.path.splitext(os.path.basename(path))[0], read_gml_streaming(path)) for path in args.gml)
+
+    df, overall = snapshot_measures(snapshots, n_jobs=args.n_jobs, disk_cache=MetricsDiskCache(args.cache))
+
+    write_metrics_table(df, args.output)
+    with open(args.overall_output, 'w', encoding='utf-8') as outfile:
+        json.dump({str(snapshot): metrics for snapshot, metrics in overall.items()}, outfile,
+                  ensure_ascii=False, indent=4)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
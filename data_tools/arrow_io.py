@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 14:36:18 2026
+
+@author: gabri
+
+Reading and writing of the columnar files, shared by data_tools and
+network_tools (the mongo snapshot, the word dump and the metrics tables).
+
+The .arrow files (Arrow IPC, not compressed) are memory mapped when read:
+the numeric columns are not copied and only the pages really used are
+loaded. The .parquet files are smaller but have to be decoded. The files are
+written through a temporary file replaced atomically, the running apps keep
+their memory map of the previous version.
+"""
+
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def read_table(path, columns=None):
+    """
+    Read an Arrow IPC or Parquet file.
+
+    Parameters
+    ----------
+    path : str
+        The .arrow or .parquet file.
+    columns : list, optional
+        The columns to read, all of them if None. The default is None.
+
+    Raises
+    ------
+    ValueError
+        If the extension of path is not .arrow or .parquet.
+
+    Returns
+    -------
+    pa.Table
+        The table, memory mapped for an .arrow file.
+
+    """
+    if path.endswith('.arrow'):
+        # le memory map reste ouvert tant que les colonnes l'utilisent
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    elif path.endswith('.parquet'):
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    else:
+        raise ValueError('Unknown format for {}, use .arrow or .parquet'.format(path))
+
+    return table
+
+
+def write_table(table, path):
+    """
+    Write a table in an Arrow IPC or Parquet file, through a temporary file replaced atomically.
+
+    Parameters
+    ----------
+    table : pa.Table
+        The table.
+    path : str
+        The file, Arrow IPC if it ends with .arrow, Parquet if it ends with .parquet.
+
+    Raises
+    ------
+    ValueError
+        If the extension of path is not .arrow or .parquet.
+
+    """
+    if not path.endswith(('.arrow', '.parquet')):
+        raise ValueError('Unknown format for {}, use .arrow or .parquet'.format(path))
+
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    os.close(descriptor)
+    try:
+        if path.endswith('.arrow'):
+            with pa.OSFile(temporary, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            pq.write_table(table, temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:41:08 2026
+
+@author: gabri
+
+Access to the MongoDB collections of the app.
+
+- one MongoClient (and its pool of connections) per uri for the whole
+  process, instead of one per Streamlit rerun.
+- the queries only ask for the fields they use, the song lists of
+  artist_all_details are never sent when only the names are needed.
+- the top-N queries are limited on the server.
+- the lookups of several artists are done by batches of $in.
+- the results of the nearly static queries are kept in a TTL cache shared by
+  all the sessions, emptied with invalidate (after the batch for instance).
+
+The cached results are shared, they must not be modified.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from pymongo import DESCENDING, MongoClient
+
+
+# durée de vie par défaut des résultats, les données ne changent qu'au batch
+DEFAULT_TTL = 3600
+
+# nombre max de résultats gardés en cache
+CACHE_SIZE = 1024
+
+# nombre de noms par requête $in
+BATCH_SIZE = 500
+
+# nombre max de connexions du pool, partagé par toutes les sessions
+MAX_POOL_SIZE = 20
+
+# les champs de artist_all_details affichés pour un rappeur
+ARTIST_FIELDS = ['name', 'nombre_albums', 'ratio_featuring', 'beatmakers_repartition', 'featuring_repartition']
+
+# les champs de lyrics affichés pour un rappeur et dans les scatter plots
+LYRICS_FIELDS = ['rappeur', 'nombre_titres', 'nombre_mots_par_titre', 'ratio_unique', 'avg_non_commun_tire']
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class TTLCache:
+    """
+    Thread-safe cache whose values expire after a time to live.
+
+    Parameters
+    ----------
+    ttl : float, optional
+        The default time to live of a value, in seconds. The default is DEFAULT_TTL.
+    maxsize : int, optional
+        The maximum number of values, the least recently used are removed
+        above it. The default is CACHE_SIZE.
+
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def get(self, key, loader, ttl=None):
+        """
+        Give the value of a key, calling loader() if it is missing or expired.
+
+        Only one thread loads a given key, the others wait for its value.
+
+        Parameters
+        ----------
+        key : tuple
+            The key, starting with the name of the query.
+        loader : callable
+            The function giving the value.
+        ttl : float, optional
+            The time to live of this value. The default is None (self.ttl).
+
+        Returns
+        -------
+        object
+            The value.
+
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # un autre thread a pu la charger pendant qu'on attendait
+            with self._lock:
+                value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+
+            value = loader()
+            with self._lock:
+                self._values[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+                self._values.move_to_end(key)
+                while len(self._values) > self.maxsize:
+                    self._values.popitem(last=False)
+                self._loading.pop(key, None)
+
+        return value
+
+    def _lookup(self, key):
+        """
+        Give the value of a key if it is still valid, _MISSING otherwise (the lock must be held).
+        """
+        if key in self._values:
+            expires, value = self._values[key]
+            if expires > time.monotonic():
+                self._values.move_to_end(key)
+                return value
+            del self._values[key]
+        return _MISSING
+
+    def invalidate(self, query=None):
+        """
+        Remove the values of a query, or all the values.
+
+        Parameters
+        ----------
+        query : str, optional
+            The name of the query (first element of the keys). The default
+            is None (everything).
+
+        """
+        with self._lock:
+            if query is None:
+                self._values.clear()
+            else:
+                for key in [key for key in self._values if key[0] == query]:
+                    del self._values[key]
+
+
+_MISSING = object()
+
+_cache = TTLCache()
+
+
+def invalidate(query=None):
+    """
+    Empty the cache of the queries, for instance once the batch has updated the collections.
+
+    Parameters
+    ----------
+    query : str, optional
+        The name of one query function (e.g. 'artist_names'). The default is
+        None (all the queries).
+
+    """
+    _cache.invalidate(query)
+
+
+def get_client(uri):
+    """
+    Give the MongoClient of an uri, created once for the whole process.
+
+    Parameters
+    ----------
+    uri : str
+        The connection string.
+
+    Returns
+    -------
+    MongoClient
+        The client, its pool of connections is shared by all the sessions.
+
+    """
+    with _clients_lock:
+        if uri not in _clients:
+            _clients[uri] = MongoClient(uri, tls=True, tlsAllowInvalidCertificates=True, maxPoolSize=MAX_POOL_SIZE)
+        return _clients[uri]
+
+
+def get_database(uri, db_name):
+    """
+    Give a database of the shared client.
+
+    Parameters
+    ----------
+    uri : str
+        The connection string.
+    db_name : str
+        The name of the database.
+
+    Returns
+    -------
+    pymongo.database.Database
+        The database.
+
+    """
+    return get_client(uri)[db_name]
+
+
+def _projection(fields):
+    """
+    Build a projection keeping only fields, without _id.
+    """
+    projection = {field: 1 for field in fields}
+    projection['_id'] = 0
+    return projection
+
+
+def artist_names(db, ttl=None):
+    """
+    Give the names of all the artists of artist_all_details.
+
+    Returns
+    -------
+    list
+        The names, in the order of the collection.
+
+    """
+    def load():
+        return [artist['name'] for artist in db.artist_all_details.find({}, _projection(['name']))]
+
+    return _cache.get(('artist_names', db.name), load, ttl)
+
+
+def artist_details(db, name, ttl=None):
+    """
+    Give the stats of an artist shown in the app.
+
+    The number of songs is computed on the server (nombre_morceaux), the song
+    list itself is not sent.
+
+    Parameters
+    ----------
+    db : pymongo.database.Database
+        The database.
+    name : str
+        The name of the artist.
+    ttl : float, optional
+        The time to live in the cache. The default is None (DEFAULT_TTL).
+
+    Returns
+    -------
+    dict
+        The ARTIST_FIELDS and nombre_morceaux, None if the artist doesn't exist.
+
+    """
+    def load():
+        project = _projection(ARTIST_FIELDS)
+        project['nombre_morceaux'] = {'$size': {'$ifNull': ['$all_unique_song', []]}}
+        documents = list(db.artist_all_details.aggregate([{'$match': {'name': name}}, {'$limit': 1},
+                                                          {'$project': project}]))
+        return documents[0] if documents else None
+
+    return _cache.get(('artist_details', db.name, name), load, ttl)
+
+
+def artists_details(db, names, fields=ARTIST_FIELDS, batch_size=BATCH_SIZE):
+    """
+    Give the fields of several artists, with one $in query per batch of names.
+
+    Parameters
+    ----------
+    db : pymongo.database.Database
+        The database.
+    names : iterable
+        The names of the artists.
+    fields : list, optional
+        The fields to return. The default is ARTIST_FIELDS.
+    batch_size : int, optional
+        The number of names per query. The default is BATCH_SIZE.
+
+    Returns
+    -------
+    dict
+        The document of each artist found, by name.
+
+    """
+    names = list(dict.fromkeys(names))
+    projection = _projection(list(fields) + ['name'])
+
+    details = {}
+    for start in range(0, len(names), batch_size):
+        batch = names[start:start + batch_size]
+        for document in db.artist_all_details.find({'name': {'$in': batch}}, projection):
+            details[document['name']] = document
+
+    return details
+
+
+def top_artists_by_albums(db, number=3, min_albums=5, ttl=None):
+    """
+    Give the artists with the most albums, sorted and limited on the server.
+
+    Parameters
+    ----------
+    db : pymongo.database.Database
+        The database.
+    number : int, optional
+        The number of artists. The default is 3.
+    min_albums : int, optional
+        The minimum number of albums. The default is 5.
+    ttl : float, optional
+        The time to live in the cache. The default is None (DEFAULT_TTL).
+
+    Returns
+    -------
+    list
+        The name and nombre_albums of each artist, by decreasing nombre_albums.
+
+    """
+    def load():
+        cursor = db.artist_all_details.find({'nombre_albums': {'$gte': min_albums}},
+                                            _projection(['name', 'nombre_albums']))
+        return list(cursor.sort('nombre_albums', DESCENDING).limit(number))
+
+    return _cache.get(('top_artists_by_albums', db.name, number, min_albums), load, ttl)
+
+
+def lyrics_rappers(db, ttl=None):
+    """
+    Give the names of the rappers of the lyrics collection.
+    """
+    def load():
+        return [artist['rappeur'] for artist in db.lyrics.find({}, _projection(['rappeur']))]
+
+    return _cache.get(('lyrics_rappers', db.name), load, ttl)
+
+
+def lyrics_stats(db, rapper, ttl=None):
+    """
+    Give the lyrics stats of a rapper, None if there is none.
+    """
+    def load():
+        return db.lyrics.find_one({'rappeur': rapper}, _projection(LYRICS_FIELDS))
+
+    return _cache.get(('lyrics_stats', db.name, rapper), load, ttl)
+
+
+def lyrics_scatter(db, ttl=None):
+    """
+    Give the lyrics stats of all the rappers, for the scatter plots.
+    """
+    def load():
+        return list(db.lyrics.find({}, _projection(LYRICS_FIELDS)))
+
+    return _cache.get(('lyrics_scatter', db.name), load, ttl)
+
+
+
+class MongoSource:
+    """
+    The queries of the app on a database, with the same methods as data_tools.mongo_snapshot.LocalSnapshot.
+
+    Parameters
+    ----------
+    db : pymongo.database.Database
+        The database.
+
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def artist_names(self):
+        """
+        See artist_names.
+        """
+        return artist_names(self.db)
+
+    def artist_details(self, name):
+        """
+        See artist_details.
+        """
+        return artist_details(self.db, name)
+
+    def top_artists_by_albums(self, number=3, min_albums=5):
+        """
+        See top_artists_by_albums.
+        """
+        return top_artists_by_albums(self.db, number=number, min_albums=min_albums)
+
+    def lyrics_rappers(self):
+        """
+        See lyrics_rappers.
+        """
+        return lyrics_rappers(self.db)
+
+    def lyrics_stats(self, rapper):
+        """
+        See lyrics_stats.
+        """
+        return lyrics_stats(self.db, rapper)
+
+    def lyrics_scatter(self):
+        """
+        See lyrics_scatter.
+        """
+        return lyrics_scatter(self.db)
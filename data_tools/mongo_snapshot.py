@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:32:06 2026
+
+@author: gabri
+
+Local snapshot of the MongoDB collections read by the app.
+
+sync_snapshot exports artist_all_details, lyrics and global_lyrics_v2 in
+Arrow IPC files (one per collection), with only the fields used by the app.
+The sync is incremental by _id: only the ids are listed, the documents
+which are not in the snapshot yet are fetched by batches of $in and the
+deleted ones are dropped (a document modified in place needs full=True).
+The files are replaced atomically, the running apps keep their memory map.
+
+LocalSnapshot reads these files memory mapped and answers the same queries
+as data_tools.mongo_access.MongoSource, so the app can run without Mongo.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from data_tools.arrow_io import read_table, write_table
+from data_tools.mongo_access import BATCH_SIZE
+
+
+# les champs de chaque collection, avec leur type arrow
+SNAPSHOT_SCHEMAS = {
+    'artist_all_details': pa.schema([
+        ('_id', pa.string()),
+        ('name', pa.string()),
+        ('nombre_albums', pa.int64()),
+        ('nombre_morceaux', pa.int64()),
+        ('ratio_featuring', pa.float64()),
+        ('beatmakers_repartition', pa.map_(pa.string(), pa.int64())),
+        ('featuring_repartition', pa.map_(pa.string(), pa.int64())),
+    ]),
+    'lyrics': pa.schema([
+        ('_id', pa.string()),
+        ('rappeur', pa.string()),
+        ('nombre_titres', pa.int64()),
+        ('nombre_mots_par_titre', pa.float64()),
+        ('ratio_unique', pa.float64()),
+        ('avg_non_commun_tire', pa.float64()),
+    ]),
+    'global_lyrics_v2': pa.schema([
+        ('_id', pa.string()),
+        ('word', pa.string()),
+        ('count', pa.int64()),
+    ]),
+}
+
+# les champs calculés par mongo plutôt que copiés
+COMPUTED_FIELDS = {
+    'artist_all_details': {'nombre_morceaux': {'$size': {'$ifNull': ['$all_unique_song', []]}}},
+}
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def snapshot_path(directory, collection_name):
+    """
+    Give the file of a collection in the snapshot directory.
+    """
+    return os.path.join(directory, collection_name + '.arrow')
+
+
+def snapshot_exists(directory):
+    """
+    Check that the snapshot has the files of all the collections.
+    """
+    return all(os.path.exists(snapshot_path(directory, name)) for name in SNAPSHOT_SCHEMAS)
+
+
+def _convert(value, field_type):
+    """
+    Convert a Mongo value to the type of its snapshot column, None if it is missing.
+    """
+    if value is None:
+        return None
+    if pa.types.is_map(field_type):
+        return [(str(key), int(count)) for key, count in value.items()]
+    if pa.types.is_integer(field_type):
+        return int(value)
+    if pa.types.is_floating(field_type):
+        return float(value)
+    return str(value)
+
+
+def _fetch(collection, schema, computed, ids):
+    """
+    Fetch the documents of some ids, with only the fields of the snapshot, as rows.
+    """
+    project = {field.name: 1 for field in schema if field.name not in computed}
+    project.update(computed)
+
+    rows = []
+    for start in range(0, len(ids), BATCH_SIZE):
+        pipeline = [{'$match': {'_id': {'$in': ids[start:start + BATCH_SIZE]}}}, {'$project': project}]
+        for document in collection.aggregate(pipeline):
+            rows.append({field.name: _convert(document.get(field.name), field.type) for field in schema})
+
+    return rows
+
+
+def sync_collection(db, collection_name, directory, full=False):
+    """
+    Bring the snapshot of one collection up to date.
+
+    Parameters
+    ----------
+    db : pymongo.database.Database
+        The database.
+    collection_name : str
+        A collection of SNAPSHOT_SCHEMAS.
+    directory : str
+        The snapshot directory.
+    full : bool, optional
+        Export all the documents again, for the documents modified in place.
+        The default is False.
+
+    Returns
+    -------
+    dict
+        The number of documents added, removed and kept.
+
+    """
+    schema = SNAPSHOT_SCHEMAS[collection_name]
+    collection = db[collection_name]
+    path = snapshot_path(directory, collection_name)
+
+    # seulement les _id, pour savoir ce qui a été ajouté ou supprimé
+    ids = {str(document['_id']): document['_id'] for document in collection.find({}, {'_id': 1})}
+
+    if full or not os.path.exists(path):
+        existing = schema.empty_table()
+    else:
+        existing = read_table(path)
+    kept = existing.filter(pc.is_in(existing.column('_id'), value_set=pa.array(list(ids), pa.string())))
+    known = set(kept.column('_id').to_pylist())
+
+    missing = [ids[key] for key in ids if key not in known]
+    rows = _fetch(collection, schema, COMPUTED_FIELDS.get(collection_name, {}), missing)
+    table = pa.concat_tables([kept, pa.Table.from_pylist(rows, schema=schema)]).combine_chunks()
+
+    os.makedirs(directory, exist_ok=True)
+    write_table(table, path)
+
+    return {'added': len(rows), 'removed': existing.num_rows - kept.num_rows, 'kept': kept.num_rows}
+
+
+def sync_snapshot(db, directory, full=False):
+    """
+    Bring the snapshot of all the collections up to date.
+
+    Returns
+    -------
+    dict
+        The result of sync_collection for each collection.
+
+    """
+    return {name: sync_collection(db, name, directory, full=full) for name in SNAPSHOT_SCHEMAS}
+
+
+class LocalSnapshot:
+    """
+    The queries of the app on the local snapshot.
+
+    Parameters
+    ----------
+    directory : str
+        The snapshot directory written by sync_snapshot.
+
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._artists = read_table(snapshot_path(directory, 'artist_all_details')).combine_chunks()
+        self._lyrics = read_table(snapshot_path(directory, 'lyrics')).combine_chunks()
+
+        self._artist_names = self._artists.column('name').to_pylist()
+        self._artist_row = {name: row for row, name in enumerate(self._artist_names)}
+        self._lyrics_rappers = self._lyrics.column('rappeur').to_pylist()
+        self._lyrics_row = {rapper: row for row, rapper in enumerate(self._lyrics_rappers)}
+        self._lyrics_scatter = None
+
+        # les albums triés une fois, les absents en dernier
+        albums = self._artists.column('nombre_albums').to_numpy(zero_copy_only=False)
+        albums = np.where(np.isnan(albums.astype(np.float64)), -np.inf, albums)
+        self._album_order = np.argsort(-albums, kind='stable')
+        self._albums = albums
+
+    @property
+    def word_dump(self):
+        """
+        The file of global_lyrics_v2, readable by data_tools.word_index.WordIndex.from_dump.
+        """
+        return snapshot_path(self.directory, 'global_lyrics_v2')
+
+    def _row(self, table, row, fields):
+        """
+        One row of a table as a dict, the maps as dicts.
+        """
+        document = {}
+        for field in fields:
+            value = table.column(field)[row].as_py()
+            document[field] = dict(value) if pa.types.is_map(table.schema.field(field).type) and value is not None \
+                else value
+        return document
+
+    def artist_names(self):
+        """
+        See data_tools.mongo_access.artist_names.
+        """
+        return list(self._artist_names)
+
+    def artist_details(self, name):
+        """
+        See data_tools.mongo_access.artist_details.
+        """
+        if name not in self._artist_row:
+            return None
+        fields = [field for field in self._artists.column_names if field != '_id']
+        return self._row(self._artists, self._artist_row[name], fields)
+
+    def top_artists_by_albums(self, number=3, min_albums=5):
+        """
+        See data_tools.mongo_access.top_artists_by_albums, the albums are sorted once at loading.
+        """
+        rows = [row for row in self._album_order[:number] if self._albums[row] >= min_albums]
+        return [self._row(self._artists, row, ['name', 'nombre_albums']) for row in rows]
+
+    def lyrics_rappers(self):
+        """
+        See data_tools.mongo_access.lyrics_rappers.
+        """
+        return list(self._lyrics_rappers)
+
+    def lyrics_stats(self, rapper):
+        """
+        See data_tools.mongo_access.lyrics_stats.
+        """
+        if rapper not in self._lyrics_row:
+            return None
+        fields = [field for field in self._lyrics.column_names if field != '_id']
+        return self._row(self._lyrics, self._lyrics_row[rapper], fields)
+
+    def lyrics_scatter(self):
+        """
+        See data_tools.mongo_access.lyrics_scatter, the list is built on the first call.
+        """
+        if self._lyrics_scatter is None:
+            self._lyrics_scatter = self._lyrics.drop(['_id']).to_pylist()
+        return self._lyrics_scatter
+
+
+def get_snapshot(directory):
+    """
+    Give the LocalSnapshot of a directory, loaded once per process (and again after a sync).
+
+    Parameters
+    ----------
+    directory : str
+        The snapshot directory.
+
+    Returns
+    -------
+    LocalSnapshot
+        The snapshot.
+
+    """
+    key = (os.path.abspath(directory),) + tuple(os.path.getmtime(snapshot_path(directory, name))
+                                               for name in SNAPSHOT_SCHEMAS)
+    with _snapshots_lock:
+        if key not in _snapshots:
+            _snapshots[key] = LocalSnapshot(directory)
+        return _snapshots[key]
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:12:40 2026
+
+@author: gabri
+
+In-memory index of the word counts of global_lyrics_v2.
+
+The words are normalized (lower case, without accents, œ -> oe) and kept in
+sorted numpy arrays, so that the lookups don't need a Mongo request:
+
+- count(word, exact=True) : the count of this exact spelling.
+- count(word) : the total of all the spellings with the same normalized form
+  ("Marseille", "marseille", "MARSEILLE").
+- complete(prefix) : the most frequent words starting with prefix, for the
+  autocompletion (two bisections in the sorted forms).
+
+A word given twice (a document exported twice in a dump) is counted once,
+with its highest count.
+
+The index is built from the collection or from a local dump (.arrow,
+.parquet, .json or .jsonl file of word / count), see save, and get_word_index
+keeps one index per source for the whole process.
+"""
+
+import json
+import os
+import threading
+import unicodedata
+
+import numpy as np
+import pyarrow as pa
+
+from data_tools.arrow_io import read_table, write_table
+
+
+# les ligatures que NFKD ne décompose pas
+LIGATURES = str.maketrans({'œ': 'oe', 'Œ': 'oe', 'æ': 'ae', 'Æ': 'ae'})
+
+# plus grand que tous les caractères, borne haute des préfixes
+_LAST_CHARACTER = '\U0010ffff'
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def normalize(word):
+    """
+    Give the normalized form of a word: without accents, in lower case.
+
+    Parameters
+    ----------
+    word : str
+        The word.
+
+    Returns
+    -------
+    str
+        The normalized form, "Élève" -> "eleve".
+
+    """
+    decomposed = unicodedata.normalize('NFKD', word.strip().translate(LIGATURES))
+    return ''.join(character for character in decomposed if not unicodedata.combining(character)).casefold()
+
+
+class WordIndex:
+    """
+    Word counts indexed by normalized form.
+
+    Parameters
+    ----------
+    records : iterable
+        The (word, count) pairs, a repeated word keeps its highest count.
+
+    """
+
+    def __init__(self, records):
+        words = []
+        counts = []
+        for word, count in records:
+            words.append(str(word))
+            counts.append(int(count))
+        words = np.array(words, dtype=str)
+        counts = np.array(counts, dtype=np.int64)
+
+        # un mot répété n'est gardé qu'une fois, avec son plus grand nombre
+        order = np.lexsort((-counts, words))
+        self._words, first = np.unique(words[order], return_index=True)
+        self._counts = counts[order][first]
+
+        # les orthographes regroupées par forme, la plus fréquente en premier
+        forms = np.array([normalize(word) for word in self._words.tolist()], dtype=str)
+        order = np.lexsort((self._words, -self._counts, forms))
+        self._forms, first = np.unique(forms[order], return_index=True)
+        self._spelling_words = self._words[order]
+        self._spelling_counts = self._counts[order]
+        self._starts = np.append(first, len(order))
+        self._totals = np.add.reduceat(self._spelling_counts, first) if len(first) else np.zeros(0, np.int64)
+
+    def __len__(self):
+        return len(self._words)
+
+    def _position(self, word):
+        """
+        The position of the normalized form of word in the sorted forms, None if absent.
+        """
+        form = normalize(word)
+        position = int(np.searchsorted(self._forms, form))
+        if position < len(self._forms) and self._forms[position] == form:
+            return position
+        return None
+
+    def count(self, word, exact=False):
+        """
+        Give the count of a word.
+
+        Parameters
+        ----------
+        word : str
+            The word.
+        exact : bool, optional
+            Only the count of this spelling, case and accents included.
+            The default is False (all the spellings with the same normalized form).
+
+        Returns
+        -------
+        int
+            The count, None if the word is absent.
+
+        """
+        if exact:
+            position = int(np.searchsorted(self._words, word))
+            if position < len(self._words) and self._words[position] == word:
+                return int(self._counts[position])
+            return None
+
+        position = self._position(word)
+        return None if position is None else int(self._totals[position])
+
+    def spellings(self, word):
+        """
+        Give the spellings of a word found in the lyrics.
+
+        Returns
+        -------
+        list
+            The (spelling, count) with the same normalized form as word, by
+            decreasing count, empty if the word is absent.
+
+        """
+        position = self._position(word)
+        if position is None:
+            return []
+        start, stop = self._starts[position], self._starts[position + 1]
+        return list(zip(self._spelling_words[start:stop].tolist(), self._spelling_counts[start:stop].tolist()))
+
+    def complete(self, prefix, limit=10):
+        """
+        Give the most frequent words starting with a prefix.
+
+        Parameters
+        ----------
+        prefix : str
+            The beginning of the word, case and accents are ignored.
+        limit : int, optional
+            The maximum number of words. The default is 10.
+
+        Returns
+        -------
+        list
+            The (most frequent spelling, total count) of each matching form,
+            by decreasing count.
+
+        """
+        if limit <= 0:
+            return []
+
+        form = normalize(prefix)
+        start = int(np.searchsorted(self._forms, form))
+        stop = int(np.searchsorted(self._forms, form + _LAST_CHARACTER))
+        totals = self._totals[start:stop]
+
+        # les limit plus grands totaux, à égalité dans l'ordre des formes
+        candidates = np.arange(len(totals))
+        if len(totals) > limit:
+            threshold = np.partition(totals, len(totals) - limit)[len(totals) - limit]
+            candidates = np.flatnonzero(totals >= threshold)
+        best = candidates[np.argsort(-totals[candidates], kind='stable')[:limit]] + start
+
+        return [(str(self._spelling_words[self._starts[position]]), int(self._totals[position]))
+                for position in best]
+
+    def save(self, path):
+        """
+        Write the word counts in a local dump, readable by from_dump.
+
+        Parameters
+        ----------
+        path : str
+            The .arrow or .parquet file.
+
+        """
+        write_table(pa.table({'word': pa.array(self._words, pa.string()),
+                              'count': pa.array(self._counts, pa.int64())}), path)
+
+    @classmethod
+    def from_collection(cls, collection):
+        """
+        Build the index from a collection with word and count fields (global_lyrics_v2).
+        """
+        return cls((document['word'], document['count'])
+                   for document in collection.find({}, {'word': 1, 'count': 1, '_id': 0}))
+
+    @classmethod
+    def from_dump(cls, path):
+        """
+        Build the index from a local dump.
+
+        Parameters
+        ----------
+        path : str
+            A .arrow / .parquet table with word and count columns, or a
+            .json list / .jsonl file of {"word": ..., "count": ...} documents
+            (mongoexport).
+
+        Raises
+        ------
+        ValueError
+            If the extension is not supported.
+
+        """
+        extension = os.path.splitext(path)[1]
+        if extension in ('.arrow', '.parquet'):
+            table = read_table(path, columns=['word', 'count'])
+            return cls(zip(table.column('word').to_pylist(), table.column('count').to_pylist()))
+
+        if extension == '.json':
+            with open(path, encoding='utf-8') as infile:
+                documents = json.load(infile)
+        elif extension == '.jsonl':
+            with open(path, encoding='utf-8') as infile:
+                documents = [json.loads(line) for line in infile if line.strip()]
+        else:
+            raise ValueError('Unsupported word dump {}, expected .arrow, .parquet, .json or .jsonl'.format(path))
+
+        return cls((document['word'], document['count']) for document in documents)
+
+
+def get_word_index(db=None, path=None):
+    """
+    Give the word index of the process, built on the first call.
+
+    Parameters
+    ----------
+    db : pymongo.database.Database, optional
+        The database, global_lyrics_v2 is read if there is no dump.
+    path : str, optional
+        A local dump, used if the file exists.
+
+    Raises
+    ------
+    ValueError
+        If there is neither a dump nor a database.
+
+    Returns
+    -------
+    WordIndex
+        The index.
+
+    """
+    if path is not None and os.path.exists(path):
+        key = ('dump', os.path.abspath(path), os.path.getmtime(path))
+    elif db is not None:
+        key = ('mongo', db.name)
+    else:
+        raise ValueError('No word dump at {} and no database to build the word index'.format(path))
+
+    with _indexes_lock:
+        if key not in _indexes:
+            if key[0] == 'dump':
+                _indexes[key] = WordIndex.from_dump(path)
+            else:
+                _indexes[key] = WordIndex.from_collection(db.global_lyrics_v2)
+        return _indexes[key]
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:02:47 2026
+
+@author: gabri
+
+Approximate distance metrics from a sample of pivot nodes, for the graphs
+too big for the exact all-pairs BFS.
+
+A BFS (with shortest path counting) is done from k pivots chosen at random,
+and every distance based metric is estimated from these k BFS only:
+
+- closeness and average_shortest_path: mean of the distances to the pivots
+  (Eppstein & Wang).
+- eccentricity: the value is the lower bound max(d(p, v)) and the error is the
+  gap to the upper bound min(d(p, v) + eccentricity(p)), so the exact value is
+  in [value, value + error].
+- betweeness: the dependencies of the pivots scaled by n / k (Brandes & Pich).
+
+Except for eccentricity, the error is the half-width of the normal confidence
+interval of the sample mean (with the finite population correction), so the
+errors are 0 when every node is a pivot. This interval is only asymptotic:
+with a few dozen pivots it holds for fewer nodes than its confidence says,
+the dependencies of betweeness being very skewed (on the featurings network
+at 30 pivots, a 95% error covers the exact value for about 70% of the nodes
+for betweeness and 90% for closeness). It is an order of magnitude of the
+error, not a guaranteed bound.
+
+A node whose only sampled distances are to itself (it is the only pivot)
+has no estimate of its closeness: closeness and closeness_error are NaN.
+"""
+
+import math
+import random
+from collections import deque
+from statistics import NormalDist
+
+import networkx as nx
+import numpy as np
+
+
+def number_of_pivots(number_of_nodes, epsilon, confidence=0.95):
+    """
+    Compute the number of pivots needed for a target error.
+
+    Parameters
+    ----------
+    number_of_nodes : int
+        The number of nodes of the network.
+    epsilon : float
+        The target error on the mean distance, as a fraction of the diameter
+        (Hoeffding bound).
+    confidence : float, optional
+        The probability that the error is below epsilon. The default is 0.95.
+
+    Returns
+    -------
+    int
+        The number of pivots, at most the number of nodes.
+
+    """
+    pivots = math.ceil(math.log(2 / (1 - confidence)) / (2 * epsilon ** 2))
+
+    return min(pivots, number_of_nodes)
+
+
+def _bfs_with_paths(network, source):
+    """
+    BFS from source counting the shortest paths, as in the Brandes algorithm.
+    """
+    distance = {source: 0}
+    sigma = {source: 1}
+    predecessors = {source: []}
+    order = []
+
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        for neighbor in network[node]:
+            if neighbor not in distance:
+                distance[neighbor] = distance[node] + 1
+                sigma[neighbor] = 0
+                predecessors[neighbor] = []
+                queue.append(neighbor)
+            if distance[neighbor] == distance[node] + 1:
+                sigma[neighbor] += sigma[node]
+                predecessors[neighbor].append(node)
+
+    return order, predecessors, sigma, distance
+
+
+def _dependencies(order, predecessors, sigma, source):
+    """
+    Accumulate the dependency of the source on each node.
+    """
+    delta = dict.fromkeys(order, 0.0)
+    for node in reversed(order):
+        coeff = (1 + delta[node]) / sigma[node]
+        for predecessor in predecessors[node]:
+            delta[predecessor] += sigma[predecessor] * coeff
+    delta[source] = 0.0
+
+    return delta
+
+
+def _half_width(total, total_square, pivots, number_of_nodes, confidence):
+    """
+    Half-width of the normal confidence interval of a mean over the pivots.
+    """
+    if not 1 < pivots < number_of_nodes:
+        return np.zeros_like(total)
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    finite_population = math.sqrt((number_of_nodes - pivots) / (number_of_nodes - 1))
+    variance = (total_square - total ** 2 / pivots) / (pivots - 1)
+
+    return z * np.sqrt(np.maximum(variance, 0) / pivots) * finite_population
+
+
+def approximate_distance_calculations(network, pivots=None, epsilon=None, seed=None, confidence=0.95):
+    """
+    Estimate the distance based metrics from a BFS on a sample of pivots.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network you want to analyse, it must be connected.
+    pivots : int, optional
+        The number of pivots. The default is None.
+    epsilon : float, optional
+        The target error, used to choose the number of pivots when pivots is
+        None, see number_of_pivots. The default is None.
+    seed : int, optional
+        The seed of the pivot sample. The default is None.
+    confidence : float, optional
+        The confidence level of the errors. The default is 0.95.
+
+    Raises
+    ------
+    ValueError
+        If neither pivots nor epsilon is given, or if there is no pivot.
+    nx.NetworkXError
+        If the network is not connected (infinite path length).
+
+    Returns
+    -------
+    distances : dict
+        The same dict as all_pairs_distance_calculations, with the estimated
+        values, plus betweeness and the errors eccentricity_error,
+        closeness_error, betweeness_error and average_shortest_path_error
+        (asymptotic half-widths at confidence, see the module docstring).
+        diameter is a lower bound and radius an upper bound of the exact values.
+        closeness and closeness_error are NaN for a node whose only pivot is
+        itself.
+
+    """
+    if pivots is None and epsilon is None:
+        raise ValueError('Give either the number of pivots or the target epsilon')
+
+    nodes = list(network.nodes)
+    number_of_nodes = len(nodes)
+
+    if pivots is None:
+        pivots = number_of_pivots(number_of_nodes, epsilon, confidence)
+    pivots = min(pivots, number_of_nodes)
+    if pivots < 1:
+        raise ValueError('At least one pivot is needed')
+    sample = random.Random(seed).sample(nodes, pivots)
+
+    # on accumule au fur et à mesure, on ne garde pas les distances de chaque pivot
+    sum_distance = np.zeros(number_of_nodes)
+    sum_square_distance = np.zeros(number_of_nodes)
+    lower_eccentricity = np.zeros(number_of_nodes, dtype=int)
+    upper_eccentricity = np.full(number_of_nodes, np.iinfo(int).max)
+    sum_dependency = np.zeros(number_of_nodes)
+    sum_square_dependency = np.zeros(number_of_nodes)
+    pivot_average = []
+
+    for pivot in sample:
+        order, predecessors, sigma, distance = _bfs_with_paths(network, pivot)
+        if len(distance) != number_of_nodes:
+            raise nx.NetworkXError('Found infinite path length because the graph is not connected')
+
+        lengths = np.fromiter((distance[node] for node in nodes), dtype=int, count=number_of_nodes)
+        pivot_eccentricity = lengths.max()
+        sum_distance += lengths
+        sum_square_distance += lengths ** 2
+        np.maximum(lower_eccentricity, lengths, out=lower_eccentricity)
+        np.minimum(upper_eccentricity, lengths + pivot_eccentricity, out=upper_eccentricity)
+        if number_of_nodes > 1:
+            pivot_average.append(lengths.sum() / (number_of_nodes - 1))
+
+        delta = _dependencies(order, predecessors, sigma, pivot)
+        dependency = np.fromiter((delta[node] for node in nodes), dtype=float, count=number_of_nodes)
+        sum_dependency += dependency
+        sum_square_dependency += dependency ** 2
+
+    # closeness : (n - 1) / somme des distances, la somme étant estimée sur les pivots
+    mean_distance = sum_distance / pivots
+    total_distance = mean_distance * number_of_nodes
+    closeness = np.zeros(number_of_nodes)
+    closeness_error = np.zeros(number_of_nodes)
+    if number_of_nodes > 1:
+        # un noeud qui n'a que lui même comme pivot n'a aucune distance estimée, NaN plutôt que l'infini
+        total_distance = np.where(mean_distance > 0, total_distance, np.nan)
+        closeness = (number_of_nodes - 1) / total_distance
+        closeness_error = closeness * _half_width(sum_distance, sum_square_distance, pivots, number_of_nodes,
+                                                  confidence) / (total_distance / number_of_nodes)
+
+    # betweeness : dépendances des pivots mises à l'échelle n / k
+    betweeness = np.zeros(number_of_nodes)
+    betweeness_error = np.zeros(number_of_nodes)
+    if number_of_nodes > 2:
+        scale = number_of_nodes / ((number_of_nodes - 1) * (number_of_nodes - 2))
+        betweeness = sum_dependency / pivots * scale
+        betweeness_error = _half_width(sum_dependency, sum_square_dependency, pivots, number_of_nodes, confidence) * scale
+
+    # le barycentre estimé, on refait un BFS exact depuis lui
+    smallest = np.nanmin(total_distance)
+    barycenter = [node for node, total in zip(nodes, total_distance) if total == smallest]
+    distance_to_barycenter = {bary_node: nx.single_source_shortest_path_length(network, bary_node)
+                              for bary_node in barycenter}
+
+    distances = {}
+    distances['eccentricity'] = dict(zip(nodes, lower_eccentricity.tolist()))
+    distances['eccentricity_error'] = dict(zip(nodes, (upper_eccentricity - lower_eccentricity).tolist()))
+    distances['closeness'] = dict(zip(nodes, closeness.tolist()))
+    distances['closeness_error'] = dict(zip(nodes, closeness_error.tolist()))
+    distances['betweeness'] = dict(zip(nodes, betweeness.tolist()))
+    distances['betweeness_error'] = dict(zip(nodes, betweeness_error.tolist()))
+    distances['diameter'] = int(lower_eccentricity.max())
+    distances['radius'] = int(upper_eccentricity.min())
+    distances['barycenter'] = barycenter
+    if pivot_average:
+        pivot_average = np.array(pivot_average)
+        distances['average_shortest_path'] = float(pivot_average.mean())
+        distances['average_shortest_path_error'] = float(_half_width(pivot_average.sum(), (pivot_average ** 2).sum(),
+                                                                     pivots, number_of_nodes, confidence))
+    else:
+        distances['average_shortest_path'] = 0
+        distances['average_shortest_path_error'] = 0.0
+    distances['distance_to_barycenter'] = distance_to_barycenter
+
+    return distances
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:36:52 2026
+
+@author: gabri
+
+Clique counting and square clustering with a work and time budget.
+
+Without budget the values are exactly the ones of nx.number_of_cliques and
+nx.square_clustering. With a budget, the work is bounded per node, so that
+a single dense crew or a big hub can't stall the batch:
+
+- clique: the maximal cliques are enumerated with Bron-Kerbosch in the
+  degeneracy order (Eppstein, Löffler & Strash), one subproblem per node v
+  for the cliques whose first node is v, and only counted (the cliques are
+  never stored). A subproblem above max_work calls, or started after
+  time_budget, is estimated with the Knuth estimator of the number of leaves
+  of its search tree (mean over `samples` random descents, unbiased), and
+  v and its later neighbours are flagged as sampled.
+- square_clustering: the squares of a node are counted from the number of
+  2-paths to each node at distance 2 (work = sum of the degrees of the
+  neighbours). A node above max_work, or after time_budget, is estimated
+  from `samples` random pairs of neighbours and flagged as sampled.
+
+Self loops are ignored, as in networkx.
+"""
+
+import random
+import time
+
+
+class _BudgetExceeded(Exception):
+    """
+    Raised inside the enumeration of a clique subproblem when its budget is used.
+    """
+
+
+def _index_adjacency(network):
+    """
+    Give the nodes and the neighbour sets of each node as indices, without self loops.
+    """
+    nodes = list(network.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    adjacency = []
+    for node in nodes:
+        neighbors = {index[neighbor] for neighbor in network[node]}
+        neighbors.discard(index[node])
+        adjacency.append(neighbors)
+
+    return nodes, adjacency
+
+
+def _deadline(time_budget):
+    """
+    The time after which the budget is used, None without time budget.
+    """
+    if time_budget is None:
+        return None
+    return time.perf_counter() + time_budget
+
+
+def _out_of_time(deadline):
+    """
+    Check if the time budget is used.
+    """
+    return deadline is not None and time.perf_counter() > deadline
+
+
+def degeneracy_ordering(adjacency):
+    """
+    Order the nodes by repeatedly removing a node of smallest remaining degree.
+
+    Parameters
+    ----------
+    adjacency : list
+        The set of neighbours (indices) of each node.
+
+    Returns
+    -------
+    order : list
+        The indices of the nodes, each node having at most the degeneracy of
+        the graph as neighbours after it.
+
+    """
+    degree = [len(neighbors) for neighbors in adjacency]
+    buckets = [set() for _ in range(max(degree, default=0) + 1)]
+    for node, node_degree in enumerate(degree):
+        buckets[node_degree].add(node)
+
+    removed = [False] * len(adjacency)
+    order = []
+    smallest = 0
+    for _ in range(len(adjacency)):
+        # le degré minimum ne peut baisser que de 1 à chaque retrait
+        smallest = max(smallest - 1, 0)
+        while not buckets[smallest]:
+            smallest += 1
+        node = min(buckets[smallest])
+        buckets[smallest].remove(node)
+        removed[node] = True
+        order.append(node)
+        for neighbor in adjacency[node]:
+            if not removed[neighbor]:
+                buckets[degree[neighbor]].remove(neighbor)
+                degree[neighbor] -= 1
+                buckets[degree[neighbor]].add(neighbor)
+
+    return order
+
+
+def _choose_pivot(adjacency, candidates, excluded):
+    """
+    The pivot of Tomita: the node with the most neighbours among the candidates.
+    """
+    return max(candidates | excluded, key=lambda node: len(candidates & adjacency[node]))
+
+
+def _count_cliques(adjacency, clique, candidates, excluded, counts, work):
+    """
+    Bron-Kerbosch with pivot, adding 1 to each node of each maximal clique.
+
+    work is [calls, max_calls, deadline], _BudgetExceeded is raised when the
+    number of calls or the time is above the budget.
+    """
+    work[0] += 1
+    if (work[1] is not None and work[0] > work[1]) or _out_of_time(work[2]):
+        raise _BudgetExceeded
+
+    if not candidates:
+        if not excluded:
+            for node in clique:
+                counts[node] = counts.get(node, 0) + 1
+        return
+
+    pivot = _choose_pivot(adjacency, candidates, excluded)
+    for node in sorted(candidates - adjacency[pivot]):
+        clique.append(node)
+        _count_cliques(adjacency, clique, candidates & adjacency[node], excluded & adjacency[node],
+                       counts, work)
+        clique.pop()
+        candidates = candidates - {node}
+        excluded = excluded | {node}
+
+
+def _sample_cliques(adjacency, first, candidates, excluded, samples, rng, counts):
+    """
+    Knuth estimate of the cliques of a subproblem, from random descents of the Bron-Kerbosch tree.
+    """
+    for _ in range(samples):
+        clique = [first]
+        node_candidates = candidates
+        node_excluded = excluded
+        weight = 1.0
+
+        while node_candidates:
+            pivot = _choose_pivot(adjacency, node_candidates, node_excluded)
+            branches = sorted(node_candidates - adjacency[pivot])
+            # un exclu voisin de tous les candidats, aucune clique maximale dans cette branche
+            if not branches:
+                break
+            # la i-ème branche voit les i premières passées dans les exclus
+            i = rng.randrange(len(branches))
+            weight *= len(branches)
+            node = branches[i]
+            previous = set(branches[:i])
+            clique.append(node)
+            node_candidates = (node_candidates - previous) & adjacency[node]
+            node_excluded = (node_excluded | previous) & adjacency[node]
+
+        # une feuille avec des exclus n'est pas une clique maximale
+        if not node_candidates and not node_excluded:
+            for node in clique:
+                counts[node] = counts.get(node, 0) + weight / samples
+
+
+def bounded_number_of_cliques(network, max_work=None, time_budget=None, samples=200, seed=0):
+    """
+    Count the maximal cliques of each node, with a budget.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network you want to analyse.
+    max_work : int, optional
+        The maximum number of Bron-Kerbosch calls for the cliques starting
+        at one node. The default is None (no limit).
+    time_budget : float, optional
+        The number of seconds after which the remaining subproblems are
+        estimated. The default is None (no limit).
+    samples : int, optional
+        The number of random descents of an estimated subproblem.
+        The default is 200.
+    seed : int, optional
+        The seed of the random descents. The default is 0.
+
+    Returns
+    -------
+    clique : dict
+        The number of maximal cliques of each node, as nx.number_of_cliques
+        (rounded estimate for the sampled nodes).
+    sampled : dict
+        True for the nodes whose count is estimated.
+
+    """
+    nodes, adjacency = _index_adjacency(network)
+    deadline = _deadline(time_budget)
+    rng = random.Random(seed)
+
+    order = degeneracy_ordering(adjacency)
+    position = {node: i for i, node in enumerate(order)}
+    counts = {}
+    sampled = set()
+
+    for node in order:
+        later = {neighbor for neighbor in adjacency[node] if position[neighbor] > position[node]}
+        earlier = adjacency[node] - later
+
+        # on ne fusionne les comptes du sous-problème que s'il va au bout
+        subproblem_counts = {}
+        try:
+            if _out_of_time(deadline):
+                raise _BudgetExceeded
+            _count_cliques(adjacency, [node], later, earlier, subproblem_counts, [0, max_work, deadline])
+        except _BudgetExceeded:
+            subproblem_counts = {}
+            _sample_cliques(adjacency, node, later, earlier, samples, rng, subproblem_counts)
+            sampled.add(node)
+            sampled.update(later)
+
+        for clique_node, count in subproblem_counts.items():
+            counts[clique_node] = counts.get(clique_node, 0) + count
+
+    clique = {node: int(round(counts.get(i, 0))) for i, node in enumerate(nodes)}
+
+    return clique, {node: i in sampled for i, node in enumerate(nodes)}
+
+
+def bounded_square_clustering(network, max_work=None, time_budget=None, samples=200, seed=0):
+    """
+    Compute the square clustering of each node, with a budget.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network you want to analyse.
+    max_work : int, optional
+        The maximum sum of the degrees of the neighbours of a node for the
+        exact count. The default is None (no limit).
+    time_budget : float, optional
+        The number of seconds after which the remaining nodes are estimated.
+        The default is None (no limit).
+    samples : int, optional
+        The number of random pairs of neighbours of an estimated node.
+        The default is 200.
+    seed : int, optional
+        The seed of the random pairs. The default is 0.
+
+    Returns
+    -------
+    square_clustering : dict
+        The square clustering of each node, as nx.square_clustering.
+    sampled : dict
+        True for the nodes whose value is estimated.
+
+    """
+    nodes, adjacency = _index_adjacency(network)
+    deadline = _deadline(time_budget)
+    rng = random.Random(seed)
+
+    square_clustering = {}
+    sampled = {}
+    for v, node in enumerate(nodes):
+        neighbors = adjacency[v]
+        degree = len(neighbors)
+        sampled[node] = False
+        if degree < 2:
+            square_clustering[node] = 0
+            continue
+
+        # les termes du dénominateur qui ne demandent que les degrés
+        neighbor_degrees = sum(len(adjacency[u]) for u in neighbors)
+        uw_degrees = neighbor_degrees * (degree - 1)
+        uw_count = degree * (degree - 1)
+
+        if (max_work is None or neighbor_degrees <= max_work) and not _out_of_time(deadline):
+            # nombre de 2-chemins de v vers chaque noeud, les carrés sont les paires de 2-chemins
+            paths = {}
+            for u in neighbors:
+                for x in adjacency[u]:
+                    if x != v:
+                        paths[x] = paths.get(x, 0) + 1
+            triangles = sum(paths.get(u, 0) for u in neighbors)
+            squares = sum(count * (count - 1) for count in paths.values()) // 2
+        else:
+            # estimation sur des paires de voisins tirées au hasard
+            neighbor_list = sorted(neighbors)
+            pairs = degree * (degree - 1) // 2
+            pair_squares = 0
+            pair_triangles = 0
+            for _ in range(samples):
+                u, w = rng.sample(neighbor_list, 2)
+                pair_squares += len(adjacency[u] & adjacency[w]) - 1
+                pair_triangles += w in adjacency[u]
+            squares = pairs * pair_squares / samples
+            triangles = 2 * pairs * pair_triangles / samples
+            sampled[node] = True
+
+        potential = uw_degrees - uw_count - triangles - squares
+        if potential > 0:
+            square_clustering[node] = squares / potential
+        else:
+            square_clustering[node] = 0
+
+    return square_clustering, sampled
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:41:30 2026
+
+@author: gabri
+
+Construction of the featurings network from the artist_all_details documents.
+
+The documents are read with a cursor that only asks for name and
+featuring_repartition, by batches, and are not kept: each featuring becomes
+an edge (two node indices packed in one int64) appended to compact arrays.
+At the end the edges are deduplicated with numpy, an artist A with
+{B: 3} and an artist B with {A: 2} give one edge A - B of weight 3 (the
+collaborations seen from the best documented side), and the result is put
+in the binary format of graph_loader (CSR adjacency included). The memory
+is the one of the edges, not of the documents.
+"""
+
+from array import array
+
+import numpy as np
+
+from network_tools.graph_loader import arrays_to_network, edges_to_arrays, save_arrays
+
+
+# les seuls champs demandés à mongo
+FEATURING_PROJECTION = {'name': 1, 'featuring_repartition': 1, '_id': 0}
+
+# nombre de documents par aller-retour du curseur
+BATCH_SIZE = 1000
+
+
+def iter_featurings(collection, batch_size=BATCH_SIZE):
+    """
+    Read the featurings of each artist.
+
+    Parameters
+    ----------
+    collection : pymongo.collection.Collection
+        The artist_all_details collection.
+    batch_size : int, optional
+        The number of documents per batch of the cursor. The default is BATCH_SIZE.
+
+    Yields
+    ------
+    artist : str
+        The name of the artist.
+    featurings : dict
+        The number of songs with each other artist, empty if there is none.
+
+    """
+    for document in collection.find({}, FEATURING_PROJECTION, batch_size=batch_size):
+        yield document['name'], document.get('featuring_repartition') or {}
+
+
+def featuring_arrays(collection, batch_size=BATCH_SIZE, artists_only=True):
+    """
+    Build the featurings network in the binary format of graph_loader, in one pass on the collection.
+
+    Parameters
+    ----------
+    collection : pymongo.collection.Collection
+        The artist_all_details collection.
+    batch_size : int, optional
+        The number of documents per batch of the cursor. The default is BATCH_SIZE.
+    artists_only : bool, optional
+        Keep only the featurings between artists of the collection (the
+        other featured people are not rappers of the database). The default is True.
+
+    Returns
+    -------
+    arrays : dict
+        The arrays of graph_loader.load_arrays, with the weights. The nodes
+        are the artists with at least one featuring, in the order of the
+        collection.
+
+    """
+    index = {}
+    labels = []
+    documents = set()
+    keys = array('q')
+    counts = array('q')
+
+    for artist, featurings in iter_featurings(collection, batch_size=batch_size):
+        documents.add(artist)
+        source = index.setdefault(artist, len(labels))
+        if source == len(labels):
+            labels.append(artist)
+        for partner, count in featurings.items():
+            if partner == artist or not count:
+                continue
+            target = index.setdefault(partner, len(labels))
+            if target == len(labels):
+                labels.append(partner)
+            # l'arête non orientée, le plus petit indice en premier
+            low, high = min(source, target), max(source, target)
+            keys.append((low << 32) | high)
+            counts.append(int(count))
+
+    keys = np.frombuffer(keys, dtype=np.int64)
+    counts = np.frombuffer(counts, dtype=np.int64)
+    sources = keys >> 32
+    targets = keys & 0xFFFFFFFF
+    if artists_only:
+        is_artist = np.array([label in documents for label in labels], dtype=bool)
+        kept = is_artist[sources] & is_artist[targets]
+        keys, counts, sources, targets = keys[kept], counts[kept], sources[kept], targets[kept]
+
+    # une arête par paire, avec le plus grand nombre de collaborations vu des deux côtés
+    unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    weights = np.zeros(len(unique_keys), dtype=np.int64)
+    np.maximum.at(weights, inverse, counts)
+    # dans l'ordre de la première apparition, comme si on ajoutait les arêtes au fil de la lecture
+    order = np.argsort(first, kind='stable')
+    sources, targets, weights = sources[first[order]], targets[first[order]], weights[order]
+
+    # on ne garde que les noeuds qui ont une arête, renumérotés dans l'ordre de lecture
+    used = np.zeros(len(labels), dtype=bool)
+    used[sources] = True
+    used[targets] = True
+    new_index = np.cumsum(used) - 1
+
+    return edges_to_arrays([label for label, keep in zip(labels, used) if keep], new_index[sources],
+                           new_index[targets], weights=weights.astype(np.float64))
+
+
+def build_featuring_network(collection, batch_size=BATCH_SIZE, artists_only=True, output_path=None):
+    """
+    Build the featurings network from the artist_all_details collection.
+
+    Parameters
+    ----------
+    collection : pymongo.collection.Collection
+        The artist_all_details collection.
+    batch_size : int, optional
+        The number of documents per batch of the cursor. The default is BATCH_SIZE.
+    artists_only : bool, optional
+        Keep only the featurings between artists of the collection. The default is True.
+    output_path : str, optional
+        If given, the .npz file where the arrays are written, readable by
+        graph_loader.load_network. The default is None.
+
+    Returns
+    -------
+    network : nx.classes.graph.Graph
+        The network, the weight of an edge being the number of collaborations.
+
+    """
+    arrays = featuring_arrays(collection, batch_size=batch_size, artists_only=artists_only)
+    if output_path is not None:
+        save_arrays(arrays, output_path)
+
+    return arrays_to_network(arrays)
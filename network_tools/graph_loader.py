@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:02:15 2026
+
+@author: gabri
+
+Loading of the network without nx.read_gml.
+
+iter_gml reads a GML file line by line and gives the nodes and the edges as
+soon as their block is closed, so the edges can be used before the end of
+the file. gml_to_arrays converts the file once into a binary .npz file:
+
+- labels : the label of each node, in the order of the file.
+- pos : the (x, y) position of each node, NaN when there is none.
+- sources, targets : the edges as node indices, in the order of the file.
+- indptr, indices : the CSR adjacency (each edge in both directions, the
+  indices sorted in each row).
+- weights : the weight of each edge, only if the file has weights.
+
+The format is the one of a simple undirected graph: the labels, the pos of
+the nodes and the weight of the edges are kept, the other attributes (the
+color of the edges of the real network for instance) are dropped with a
+warning, and a directed or multigraph file is refused. The file is written
+through a temporary file replaced atomically.
+
+load_arrays reads this file without creating a Python object per edge, and
+arrays_to_network rebuilds the graph (same nodes and edges, in the same
+order, as nx.read_gml) when networkx is needed for the metrics.
+"""
+
+import html
+import logging
+import os
+import re
+import tempfile
+
+import networkx as nx
+import numpy as np
+import scipy as sp
+import scipy.sparse  # noqa: F401
+
+
+logger = logging.getLogger(__name__)
+
+
+# les seuls attributs gardés par le format binaire
+KEPT_ATTRIBUTES = {'node': {'id', 'label', 'pos'}, 'edge': {'source', 'target', 'weight'}}
+
+# un token GML : crochet, chaîne entre guillemets ou mot
+GML_TOKEN = re.compile(r'\[|\]|"[^"]*"|[^\s\[\]"]+')
+
+
+def _gml_value(token):
+    """
+    Convert a GML token into an int, a float or a string.
+    """
+    if token.startswith('"'):
+        return html.unescape(token[1:-1])
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+
+def _add_attribute(block, key, value):
+    """
+    Add a key to a GML block, a repeated key becomes a list like in nx.read_gml.
+    """
+    _, attributes, repeated = block
+    if key not in attributes:
+        attributes[key] = value
+    elif key in repeated:
+        attributes[key].append(value)
+    else:
+        attributes[key] = [attributes[key], value]
+        repeated.add(key)
+
+
+def iter_gml(path):
+    """
+    Read a GML file, giving each node and each edge when its block is closed.
+
+    Parameters
+    ----------
+    path : str
+        The GML file.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a valid GML graph.
+
+    Yields
+    ------
+    kind : str
+        'node', 'edge', or 'graph' for an attribute of the graph itself.
+    attributes : dict
+        The attributes of the block (id, label, pos, source, target...).
+
+    """
+    # la pile des blocs ouverts, (clé, attributs, clés répétées)
+    stack = []
+    key = None
+
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            for token in GML_TOKEN.findall(line):
+                if token == '[':
+                    if key is None:
+                        raise ValueError('Block without key in {}'.format(path))
+                    stack.append((key, {}, set()))
+                    key = None
+                elif token == ']':
+                    if key is not None or not stack:
+                        raise ValueError('Unexpected ] in {}'.format(path))
+                    block_key, attributes, _ = stack.pop()
+                    if len(stack) == 1 and block_key in ('node', 'edge'):
+                        yield block_key, attributes
+                    elif len(stack) == 1:
+                        yield 'graph', {block_key: attributes}
+                    elif stack:
+                        _add_attribute(stack[-1], block_key, attributes)
+                elif key is None:
+                    key = token
+                else:
+                    if not stack:
+                        raise ValueError('Value outside of the graph in {}'.format(path))
+                    if len(stack) == 1:
+                        yield 'graph', {key: _gml_value(token)}
+                    else:
+                        _add_attribute(stack[-1], key, _gml_value(token))
+                    key = None
+
+    if stack or key is not None:
+        raise ValueError('Unexpected end of file in {}'.format(path))
+
+
+def read_gml_streaming(path):
+    """
+    Build the networkx graph of a GML file, as nx.read_gml with the labels as nodes.
+
+    Parameters
+    ----------
+    path : str
+        The GML file.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a valid GML graph.
+
+    Returns
+    -------
+    network : nx.classes.graph.Graph
+        The network, a DiGraph / MultiGraph if the file says so.
+
+    """
+    graph_attributes = {}
+    nodes = []
+    labels = {}
+    edges = []
+
+    for kind, attributes in iter_gml(path):
+        if kind == 'graph':
+            graph_attributes.update(attributes)
+        elif kind == 'node':
+            node_id = attributes.pop('id')
+            labels[node_id] = attributes.pop('label', node_id)
+            nodes.append((labels[node_id], attributes))
+        else:
+            edges.append((attributes.pop('source'), attributes.pop('target'), attributes))
+
+    directed = graph_attributes.pop('directed', 0) == 1
+    multigraph = graph_attributes.pop('multigraph', 0) == 1
+    if multigraph:
+        network = nx.MultiDiGraph() if directed else nx.MultiGraph()
+    else:
+        network = nx.DiGraph() if directed else nx.Graph()
+
+    network.graph.update(graph_attributes)
+    network.add_nodes_from(nodes)
+    network.add_edges_from((labels[source], labels[target], attributes) for source, target, attributes in edges)
+
+    return network
+
+
+def edges_to_arrays(labels, sources, targets, weights=None, pos=None):
+    """
+    Build the arrays of the binary format from the nodes and the edges.
+
+    Parameters
+    ----------
+    labels : list
+        The label of each node.
+    sources, targets : np.ndarray
+        The edges as node indices.
+    weights : np.ndarray, optional
+        The weight of each edge. The default is None (no weights).
+    pos : list, optional
+        The (x, y) of each node. The default is None (NaN).
+
+    Returns
+    -------
+    arrays : dict
+        The arrays of the .npz format, see load_arrays.
+
+    """
+    number_of_nodes = len(labels)
+    if pos is None:
+        pos = np.full((number_of_nodes, 2), np.nan)
+
+    # la matrice d'adjacence dans les deux sens, une boucle n'est comptée qu'une fois
+    loops = sources == targets
+    rows = np.concatenate([sources, targets[~loops]])
+    columns = np.concatenate([targets, sources[~loops]])
+    order = np.lexsort((columns, rows))
+    indptr = np.zeros(number_of_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=number_of_nodes), out=indptr[1:])
+
+    arrays = {
+        'labels': np.array(labels, dtype=str),
+        'pos': np.array(pos, dtype=np.float64).reshape(number_of_nodes, 2),
+        'sources': sources,
+        'targets': targets,
+        'indptr': indptr,
+        'indices': columns[order],
+    }
+    if weights is not None:
+        arrays['weights'] = weights
+
+    return arrays
+
+
+def save_arrays(arrays, output_path):
+    """
+    Write the arrays in a .npz file, through a temporary file replaced atomically.
+
+    Parameters
+    ----------
+    arrays : dict
+        The arrays of edges_to_arrays.
+    output_path : str
+        The .npz file to write, the extension is added if missing like np.savez.
+
+    """
+    if not output_path.endswith('.npz'):
+        output_path += '.npz'
+
+    # écrit à côté puis renommé, un lecteur ne voit jamais un fichier à moitié écrit
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as fh:
+            # pas de compression, pour que la lecture soit directe
+            np.savez(fh, **arrays)
+        os.replace(temporary, output_path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def gml_to_arrays(path, output_path):
+    """
+    Convert a GML file into the binary .npz format of this module.
+
+    Only the label and pos of the nodes and the weight of the edges are
+    kept, the other attributes are dropped (with a warning).
+
+    Parameters
+    ----------
+    path : str
+        The GML file, it is read only once.
+    output_path : str
+        The .npz file to write.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a valid GML graph, or if it is directed or a
+        multigraph, which the format can't represent.
+
+    """
+    labels = []
+    index = {}
+    pos = []
+    sources = []
+    targets = []
+    weights = []
+    dropped = {'node': set(), 'edge': set()}
+
+    for kind, attributes in iter_gml(path):
+        if kind == 'graph':
+            for key in ('directed', 'multigraph'):
+                if attributes.get(key, 0) == 1:
+                    raise ValueError('{} is {}, the binary format is for simple undirected graphs'.format(
+                        path, key))
+            continue
+        dropped[kind].update(attributes.keys() - KEPT_ATTRIBUTES[kind])
+        if kind == 'node':
+            index[attributes['id']] = len(labels)
+            labels.append(str(attributes.get('label', attributes['id'])))
+            pos.append(attributes.get('pos', [np.nan, np.nan]))
+        else:
+            sources.append(attributes['source'])
+            targets.append(attributes['target'])
+            weights.append(attributes.get('weight', np.nan))
+
+    for kind, keys in dropped.items():
+        if keys:
+            logger.warning('Attributes %s of the %ss of %s are not kept in %s', sorted(keys), kind, path,
+                           output_path)
+
+    sources = np.fromiter((index[source] for source in sources), dtype=np.int64, count=len(sources))
+    targets = np.fromiter((index[target] for target in targets), dtype=np.int64, count=len(targets))
+    weights = np.array(weights, dtype=np.float64)
+    if np.isnan(weights).all():
+        weights = None
+
+    save_arrays(edges_to_arrays(labels, sources, targets, weights=weights, pos=pos), output_path)
+
+
+def load_arrays(path):
+    """
+    Load a file written by gml_to_arrays.
+
+    Parameters
+    ----------
+    path : str
+        The .npz file.
+
+    Returns
+    -------
+    arrays : dict
+        The numpy arrays labels, pos, sources, targets, indptr, indices and
+        weights (if any).
+
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def csr_adjacency(arrays):
+    """
+    Build the scipy CSR adjacency matrix from the loaded arrays.
+
+    Parameters
+    ----------
+    arrays : dict
+        The arrays of load_arrays.
+
+    Returns
+    -------
+    sp.sparse.csr_array
+        The adjacency matrix, in the order of arrays['labels'].
+
+    """
+    number_of_nodes = len(arrays['labels'])
+    data = np.ones(len(arrays['indices']))
+
+    return sp.sparse.csr_array((data, arrays['indices'], arrays['indptr']), shape=(number_of_nodes, number_of_nodes))
+
+
+def arrays_to_network(arrays):
+    """
+    Build the networkx graph from the loaded arrays.
+
+    The nodes and the edges are in the same order as with nx.read_gml, only
+    the pos and weight attributes are kept.
+
+    Parameters
+    ----------
+    arrays : dict
+        The arrays of load_arrays.
+
+    Returns
+    -------
+    network : nx.classes.graph.Graph
+        The network, with the pos of the nodes and the weight of the edges.
+
+    """
+    labels = arrays['labels'].tolist()
+    network = nx.Graph()
+
+    for label, (x, y) in zip(labels, arrays['pos'].tolist()):
+        if np.isnan(x):
+            network.add_node(label)
+        else:
+            network.add_node(label, pos=[x, y])
+
+    edges = zip(arrays['sources'].tolist(), arrays['targets'].tolist())
+    if 'weights' in arrays:
+        network.add_edges_from((labels[source], labels[target], {'weight': weight})
+                               for (source, target), weight in zip(edges, arrays['weights'].tolist()))
+    else:
+        network.add_edges_from((labels[source], labels[target]) for source, target in edges)
+
+    return network
+
+
+def load_network(path):
+    """
+    Load the network from a .npz file, converting the GML file next to it the first time.
+
+    Parameters
+    ----------
+    path : str
+        The .gml file or its .npz conversion.
+
+    Raises
+    ------
+    ValueError
+        If the .gml file has to be converted and can't be, see gml_to_arrays.
+
+    Returns
+    -------
+    network : nx.classes.graph.Graph
+        The network.
+
+    """
+    root, extension = os.path.splitext(path)
+    if extension == '.gml':
+        if not os.path.exists(root + '.npz') or os.path.getmtime(root + '.npz') < os.path.getmtime(path):
+            gml_to_arrays(path, root + '.npz')
+        path = root + '.npz'
+
+    return arrays_to_network(load_arrays(path))
@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:21:36 2026
+
+@author: gabri
+
+Incremental maintenance of the metrics when featurings are added or removed.
+
+NetworkMetrics keeps the distances from every node (n^2 values, fine for the
+current network but not for millions of nodes) and the local metrics, and
+only updates what an edge or a node changes:
+
+- degree, triangles, clustering and degree_average_voisin of the two
+  endpoints, their common neighbours and their neighbours.
+- the distances which the edge changes. An added edge u - v only shortens
+  the pairs (s, w) with s closer to u and w closer to v by more than one
+  hop (or the reverse), found from the rows of u and v, so only these pairs
+  are touched, without BFS. A removed edge re-runs the BFS of the sources
+  for which the farther endpoint loses its only predecessor, the other
+  rows keep a shortest path of the same length.
+- density, transitivity, average clustering, diameter, radius, barycenter
+  and average shortest path are refreshed from the maintained values.
+
+The values are the same as overall_calculations and calculation_individual_metrics.
+"""
+
+import heapq
+import logging
+from statistics import mean
+
+import networkx as nx
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+
+class NetworkMetrics:
+    """
+    Metrics of a network, kept up to date when edges and nodes are added.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network you want to analyse, it is copied.
+
+    Raises
+    ------
+    TypeError
+        If network is not an nx.classes.graph.Graph object.
+
+    """
+
+    def __init__(self, network):
+        if isinstance(network, nx.classes.graph.Graph) is False:
+            error_message = str("Wrong network type !!, receive {}, instead of nx.classes.graph.Graph").format(
+                str(type(network)))
+            raise TypeError(error_message)
+
+        self.network = network.copy()
+
+        # les metrics locales
+        self._degree = dict(self.network.degree)
+        self._triangles = dict(nx.triangles(self.network))
+        self._clustering = {}
+        self._average_neighbor_degree = {}
+        for node in self.network.nodes:
+            self._update_local(node)
+        self._total_triangles = sum(self._triangles.values())
+        self._total_triads = sum(degree * (degree - 1) for degree in self._degree.values())
+
+        # les distances depuis chaque noeud
+        self._rows = {}
+        self._eccentricity = {}
+        self._total_distance = {}
+        # le nombre de noeuds à chaque distance de chaque source, pour l'excentricité sans parcourir la ligne
+        self._distance_counts = {}
+        for node in self.network.nodes:
+            self._set_row(node, nx.single_source_shortest_path_length(self.network, node))
+
+    def _update_local(self, node):
+        """
+        Recompute the clustering and the average neighbour degree of a node.
+        """
+        degree = self._degree[node]
+        triangles = self._triangles[node]
+        self._clustering[node] = 0 if triangles == 0 else 2 * triangles / (degree * (degree - 1))
+        if degree > 0:
+            self._average_neighbor_degree[node] = sum(self._degree[nbr] for nbr in self.network[node]) / degree
+        else:
+            self._average_neighbor_degree[node] = 0.0
+
+    def _set_degree(self, node, degree):
+        """
+        Change the degree of a node, keeping the number of triads up to date.
+        """
+        self._total_triads += degree * (degree - 1) - self._degree[node] * (self._degree[node] - 1)
+        self._degree[node] = degree
+
+    def _set_row(self, source, row):
+        """
+        Store the distances from a source and its eccentricity.
+        """
+        counts = {}
+        for distance in row.values():
+            counts[distance] = counts.get(distance, 0) + 1
+        self._rows[source] = row
+        self._distance_counts[source] = counts
+        self._eccentricity[source] = max(counts)
+        self._total_distance[source] = sum(row.values())
+
+    def _set_distance(self, source, node, distance):
+        """
+        Change one distance of a row, None when the node is not reached anymore.
+        """
+        row = self._rows[source]
+        counts = self._distance_counts[source]
+        old = row.pop(node, None)
+        if distance is not None:
+            row[node] = distance
+            counts[distance] = counts.get(distance, 0) + 1
+            self._total_distance[source] += distance
+            if distance > self._eccentricity[source]:
+                self._eccentricity[source] = distance
+        if old is not None:
+            self._total_distance[source] -= old
+            counts[old] -= 1
+            if counts[old] == 0:
+                del counts[old]
+                if old == self._eccentricity[source]:
+                    self._eccentricity[source] = max(counts)
+
+    def _change_triangles(self, node, change):
+        """
+        Add change to the number of triangles of a node.
+        """
+        self._triangles[node] += change
+        self._total_triangles += change
+
+    def _closeness(self):
+        """
+        Compute the closeness of each node from the stored distances, as nx.closeness_centrality.
+        """
+        number_of_nodes = self.network.number_of_nodes()
+
+        closeness = {}
+        for node in self.network.nodes:
+            total = self._total_distance[node]
+            if total > 0 and number_of_nodes > 1:
+                reach = len(self._rows[node])
+                closeness[node] = ((reach - 1.0) / total) * ((reach - 1.0) / (number_of_nodes - 1))
+            else:
+                closeness[node] = 0.0
+
+        return closeness
+
+    def add_node(self, node, **attr):
+        """
+        Add an isolated node to the network.
+
+        Parameters
+        ----------
+        node : hashable
+            The node to add, nothing is done if it is already in the network
+            except updating its attributes.
+        **attr :
+            The attributes of the node.
+
+        """
+        if node in self.network:
+            self.network.add_node(node, **attr)
+            return
+
+        self.network.add_node(node, **attr)
+        self._degree[node] = 0
+        self._triangles[node] = 0
+        self._clustering[node] = 0
+        self._average_neighbor_degree[node] = 0.0
+        self._set_row(node, {node: 0})
+
+    def add_edge(self, u, v, **attr):
+        """
+        Add an edge, the missing nodes are added first.
+
+        Parameters
+        ----------
+        u, v : hashable
+            The two nodes of the featuring.
+        **attr :
+            The attributes of the edge.
+
+        Raises
+        ------
+        ValueError
+            If u and v are the same node, self loops are not supported.
+
+        """
+        if u == v:
+            raise ValueError('Self loops are not supported')
+
+        self.add_node(u)
+        self.add_node(v)
+        if self.network.has_edge(u, v):
+            self.network.add_edge(u, v, **attr)
+            return
+
+        # les triangles créés passent par les voisins communs
+        common = set(self.network[u]) & set(self.network[v])
+        self.network.add_edge(u, v, **attr)
+
+        self._set_degree(u, self._degree[u] + 1)
+        self._set_degree(v, self._degree[v] + 1)
+        self._change_triangles(u, len(common))
+        self._change_triangles(v, len(common))
+        for node in common:
+            self._change_triangles(node, 1)
+        for node in set(self.network[u]) | set(self.network[v]) | {u, v}:
+            self._update_local(node)
+
+        # d'(s, w) = min(d(s, w), d(s, u) + 1 + d(v, w)) ne change que si s est plus près de u que de v
+        # d'au moins 2 et w plus près de v que de u d'au moins 2 (ou l'inverse), les lignes sont symétriques
+        infinity = float('inf')
+        row_u, row_v = self._rows[u], self._rows[v]
+        near_u = [(node, distance) for node, distance in row_u.items() if distance + 1 < row_v.get(node, infinity)]
+        near_v = [(node, distance) for node, distance in row_v.items() if distance + 1 < row_u.get(node, infinity)]
+
+        for source, distance_u in near_u:
+            row = self._rows[source]
+            for node, distance_v in near_v:
+                distance = distance_u + 1 + distance_v
+                if distance < row.get(node, infinity):
+                    self._set_distance(source, node, distance)
+                    self._set_distance(node, source, distance)
+
+    def remove_edge(self, u, v):
+        """
+        Remove an edge, the nodes are kept.
+
+        Parameters
+        ----------
+        u, v : hashable
+            The two nodes of the featuring.
+
+        Raises
+        ------
+        nx.NetworkXError
+            If the edge is not in the network.
+
+        """
+        self.network.remove_edge(u, v)
+
+        # le lien est dans les plus courts chemins depuis s si |d(s, u) - d(s, v)| = 1, mais les distances
+        # ne changent que si l'extrémité la plus loin n'a pas d'autre voisin à la distance de la plus proche
+        affected = []
+        row_v = self._rows[v]
+        for source, distance_u in self._rows[u].items():
+            distance_v = row_v.get(source)
+            if distance_v is None or abs(distance_u - distance_v) != 1:
+                continue
+            farther, nearer_distance = (v, distance_u) if distance_v > distance_u else (u, distance_v)
+            row = self._rows[source]
+            if not any(row.get(neighbor) == nearer_distance for neighbor in self.network[farther]):
+                affected.append((source, farther))
+
+        common = set(self.network[u]) & set(self.network[v])
+
+        self._set_degree(u, self._degree[u] - 1)
+        self._set_degree(v, self._degree[v] - 1)
+        self._change_triangles(u, -len(common))
+        self._change_triangles(v, -len(common))
+        for node in common:
+            self._change_triangles(node, -1)
+        for node in set(self.network[u]) | set(self.network[v]) | {u, v}:
+            self._update_local(node)
+
+        # on ne répare que les lignes dont l'extrémité la plus loin a perdu son seul prédécesseur
+        for source, farther in affected:
+            self._repair_row(source, farther)
+
+    def _repair_row(self, source, farther):
+        """
+        Recompute the distances from source after the removal of the link to farther.
+
+        Only the nodes which lost all their shortest paths (farther and the
+        nodes below it in the BFS of source) change, the other distances are
+        still exact and give the new distances of the lost nodes.
+        """
+        row = self._rows[source]
+        network = self.network
+
+        # les noeuds dont tous les parents sont perdus, niveau par niveau en partant de farther
+        lost = {farther}
+        level = [farther]
+        while level:
+            next_level = []
+            for node in level:
+                distance = row[node] + 1
+                for child in network[node]:
+                    if child in lost or row.get(child) != distance:
+                        continue
+                    if all(parent in lost or row.get(parent) != distance - 1 for parent in network[child]):
+                        lost.add(child)
+                        next_level.append(child)
+            level = next_level
+
+        # chaque noeud perdu repart de son meilleur voisin intact, puis on propage entre noeuds perdus
+        infinity = float('inf')
+        tentative = {node: min((row[neighbor] + 1 for neighbor in network[node]
+                                if neighbor not in lost and neighbor in row), default=infinity)
+                     for node in lost}
+        heap = [(distance, node) for node, distance in tentative.items() if distance < infinity]
+        heapq.heapify(heap)
+        final = {}
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if node in final:
+                continue
+            final[node] = distance
+            for neighbor in network[node]:
+                if neighbor in lost and neighbor not in final and distance + 1 < tentative[neighbor]:
+                    tentative[neighbor] = distance + 1
+                    heapq.heappush(heap, (distance + 1, neighbor))
+
+        for node in lost:
+            self._set_distance(source, node, final.get(node))
+
+    def is_connected(self):
+        """
+        Check if the network is connected.
+
+        Returns
+        -------
+        bool
+            True if every node can reach every other node.
+
+        """
+        number_of_nodes = self.network.number_of_nodes()
+        return all(len(row) == number_of_nodes for row in self._rows.values())
+
+    def distances(self):
+        """
+        Give the distance metrics in the format of all_pairs_distance_calculations.
+
+        Raises
+        ------
+        nx.NetworkXError
+            If the network is not connected (infinite path length).
+
+        Returns
+        -------
+        distances : dict
+            The dict that can be given to overall_calculations and
+            calculation_individual_metrics.
+
+        """
+        if self.is_connected() is False:
+            raise nx.NetworkXError('Found infinite path length because the graph is not connected')
+
+        number_of_nodes = self.network.number_of_nodes()
+
+        smallest = min(self._total_distance.values())
+        barycenter = [node for node in self.network.nodes if self._total_distance[node] == smallest]
+
+        distances = {}
+        distances['eccentricity'] = {node: self._eccentricity[node] for node in self.network.nodes}
+        distances['closeness'] = self._closeness()
+        distances['diameter'] = max(self._eccentricity.values())
+        distances['radius'] = min(self._eccentricity.values())
+        distances['barycenter'] = barycenter
+        if number_of_nodes > 1:
+            total_distance = sum(self._total_distance.values())
+            distances['average_shortest_path'] = total_distance / (number_of_nodes * (number_of_nodes - 1))
+        else:
+            distances['average_shortest_path'] = 0
+        # des copies, les lignes continuent de changer avec les arêtes suivantes
+        distances['distance_to_barycenter'] = {node: dict(self._rows[node]) for node in barycenter}
+
+        return distances
+
+    def overall(self):
+        """
+        Give the overall metrics, as overall_calculations.
+
+        Raises
+        ------
+        nx.NetworkXError
+            If the network is not connected (infinite path length).
+
+        Returns
+        -------
+        calculation_dict : dict
+            The dict containing all the calculations.
+
+        """
+        distances = self.distances()
+        number_of_nodes = self.network.number_of_nodes()
+        number_of_edges = self.network.number_of_edges()
+
+        calculation_dict = {}
+        calculation_dict['number_of_nodes'] = number_of_nodes
+        calculation_dict['number_of_edges'] = number_of_edges
+        calculation_dict['average_degree'] = number_of_edges/number_of_nodes
+        calculation_dict['average_clustering'] = sum(self._clustering[node] for node in self.network.nodes) / number_of_nodes
+        calculation_dict['diameter'] = distances['diameter']
+        calculation_dict['radius'] = distances['radius']
+        calculation_dict['barycenter'] = distances['barycenter']
+        calculation_dict['average_shortest_path'] = distances['average_shortest_path']
+        # même formule que nx.transitivity
+        calculation_dict['transitivity'] = 0 if self._total_triangles == 0 else 2 * self._total_triangles / self._total_triads
+        calculation_dict['density'] = nx.density(self.network)
+
+        if len(calculation_dict['barycenter']) > 1:
+            logger.warning('More than one barycenter, average distance to barycenter is only for the first')
+
+        first_barycenter = calculation_dict['barycenter'][0]
+        calculation_dict['average_distance_to_barycenter'] = mean(distances['distance_to_barycenter'][first_barycenter].values())
+
+        return calculation_dict
+
+    def individual_metrics(self):
+        """
+        Give the individual metrics that are maintained incrementally.
+
+        Returns
+        -------
+        df : pd.DataFrame
+            The DataFrame with the node, degree, clustering, centrality,
+            triangles, eccentricity, closeness and degree_average_voisin.
+            When the network is not connected, eccentricity is taken inside
+            the component of the node.
+
+        """
+        nodes = list(self.network.nodes)
+        number_of_nodes = len(nodes)
+        scale = 1.0 / (number_of_nodes - 1.0) if number_of_nodes > 1 else 1
+        closeness = self._closeness()
+
+        df = pd.DataFrame({
+            'node': nodes,
+            'degree': [self._degree[node] for node in nodes],
+            'clustering': [self._clustering[node] for node in nodes],
+            'centrality': [self._degree[node] * scale for node in nodes],
+            'triangles': [self._triangles[node] for node in nodes],
+            'eccentricity': [self._eccentricity[node] for node in nodes],
+            'closeness': [closeness[node] for node in nodes],
+            'degree_average_voisin': [self._average_neighbor_degree[node] for node in nodes],
+        })
+
+        return df
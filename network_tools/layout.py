@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:20:37 2026
+
+@author: gabri
+
+ForceAtlas2 layout (Jacomy et al. 2014) on numpy arrays.
+
+The forces are the ones of Gephi: repulsion scaling * (d_i + 1)(d_j + 1) / d
+between all the nodes, attraction along the edges (linear or lin-log, hubs
+dissuaded or not), gravity towards the center, and the adaptive speed with
+the swinging of each node.
+
+The repulsion is computed exactly below EXACT_LIMIT nodes. Above, it is
+approximated with Barnes-Hut on an adaptive quadtree: the nodes are sorted
+by Morton code, so each cell is a range of the sorted nodes, and a cell is
+split while it has more than LEAF_SIZE nodes, however crowded a part of the
+graph is. All the nodes go down the tree together, as (node, cell) arrays:
+a cell far enough (width / distance below theta) acts through its mass and
+center of mass, the nodes of a near leaf repel directly (at most LEAF_SIZE
+pairs) and the other cells are opened. An iteration is O(n log n) without a
+Python loop over the nodes, and the direct pairs stay O(n).
+
+The layout starts from the pos attributes of the nodes when they have one,
+so after a small change of the graph a few iterations are enough.
+"""
+
+import json
+
+import networkx as nx
+import numpy as np
+
+
+# en dessous, la répulsion est calculée exactement entre toutes les paires
+EXACT_LIMIT = 2000
+
+# une cellule du quadtree est découpée au delà de ce nombre de noeuds
+LEAF_SIZE = 4
+
+# profondeur maximum du quadtree, 2 * 30 bits pour les codes de Morton dans un int64
+MAX_DEPTH = 30
+
+# une cellule est vue comme un seul point quand sa largeur / sa distance est sous theta (celui de Gephi)
+THETA = 1.2
+
+# nombre de lignes de la répulsion exacte calculées à la fois
+EXACT_CHUNK_SIZE = 512
+
+# nombre de noeuds qui descendent le quadtree à la fois, pour borner la mémoire des paires (noeud, cellule)
+BARNES_HUT_CHUNK_SIZE = 8192
+
+
+def _edge_arrays(network, index, weight):
+    """
+    The edges as index arrays (without self loops) and their weights.
+    """
+    sources = []
+    targets = []
+    weights = []
+    for source, target, value in network.edges(data=weight, default=1):
+        if source != target:
+            sources.append(index[source])
+            targets.append(index[target])
+            weights.append(value)
+
+    return (np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64),
+            np.array(weights, dtype=np.float64))
+
+
+def initial_positions(network, nodes, seed=None, warm_start=True):
+    """
+    Give the starting positions of the layout.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network.
+    nodes : list
+        The nodes, in the order of the returned array.
+    seed : int, optional
+        The seed of the random positions. The default is None.
+    warm_start : bool, optional
+        Start from the pos attributes of the nodes. The nodes without pos are
+        put next to their placed neighbours. The default is True.
+
+    Returns
+    -------
+    positions : np.ndarray
+        The (x, y) of each node.
+
+    """
+    rng = np.random.default_rng(seed)
+    number_of_nodes = len(nodes)
+    positions = np.full((number_of_nodes, 2), np.nan)
+
+    if warm_start:
+        for i, node in enumerate(nodes):
+            pos = network.nodes[node].get('pos')
+            if pos is not None:
+                positions[i] = np.asarray(pos, dtype=np.float64)[:2]
+
+    placed = ~np.isnan(positions[:, 0])
+    if not placed.any():
+        return rng.uniform(-1, 1, size=(number_of_nodes, 2)) * np.sqrt(max(number_of_nodes, 1))
+
+    low, high = positions[placed].min(axis=0), positions[placed].max(axis=0)
+    jitter = max(float((high - low).max()), 1.0) / np.sqrt(number_of_nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    for i in np.flatnonzero(~placed):
+        neighbors = [index[neighbor] for neighbor in network[nodes[i]] if placed[index[neighbor]]]
+        if neighbors:
+            positions[i] = positions[neighbors].mean(axis=0) + rng.uniform(-jitter, jitter, size=2)
+        else:
+            positions[i] = rng.uniform(low, high)
+
+    return positions
+
+
+def _exact_repulsion(positions, mass, scaling):
+    """
+    The repulsion between all the pairs of nodes, by chunks of rows.
+    """
+    forces = np.zeros_like(positions)
+    for start in range(0, len(positions), EXACT_CHUNK_SIZE):
+        stop = start + EXACT_CHUNK_SIZE
+        delta = positions[start:stop, None, :] - positions[None, :, :]
+        distance2 = (delta ** 2).sum(axis=2)
+        with np.errstate(divide='ignore'):
+            # deux noeuds au même endroit (et le noeud lui même) ne se repoussent pas
+            factor = np.where(distance2 > 0, scaling * mass[start:stop, None] * mass[None, :] / distance2, 0)
+        forces[start:stop] = (delta * factor[:, :, None]).sum(axis=1)
+
+    return forces
+
+
+def _morton_codes(unit):
+    """
+    The Morton code of each node, its x and y cells at MAX_DEPTH interleaved.
+    """
+    codes = []
+    for axis in range(2):
+        x = np.minimum((unit[:, axis] * 2 ** MAX_DEPTH).astype(np.uint64), np.uint64(2 ** MAX_DEPTH - 1))
+        # un bit sur deux, pour entrelacer x et y
+        for shift, mask in [(16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                            (2, 0x3333333333333333), (1, 0x5555555555555555)]:
+            x = (x | (x << np.uint64(shift))) & np.uint64(mask)
+        codes.append(x)
+
+    return ((codes[0] << np.uint64(1)) | codes[1]).astype(np.int64)
+
+
+def _build_quadtree(codes):
+    """
+    Build the adaptive quadtree of the nodes sorted by Morton code.
+
+    Each cell is a range of the sorted nodes, a cell with more than LEAF_SIZE
+    nodes is split in its non empty children, level by level, until
+    MAX_DEPTH (only the nodes closer than the width of a cell at MAX_DEPTH
+    stay together in a bigger leaf).
+
+    Returns the start, end, level and prefix (the Morton code of the cell at
+    its level) of each cell, and the (cells, 4) children, -1 when there is none.
+    """
+    starts, ends, levels, prefixes = [np.array([0])], [np.array([len(codes)])], [np.array([0])], [np.array([0])]
+    children = [np.full((1, 4), -1)]
+    number_of_cells = 1
+
+    for level in range(MAX_DEPTH):
+        split = np.flatnonzero(ends[-1] - starts[-1] > LEAF_SIZE)
+        if len(split) == 0:
+            break
+        # les bornes des 4 enfants de chaque cellule découpée, dans les codes triés
+        prefix = prefixes[-1][split]
+        child_prefix = prefix[:, None] * 4 + np.arange(4)
+        bounds = np.empty((len(split), 5), dtype=np.int64)
+        bounds[:, 1:4] = np.searchsorted(codes, child_prefix[:, 1:] << (2 * (MAX_DEPTH - level - 1)))
+        bounds[:, 0], bounds[:, 4] = starts[-1][split], ends[-1][split]
+
+        child_start, child_end = bounds[:, :4].ravel(), bounds[:, 1:].ravel()
+        full = child_end > child_start
+        child_index = np.full(4 * len(split), -1)
+        child_index[full] = number_of_cells + np.arange(full.sum())
+        children[-1][split] = child_index.reshape(-1, 4)
+
+        starts.append(child_start[full])
+        ends.append(child_end[full])
+        levels.append(np.full(full.sum(), level + 1))
+        prefixes.append(child_prefix.ravel()[full])
+        children.append(np.full((full.sum(), 4), -1))
+        number_of_cells += full.sum()
+
+    return (np.concatenate(starts), np.concatenate(ends), np.concatenate(levels), np.concatenate(prefixes),
+            np.concatenate(children))
+
+
+def _barnes_hut_repulsion(positions, mass, scaling, theta=THETA):
+    """
+    The repulsion approximated with the Barnes-Hut traversal of the adaptive quadtree.
+    """
+    number_of_nodes = len(positions)
+    forces = np.zeros_like(positions)
+
+    low = positions.min(axis=0)
+    size = float((positions.max(axis=0) - low).max())
+    if size == 0:
+        return forces
+    # coordonnées dans [0, 1[
+    codes = _morton_codes((positions - low) / (size * (1 + 1e-9)))
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    start, end, level, prefix, children = _build_quadtree(codes)
+    is_leaf = (children == -1).all(axis=1)
+
+    # masse et centre de chaque cellule, par sommes cumulées sur les noeuds triés
+    cumulative = np.zeros((number_of_nodes + 1, 3))
+    cumulative[1:, 0] = np.cumsum(mass[order])
+    cumulative[1:, 1:] = np.cumsum(mass[order, None] * positions[order], axis=0)
+    cell_sums = cumulative[end] - cumulative[start]
+    cell_mass = cell_sums[:, 0]
+    center = cell_sums[:, 1:] / cell_mass[:, None]
+    squared_width = (size / 2.0 ** level) ** 2
+    node_codes = np.empty_like(codes)
+    node_codes[order] = codes
+
+    for chunk_start in range(0, number_of_nodes, BARNES_HUT_CHUNK_SIZE):
+        # les paires (noeud, cellule) à traiter, tout le monde part de la racine
+        nodes = np.arange(chunk_start, min(chunk_start + BARNES_HUT_CHUNK_SIZE, number_of_nodes))
+        cells = np.zeros(len(nodes), dtype=np.int64)
+
+        while len(nodes):
+            delta = positions[nodes] - center[cells]
+            distance2 = (delta ** 2).sum(axis=1)
+            inside = (node_codes[nodes] >> (2 * (MAX_DEPTH - level[cells]))) == prefix[cells]
+            counts = end[cells] - start[cells]
+
+            # une cellule assez loin (et qui ne contient pas le noeud) compte comme un seul point
+            far = ~inside & (squared_width[cells] < theta ** 2 * distance2)
+            # une feuille trop grosse (des noeuds quasi confondus) aussi, sans le noeud lui même
+            crowded = is_leaf[cells] & (counts > LEAF_SIZE)
+            point = far | crowded
+            point_mass = cell_mass[cells] - np.where(crowded & inside, mass[nodes], 0)
+            point_delta = delta
+            if crowded.any():
+                own = crowded & inside
+                others = np.where(point_mass > 0, point_mass, 1)
+                point_delta = np.where(own[:, None], positions[nodes] - (cell_sums[cells, 1:] - mass[nodes, None]
+                                                                         * positions[nodes]) / others[:, None],
+                                       delta)
+            point_distance2 = (point_delta ** 2).sum(axis=1)
+            valid = point & (point_mass > 0) & (point_distance2 > 0)
+            factor = np.where(valid, scaling * mass[nodes] * point_mass / np.where(valid, point_distance2, 1), 0)
+            forces[:, 0] += np.bincount(nodes, weights=point_delta[:, 0] * factor, minlength=number_of_nodes)
+            forces[:, 1] += np.bincount(nodes, weights=point_delta[:, 1] * factor, minlength=number_of_nodes)
+
+            # une petite feuille proche, ses noeuds repoussent directement (au plus LEAF_SIZE paires)
+            direct = is_leaf[cells] & ~point
+            if direct.any():
+                direct_nodes, direct_cells, direct_counts = nodes[direct], cells[direct], counts[direct]
+                first = np.repeat(np.cumsum(direct_counts) - direct_counts, direct_counts)
+                sources = np.repeat(direct_nodes, direct_counts)
+                targets = order[np.repeat(start[direct_cells], direct_counts) + np.arange(direct_counts.sum())
+                                - first]
+                pair_delta = positions[sources] - positions[targets]
+                pair_distance2 = (pair_delta ** 2).sum(axis=1)
+                # deux noeuds au même endroit (et le noeud lui même) ne se repoussent pas
+                pair_factor = np.where(pair_distance2 > 0, scaling * mass[sources] * mass[targets]
+                                       / np.where(pair_distance2 > 0, pair_distance2, 1), 0)
+                forces[:, 0] += np.bincount(sources, weights=pair_delta[:, 0] * pair_factor, minlength=number_of_nodes)
+                forces[:, 1] += np.bincount(sources, weights=pair_delta[:, 1] * pair_factor, minlength=number_of_nodes)
+
+            # sinon on descend dans les enfants
+            opened = ~point & ~is_leaf[cells]
+            next_cells = children[cells[opened]]
+            next_nodes = np.repeat(nodes[opened], 4)
+            next_cells = next_cells.ravel()
+            kept = next_cells >= 0
+            nodes, cells = next_nodes[kept], next_cells[kept]
+
+    return forces
+
+
+def _attraction(positions, mass, sources, targets, weights, lin_log, dissuade_hubs, compensation):
+    """
+    The attraction along the edges.
+    """
+    delta = positions[sources] - positions[targets]
+    if lin_log:
+        distance = np.sqrt((delta ** 2).sum(axis=1))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            factor = np.where(distance > 0, -weights * np.log1p(distance) / distance, 0)
+    else:
+        factor = -weights
+    if dissuade_hubs:
+        factor = factor * compensation / mass[sources]
+
+    force = delta * factor[:, None]
+    number_of_nodes = len(positions)
+    forces = np.empty_like(positions)
+    for axis in range(2):
+        forces[:, axis] = (np.bincount(sources, weights=force[:, axis], minlength=number_of_nodes)
+                           - np.bincount(targets, weights=force[:, axis], minlength=number_of_nodes))
+
+    return forces
+
+
+def _gravity(positions, mass, gravity, strong_gravity):
+    """
+    The gravity towards the origin.
+    """
+    if strong_gravity:
+        return -gravity * mass[:, None] * positions
+
+    distance = np.sqrt((positions ** 2).sum(axis=1))
+    factor = np.where(distance > 0, gravity * mass / np.where(distance > 0, distance, 1), 0)
+    return -positions * factor[:, None]
+
+
+def forceatlas2_layout(network, iterations=100, seed=None, warm_start=True, scaling_ratio=2.0, gravity=1.0,
+                       strong_gravity=False, lin_log=False, dissuade_hubs=False, edge_weight_influence=1.0,
+                       jitter_tolerance=1.0, barnes_hut=None, barnes_hut_theta=THETA, weight='weight', store=True,
+                       as_array=False):
+    """
+    Compute the ForceAtlas2 positions of the nodes.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network you want to lay out.
+    iterations : int, optional
+        The number of iterations. The default is 100, a few are enough from
+        the positions of a close graph.
+    seed : int, optional
+        The seed of the random starting positions. The default is None.
+    warm_start : bool, optional
+        Start from the pos attributes of the nodes. The default is True.
+    scaling_ratio : float, optional
+        The strength of the repulsion. The default is 2.0.
+    gravity : float, optional
+        The strength of the gravity. The default is 1.0.
+    strong_gravity : bool, optional
+        Gravity growing with the distance to the center. The default is False.
+    lin_log : bool, optional
+        Logarithmic attraction, tighter clusters. The default is False.
+    dissuade_hubs : bool, optional
+        Divide the attraction by the mass of the node, the hubs go to the
+        borders. The default is False.
+    edge_weight_influence : float, optional
+        The weights of the edges are raised to this power, 0 ignores them.
+        The default is 1.0.
+    jitter_tolerance : float, optional
+        The allowed swinging, more is faster but less precise. The default is 1.0.
+    barnes_hut : bool, optional
+        Approximate the repulsion with the quadtree. The default is None
+        (above EXACT_LIMIT nodes).
+    barnes_hut_theta : float, optional
+        A cell is seen as one point when its width over its distance is below
+        theta, less is more precise but slower. The default is THETA.
+    weight : str, optional
+        The edge attribute of the weights. The default is 'weight'.
+    store : bool, optional
+        Write the positions in the pos attribute of the nodes. The default is True.
+    as_array : bool, optional
+        Return the positions as an array in the order of network.nodes.
+        The default is False.
+
+    Raises
+    ------
+    TypeError
+        If network is not a networkx graph.
+
+    Returns
+    -------
+    positions : dict or np.ndarray
+        The [x, y] of each node.
+
+    """
+    if not isinstance(network, nx.classes.graph.Graph):
+        raise TypeError("Wrong network type !!, receive {}, instead of nx.classes.graph.Graph".format(type(network)))
+
+    nodes = list(network.nodes)
+    number_of_nodes = len(nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    sources, targets, weights = _edge_arrays(network, index, weight)
+    weights = weights ** edge_weight_influence
+
+    # la masse de Gephi : degré + 1
+    mass = np.bincount(np.concatenate([sources, targets]), minlength=number_of_nodes) + 1.0
+    compensation = mass.mean() if number_of_nodes else 1.0
+
+    if barnes_hut is None:
+        barnes_hut = number_of_nodes > EXACT_LIMIT
+
+    positions = initial_positions(network, nodes, seed=seed, warm_start=warm_start)
+    previous = np.zeros_like(positions)
+    speed = 1.0
+    speed_efficiency = 1.0
+
+    for _ in range(iterations if number_of_nodes > 1 else 0):
+        if barnes_hut:
+            forces = _barnes_hut_repulsion(positions, mass, scaling_ratio, theta=barnes_hut_theta)
+        else:
+            forces = _exact_repulsion(positions, mass, scaling_ratio)
+        forces += _gravity(positions, mass, gravity, strong_gravity)
+        forces += _attraction(positions, mass, sources, targets, weights, lin_log, dissuade_hubs, compensation)
+
+        # la vitesse adaptative de Gephi
+        swinging = np.sqrt(((forces - previous) ** 2).sum(axis=1))
+        traction = np.sqrt(((forces + previous) ** 2).sum(axis=1)) / 2
+        total_swinging = (mass * swinging).sum()
+        total_traction = (mass * traction).sum()
+
+        estimated_jitter = 0.05 * np.sqrt(number_of_nodes)
+        jitter = jitter_tolerance * max(np.sqrt(estimated_jitter),
+                                        min(10, estimated_jitter * total_traction / number_of_nodes ** 2))
+        if total_traction > 0 and total_swinging / total_traction > 2:
+            if speed_efficiency > 0.05:
+                speed_efficiency *= 0.5
+            jitter = max(jitter, jitter_tolerance)
+
+        if total_swinging > 0:
+            target_speed = jitter * speed_efficiency * total_traction / total_swinging
+            if total_swinging > jitter * total_traction:
+                if speed_efficiency > 0.05:
+                    speed_efficiency *= 0.7
+            elif speed < 1000:
+                speed_efficiency *= 1.3
+            speed = speed + min(target_speed - speed, 0.5 * speed)
+
+        positions += forces * (speed / (1 + np.sqrt(speed * swinging)))[:, None]
+        previous = forces
+
+    if store:
+        nx.set_node_attributes(network, {node: [float(x), float(y)] for node, (x, y) in zip(nodes, positions)},
+                               'pos')
+
+    if as_array:
+        return positions
+
+    return {node: [float(x), float(y)] for node, (x, y) in zip(nodes, positions)}
+
+
+def write_positions(positions, path):
+    """
+    Export the positions in json, {node: [x, y]}.
+
+    Parameters
+    ----------
+    positions : dict
+        The positions of forceatlas2_layout.
+    path : str
+        The json file.
+
+    """
+    with open(path, 'w', encoding='utf-8') as outfile:
+        json.dump(positions, outfile, ensure_ascii=False, indent=4)
+
+
+def read_positions(path):
+    """
+    Read the positions exported by write_positions.
+
+    Parameters
+    ----------
+    path : str
+        The json file.
+
+    Returns
+    -------
+    dict
+        The [x, y] of each node.
+
+    """
+    with open(path, encoding='utf-8') as infile:
+        return json.load(infile)
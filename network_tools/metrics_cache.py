@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:05:12 2026
+
+@author: gabri
+
+On-disk cache of the metrics, for the batch pipeline.
+
+Each metric of a network is stored in its own file, named from a hash of the
+graph content (graph_fingerprint), the parameters of the metric and the
+versions of this code and of networkx / numpy / scipy. The {node: value}
+metrics are stored as .npy arrays in the order of the nodes, the others are
+pickled. The files are written through a temporary file replaced atomically,
+and an unreadable file (left by an older version or a full disk) is a miss
+and is removed.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+import networkx as nx
+import numpy as np
+import scipy as sp
+
+
+# à incrémenter quand le calcul d'une metric change, pour ne pas relire les anciens résultats
+CACHE_VERSION = 2
+
+
+class MetricsDiskCache:
+    """
+    Content-addressed directory of metric results.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the cache, created if it doesn't exist.
+    max_bytes : int, optional
+        The maximum size of the cache, the least recently used files are
+        removed above it. The default is None (no limit).
+
+    """
+
+    def __init__(self, directory, max_bytes=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        """
+        Find the file of a key, whatever its format, None if there is none.
+        """
+        fingerprint, *params = key
+        versions = (CACHE_VERSION, nx.__version__, np.__version__, sp.__version__)
+        digest = hashlib.blake2b(repr((params, versions)).encode('utf-8'), digest_size=16).hexdigest()
+        # le fingerprint en préfixe, pour pouvoir invalider un réseau
+        return os.path.join(self.directory, '{}-{}'.format(fingerprint, digest))
+
+    def load(self, key, nodes):
+        """
+        Load a metric from the cache.
+
+        Parameters
+        ----------
+        key : tuple
+            The key of the metric, starting with the graph_fingerprint.
+        nodes : iterable
+            The nodes of the network, to rebuild the {node: value} metrics.
+
+        Raises
+        ------
+        KeyError
+            If the metric is not in the cache, or its file is unreadable.
+
+        Returns
+        -------
+        value : object
+            The stored metric.
+
+        """
+        path = self._path(key)
+        nodes = list(nodes)
+
+        for extension in ('.npy', '.pkl'):
+            if not os.path.exists(path + extension):
+                continue
+            try:
+                os.utime(path + extension)
+                if extension == '.npy':
+                    values = np.load(path + extension, allow_pickle=False)
+                    if values.shape != (len(nodes),):
+                        raise ValueError('{} values for {} nodes'.format(values.shape, len(nodes)))
+                    return dict(zip(nodes, values.tolist()))
+                with open(path + extension, 'rb') as fh:
+                    return pickle.load(fh)
+            except FileNotFoundError:
+                # supprimé entre temps par l'éviction d'un autre process
+                continue
+            except Exception:
+                # fichier illisible ou tronqué : on le supprime et on recalculera
+                self._remove(path + extension)
+
+        raise KeyError(key)
+
+    def _remove(self, path):
+        """
+        Remove a file of the cache, if it is still there.
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def save(self, key, value, nodes):
+        """
+        Save a metric in the cache.
+
+        Parameters
+        ----------
+        key : tuple
+            The key of the metric, starting with the graph_fingerprint.
+        value : object
+            The metric, a {node: value} dict is stored as an array.
+        nodes : iterable
+            The nodes of the network, in the order of the array.
+
+        """
+        path = self._path(key)
+        nodes = list(nodes)
+
+        # les metrics par noeud en tableau numpy, le reste en pickle
+        if isinstance(value, dict) and list(value) == nodes and all(
+                isinstance(number, (int, float)) and not isinstance(number, bool) for number in value.values()):
+            extension = '.npy'
+        else:
+            extension = '.pkl'
+
+        # écrit à côté puis renommé, un lecteur ne voit jamais un fichier à moitié écrit
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as fh:
+                if extension == '.npy':
+                    np.save(fh, np.array(list(value.values())), allow_pickle=False)
+                else:
+                    pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path + extension)
+        except BaseException:
+            self._remove(temporary)
+            raise
+
+        self.evict()
+
+    def _files(self):
+        """
+        List the files of the cache.
+        """
+        return [entry for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith(('.npy', '.pkl'))]
+
+    def evict(self):
+        """
+        Remove the least recently used files until the cache is below max_bytes.
+        """
+        if self.max_bytes is None:
+            return
+
+        files = sorted(self._files(), key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in files)
+        while files and total > self.max_bytes:
+            entry = files.pop(0)
+            total -= entry.stat().st_size
+            self._remove(entry.path)
+
+    def invalidate(self, fingerprint):
+        """
+        Remove all the metrics of a network.
+
+        Parameters
+        ----------
+        fingerprint : str
+            The graph_fingerprint of the network.
+
+        """
+        for entry in self._files():
+            if entry.name.startswith(fingerprint + '-'):
+                os.remove(entry.path)
+
+    def clear(self):
+        """
+        Remove all the metrics of the cache.
+        """
+        for entry in self._files():
+            os.remove(entry.path)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:24:40 2026
+
+@author: gabri
+
+Columnar export of the metrics dataframe, so that the app doesn't parse a CSV.
+
+The .arrow files (Arrow IPC, not compressed) are memory mapped when read:
+the numeric columns are not copied and only the pages really used are
+loaded. The .parquet files are smaller but have to be decoded. The files are
+read and written by data_tools.arrow_io.
+"""
+
+import pyarrow as pa
+
+from data_tools.arrow_io import read_table, write_table
+
+
+def write_metrics_table(df, path):
+    """
+    Write the metrics dataframe in a columnar file.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The dataframe of network_measures_to_dataframe.
+    path : str
+        The file, Arrow IPC if it ends with .arrow, Parquet if it ends with .parquet.
+
+    Raises
+    ------
+    ValueError
+        If the extension of path is not .arrow or .parquet.
+
+    """
+    write_table(pa.Table.from_pandas(df, preserve_index=False), path)
+
+
+def read_metrics_table(path, columns=None):
+    """
+    Read a metrics file written by write_metrics_table.
+
+    Parameters
+    ----------
+    path : str
+        The .arrow or .parquet file.
+    columns : list, optional
+        The columns to read, all of them if None. The default is None.
+
+    Raises
+    ------
+    ValueError
+        If the extension of path is not .arrow or .parquet.
+
+    Returns
+    -------
+    pd.DataFrame
+        The metrics dataframe.
+
+    """
+    return read_table(path, columns=columns).to_pandas()
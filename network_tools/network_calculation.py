@@ -5,78 +5,828 @@ Created on Sat Oct 16 14:47:10 2021
 @author: gabri
 """
 
+import hashlib
+import logging
+import os
+import threading
+import time
+import tracemalloc
 import networkx as nx
 import pandas as pd
 import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from statistics import mean
+from network_tools.bounded_calculation import bounded_number_of_cliques, bounded_square_clustering
 
+logger = logging.getLogger(__name__)
 
-def calculation_individual_metrics(network):
+
+# nombre de sources par paquet pour les BFS, fixe pour que le résultat ne dépende pas de n_jobs
+SOURCE_CHUNK_SIZE = 256
+
+# toutes les metrics individuelles, dans l'ordre des colonnes
+INDIVIDUAL_METRICS = ['degree', 'clustering', 'betweeness', 'centrality', 'triangles', 'eccentricity',
+                      'closeness', 'page_rank', 'eigen_centrality', 'square_clustering', 'clique',
+                      'degree_average_voisin', 'katz']
+
+# les metrics calculées à partir d'autres, sans refaire de parcours du réseau
+METRIC_DEPENDENCIES = {
+    'clustering': ['degree', 'triangles'],
+    'centrality': ['degree'],
+    'degree_average_voisin': ['degree'],
+}
+
+# les metrics calculées ensemble par le backend sparse
+SPARSE_METRICS = ['degree', 'centrality', 'triangles', 'clustering', 'degree_average_voisin',
+                  'page_rank', 'eigen_centrality', 'katz']
+
+# les metrics qui acceptent un budget, voir network_tools.bounded_calculation
+BOUNDED_METRICS = {
+    'square_clustering': bounded_square_clustering,
+    'clique': bounded_number_of_cliques,
+}
+
+# les metrics entières, les autres sont en float
+INTEGER_METRICS = ['degree', 'triangles', 'eccentricity', 'clique', 'eccentricity_error']
+
+# nombre maximum de resultats (une metric pour un réseau) gardés en mémoire
+METRICS_CACHE_SIZE = 64
+
+_metrics_cache = OrderedDict()
+
+# katz peut valoir None, on distingue donc l'absence du cache
+_NOT_CACHED = object()
+
+# nombre maximum de réseaux ego (noeud, rayon) dont les metrics sont gardées en mémoire
+EGO_CACHE_SIZE = 256
+
+# les sessions de l'app demandent les réseaux ego en parallèle
+_ego_cache = OrderedDict()
+_ego_cache_lock = threading.Lock()
+
+# les fonctions appelées avec le record de chaque étape, voir instrument
+_metric_hooks = []
+_trace_memory = False
+
+
+@contextmanager
+def instrument(hook=None, trace_memory=False):
+    """
+    Report the measures of each metric and overall statistic computed in the with block.
+
+    Parameters
+    ----------
+    hook : callable, optional
+        Called with the record of each step as soon as it is finished, a dict
+        with function, step, seconds, cpu_seconds, memory_bytes, tasks and
+        cached. The default is None.
+    trace_memory : bool, optional
+        If True, memory_bytes is the peak of memory allocated by the step,
+        measured with tracemalloc (which slows down the calculations).
+        The default is False (memory_bytes is None).
+
+    Examples
+    --------
+    >>> with instrument(lambda record: print(record['step'], record['seconds'])):
+    ...     df = network_measures_to_dataframe(network)
+
+    """
+    global _trace_memory
+    previous_trace_memory = _trace_memory
+    _trace_memory = trace_memory
+    if hook is not None:
+        _metric_hooks.append(hook)
+    try:
+        yield
+    finally:
+        _trace_memory = previous_trace_memory
+        if hook is not None:
+            _metric_hooks.remove(hook)
+
+
+def _measure(function, *args, trace_memory=False):
+    """
+    Call function(*args), giving its result and its wall time, cpu time and allocated memory.
+    """
+    started = False
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started = True
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+    
+    start, start_cpu = time.perf_counter(), time.process_time()
+    try:
+        result = function(*args)
+    finally:
+        measures = {'seconds': time.perf_counter() - start, 'cpu_seconds': time.process_time() - start_cpu,
+                    'memory_bytes': None}
+        if trace_memory:
+            measures['memory_bytes'] = tracemalloc.get_traced_memory()[1] - before
+            if started:
+                tracemalloc.stop()
+    
+    return result, measures
+
+
+def _new_metadata(function, network, **parameters):
+    """
+    Start the metadata record of a call.
+    """
+    return {
+        'function': function,
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'number_of_nodes': network.number_of_nodes(),
+        'number_of_edges': network.number_of_edges(),
+        'parameters': parameters,
+        'versions': {'networkx': nx.__version__, 'numpy': np.__version__},
+        'steps': [],
+        'warnings': [],
+    }
+
+
+def _report(metadata, step, measures=None, tasks=1, cached=False):
+    """
+    Add the record of a step to the metadata and give it to the hooks.
+    """
+    if measures is None:
+        measures = {'seconds': 0.0, 'cpu_seconds': 0.0, 'memory_bytes': None}
+    
+    record = {'function': metadata['function'], 'step': step, 'tasks': tasks, 'cached': cached}
+    record.update(measures)
+    metadata['steps'].append(record)
+    for hook in list(_metric_hooks):
+        hook(record)
+
+
+def _warn(metadata, message):
+    """
+    Log a warning and keep it in the metadata.
+    """
+    logger.warning(message)
+    metadata['warnings'].append(message)
+
+
+def _finish_metadata(metadata):
+    """
+    Add the total time of the steps to the metadata.
+    """
+    metadata['seconds'] = sum(record['seconds'] for record in metadata['steps'])
+    metadata['cpu_seconds'] = sum(record['cpu_seconds'] for record in metadata['steps'])
+    
+    return metadata
+
+
+# les metrics calculées avec networkx, une tâche chacune
+NETWORKX_METRICS = {
+    'degree': lambda network: dict(nx.degree(network)),
+    'triangles': lambda network: dict(nx.triangles(network)),
+    'page_rank': lambda network: dict(nx.pagerank(network)),
+    'square_clustering': lambda network: bounded_square_clustering(network)[0],
+    'clique': lambda network: bounded_number_of_cliques(network)[0],
+}
+
+# les metrics calculées ensemble à partir d'une seule recherche de valeur propre
+SPECTRAL_METRICS = ['eigen_centrality', 'katz']
+
+_worker_network = None
+
+
+def _init_worker(network):
+    """
+    Keep the network in the worker process, so it is only sent once.
+    """
+    global _worker_network
+    _worker_network = network
+
+
+def _measured_task(network, function, trace_memory, *args):
+    """
+    Call a task, measuring it in the process that runs it.
+    """
+    return _measure(function, network, *args, trace_memory=trace_memory)
+
+
+def _call_in_worker(function, trace_memory, *args):
+    """
+    Call a task with the network of the worker process.
+    """
+    return _measured_task(_worker_network, function, trace_memory, *args)
+
+
+def _run_tasks(network, tasks, n_jobs=None):
+    """
+    Run a list of tasks, in a process pool if n_jobs is more than 1.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network given as first argument to every task.
+    tasks : list
+        The list of (function, args) to run, the functions must be defined at
+        module level so they can be sent to the workers.
+    n_jobs : int, optional
+        The number of processes, -1 for all the cpus. The default is None (serial).
+
+    Returns
+    -------
+    results : list
+        The result of each task, in the same order as tasks.
+    measures : list
+        The measures of each task (see _measure), in the same order.
+
+    """
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    
+    if n_jobs is None or n_jobs <= 1 or len(tasks) <= 1:
+        outputs = [_measured_task(network, function, _trace_memory, *args) for function, args in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)), initializer=_init_worker,
+                                 initargs=(network,)) as executor:
+            futures = [executor.submit(_call_in_worker, function, _trace_memory, *args) for function, args in tasks]
+            outputs = [future.result() for future in futures]
+    
+    return [result for result, _ in outputs], [measures for _, measures in outputs]
+
+
+def _report_tasks(metadata, steps, measures):
+    """
+    Report the measures of the tasks, summed by step (the chunks of BFS of a metric).
+    """
+    totals = OrderedDict()
+    for step, task_measures in zip(steps, measures):
+        if step not in totals:
+            totals[step] = {'seconds': 0.0, 'cpu_seconds': 0.0, 'memory_bytes': None, 'tasks': 0}
+        total = totals[step]
+        total['seconds'] += task_measures['seconds']
+        total['cpu_seconds'] += task_measures['cpu_seconds']
+        total['tasks'] += 1
+        # le pic de mémoire d'une étape est celui de son plus gros paquet
+        if task_measures['memory_bytes'] is not None:
+            total['memory_bytes'] = max(total['memory_bytes'] or 0, task_measures['memory_bytes'])
+    
+    for step, total in totals.items():
+        tasks = total.pop('tasks')
+        _report(metadata, step, total, tasks=tasks)
+
+
+def _source_chunks(network):
+    """
+    Split the nodes of the network into chunks of SOURCE_CHUNK_SIZE sources.
+    """
+    nodes = list(network.nodes)
+    return [nodes[i:i + SOURCE_CHUNK_SIZE] for i in range(0, len(nodes), SOURCE_CHUNK_SIZE)]
+
+
+def _distance_chunk(network, sources):
+    """
+    Run a BFS from each source and keep the distances of the chunk barycenter.
+    """
+    number_of_nodes = len(network)
+    
+    eccentricity = {}
+    closeness = {}
+    total_distance = 0
+    smallest = float('inf')
+    distance_to_barycenter = {}
+    
+    for node in sources:
+        lengths = nx.single_source_shortest_path_length(network, node)
+        if len(lengths) != number_of_nodes:
+            raise nx.NetworkXError('Found infinite path length because the graph is not connected')
+        
+        eccentricity[node] = max(lengths.values())
+        barycentricity = sum(lengths.values())
+        total_distance += barycentricity
+        
+        # même formule que nx.closeness_centrality (wf_improved)
+        if barycentricity > 0 and number_of_nodes > 1:
+            closeness[node] = ((len(lengths) - 1.0) / barycentricity) * ((len(lengths) - 1.0) / (number_of_nodes - 1))
+        else:
+            closeness[node] = 0.0
+        
+        # on garde les distances des barycentres courant, pas besoin de refaire de BFS
+        if barycentricity < smallest:
+            smallest = barycentricity
+            distance_to_barycenter = {node: lengths}
+        elif barycentricity == smallest:
+            distance_to_barycenter[node] = lengths
+    
+    return eccentricity, closeness, total_distance, smallest, distance_to_barycenter
+
+
+def _betweenness_chunk(network, sources):
+    """
+    Compute the betweenness accumulated from some sources, not normalized.
+    """
+    return nx.betweenness_centrality_subset(network, sources=sources, targets=list(network.nodes),
+                                            normalized=False)
+
+
+def _metric_task(network, name):
+    """
+    Compute one of the NETWORKX_METRICS.
+    """
+    return NETWORKX_METRICS[name](network)
+
+
+def _bounded_task(network, name, budget):
+    """
+    Compute one of the BOUNDED_METRICS with its budget, giving the values and the sampled nodes.
+    """
+    return BOUNDED_METRICS[name](network, **budget)
+
+
+def _spectral_task(network, katz=True):
+    """
+    Compute eigen_centrality and katz from a single eigen solve, katz only if asked.
+    """
+    # import ici, comme pour le backend sparse
+    from network_tools.sparse_calculation import adjacency_matrix, spectral_metrics
+    nodes, adjacency = adjacency_matrix(network)
+    spectral = spectral_metrics(adjacency, katz=katz)
+    for name in SPECTRAL_METRICS:
+        if spectral[name] is not None:
+            spectral[name] = dict(zip(nodes, spectral[name].tolist()))
+    
+    return spectral
+
+
+def _sparse_task(network, katz=True):
+    """
+    Compute the metrics of the sparse backend, katz only if asked.
+    """
+    # import ici, scipy n'est nécessaire que pour ce backend
+    from network_tools.sparse_calculation import sparse_individual_metrics
+    return sparse_individual_metrics(network, katz=katz)
+
+
+def _merge_distance_chunks(network, chunks):
+    """
+    Merge the results of _distance_chunk, in the order of the nodes.
+    """
+    number_of_nodes = len(network)
+    
+    eccentricity = {}
+    closeness = {}
+    total_distance = 0
+    smallest = min(chunk[3] for chunk in chunks)
+    distance_to_barycenter = {}
+    
+    for chunk_eccentricity, chunk_closeness, chunk_total, chunk_smallest, chunk_barycenter in chunks:
+        eccentricity.update(chunk_eccentricity)
+        closeness.update(chunk_closeness)
+        total_distance += chunk_total
+        if chunk_smallest == smallest:
+            distance_to_barycenter.update(chunk_barycenter)
+    
+    distances = {}
+    distances['eccentricity'] = eccentricity
+    distances['closeness'] = closeness
+    distances['diameter'] = max(eccentricity.values())
+    distances['radius'] = min(eccentricity.values())
+    distances['barycenter'] = list(distance_to_barycenter)
+    if number_of_nodes > 1:
+        distances['average_shortest_path'] = total_distance / (number_of_nodes * (number_of_nodes - 1))
+    else:
+        distances['average_shortest_path'] = 0
+    distances['distance_to_barycenter'] = distance_to_barycenter
+    
+    return distances
+
+
+def _merge_betweenness_chunks(network, chunks):
+    """
+    Sum the results of _betweenness_chunk and normalize like nx.betweenness_centrality.
+    """
+    number_of_nodes = len(network)
+    
+    betweeness = dict(chunks[0])
+    for chunk in chunks[1:]:
+        for node, value in chunk.items():
+            betweeness[node] += value
+    
+    # le subset non normalisé est divisé par 2 (non orienté), on remet l'échelle de networkx
+    if number_of_nodes > 2:
+        scale = 1 / ((number_of_nodes - 1) * (number_of_nodes - 2))
+        for node in betweeness:
+            betweeness[node] = betweeness[node] * 2 * scale
+    
+    return betweeness
+
+
+def _derived_metric(network, name, metrics):
+    """
+    Compute one of the METRIC_DEPENDENCIES from the degree and the triangles.
+    """
+    degree = metrics['degree']
+    
+    if name == 'clustering':
+        # même formule que nx.clustering
+        triangles = metrics['triangles']
+        return {node: 0 if triangles[node] == 0 else 2 * triangles[node] / (degree[node] * (degree[node] - 1))
+                for node in network.nodes}
+    
+    if name == 'centrality':
+        if len(network) <= 1:
+            return {node: 1 for node in network.nodes}
+        scale = 1.0 / (len(network) - 1.0)
+        return {node: degree[node] * scale for node in network.nodes}
+    
+    # degree_average_voisin
+    return {node: sum(degree[nbr] for nbr in network[node]) / degree[node] if degree[node] > 0 else 0.0
+            for node in network.nodes}
+
+
+def graph_fingerprint(network):
+    """
+    Compute a fingerprint of the structure of the network.
+    
+    Two networks with the same nodes and edges, in the same order and with
+    the same weights, have the same fingerprint.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network you want to identify.
+
+    Returns
+    -------
+    str
+        The hexadecimal digest.
+
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(type(network).__name__.encode('utf-8'))
+    for node in network.nodes:
+        digest.update(repr(node).encode('utf-8') + b'\x00')
+    digest.update(b'\x01')
+    for u, v, weight in network.edges(data='weight'):
+        digest.update(repr((u, v, weight)).encode('utf-8') + b'\x00')
+    
+    return digest.hexdigest()
+
+
+def _cache_get(key, network, cache=True, disk_cache=None):
+    """
+    Get a result from the in-memory cache, then from the disk cache, _NOT_CACHED if it is not there.
+    """
+    if cache is True and key in _metrics_cache:
+        _metrics_cache.move_to_end(key)
+        return _metrics_cache[key]
+    
+    if disk_cache is not None:
+        try:
+            value = disk_cache.load(key, network.nodes)
+        except KeyError:
+            return _NOT_CACHED
+        if cache is True:
+            _cache_put(key, value, network)
+        return value
+    
+    return _NOT_CACHED
+
+
+def _cache_put(key, value, network, cache=True, disk_cache=None):
+    """
+    Put a result in the in-memory cache, removing the least recently used ones, and in the disk cache.
+    """
+    if cache is True:
+        _metrics_cache[key] = value
+        _metrics_cache.move_to_end(key)
+        while len(_metrics_cache) > METRICS_CACHE_SIZE:
+            _metrics_cache.popitem(last=False)
+    
+    if disk_cache is not None:
+        disk_cache.save(key, value, network.nodes)
+
+
+def clear_metrics_cache():
+    """
+    Empty the in-memory cache of calculation_individual_metrics, overall_calculations and ego_network_metrics.
+    """
+    _metrics_cache.clear()
+    with _ego_cache_lock:
+        _ego_cache.clear()
+
+
+def _metric_cache_key(fingerprint, name, backend, approximate, budgets=None):
+    """
+    Build the cache key of a metric, with only the parameters that change it.
+    """
+    bounded_name = name[:-len('_sampled')] if name.endswith('_sampled') else name
+    if budgets and bounded_name in budgets:
+        return (fingerprint, name, tuple(sorted(budgets[bounded_name].items())))
+    if name in ('distances', 'betweeness'):
+        return (fingerprint, name, approximate)
+    if backend == 'sparse' and name in SPARSE_METRICS:
+        return (fingerprint, name, backend)
+    return (fingerprint, name)
+
+
+def _metric_column(values, nodes, name):
+    """
+    Put a {node: value} metric into a numpy column, in the order of nodes.
+    """
+    if name.endswith('_sampled'):
+        dtype = bool
+    else:
+        dtype = np.int64 if name in INTEGER_METRICS else np.float64
+    return np.fromiter((values[node] for node in nodes), dtype=dtype, count=len(nodes))
+
+
+def _approximate_key(pivots, epsilon, seed):
+    """
+    The parameters of the approximate mode, None for the exact mode.
+    """
+    if pivots is None and epsilon is None:
+        return None
+    return (pivots, epsilon, seed)
+
+
+def all_pairs_distance_calculations(network, n_jobs=None):
+    """
+    Compute all the distance based metrics with a single BFS from each node.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network you want to analyse, it must be connected.
+    n_jobs : int, optional
+        The number of processes sharing the BFS, -1 for all the cpus.
+        The default is None (serial).
+
+    Raises
+    ------
+    nx.NetworkXError
+        If the network is not connected (infinite path length).
+
+    Returns
+    -------
+    distances : dict
+        The dict containing the eccentricity and closeness of each node, the
+        diameter, radius, barycenter, average shortest path and the distance
+        from each barycenter node to every node.
+
+    """
+    tasks = [(_distance_chunk, (sources,)) for sources in _source_chunks(network)]
+    results, _ = _run_tasks(network, tasks, n_jobs)
+    
+    return _merge_distance_chunks(network, results)
+
+
+def calculation_individual_metrics(network, distances=None, backend='networkx', n_jobs=None,
+                                   pivots=None, epsilon=None, seed=None, metrics=None, cache=True,
+                                   disk_cache=None, as_columns=False, return_metadata=False, budgets=None):
     """
     Compute all the indidual metrics for network analysis.
+    
+    The results don't depend on n_jobs: the BFS of betweenness and of the
+    distances are always split in the same chunks of sources and reduced in
+    the same order (only eigen_centrality depends on the random start of ARPACK).
 
     Parameters
     ----------
     network : nx.classes.graph.Graph
         The network you want to analyse.
+    distances : dict, optional
+        The output of all_pairs_distance_calculations, computed if not given.
+        The default is None.
+    backend : str, optional
+        'networkx' or 'sparse'. With 'sparse' the local and spectral metrics
+        are computed on a scipy CSR matrix, see network_tools.sparse_calculation
+        for the tolerance. The default is 'networkx'.
+    n_jobs : int, optional
+        The number of processes running the metrics and the chunks of BFS
+        concurrently, -1 for all the cpus. The default is None (serial).
+    pivots : int, optional
+        If given, betweeness, eccentricity and closeness are estimated from a
+        BFS on this number of random pivots, see
+        network_tools.approximate_calculation. The default is None (exact).
+    epsilon : float, optional
+        The target error of the approximate mode, used to choose the number
+        of pivots when pivots is None. The default is None (exact).
+    seed : int, optional
+        The seed of the pivot sample. The default is None.
+    metrics : list, optional
+        The metrics to compute, among INDIVIDUAL_METRICS. The metrics they
+        depend on (METRIC_DEPENDENCIES) are computed but not returned.
+        The default is None (all the metrics).
+    cache : bool, optional
+        If True, the metrics are kept in memory for the next calls on a
+        network with the same graph_fingerprint. The default is True.
+    disk_cache : network_tools.metrics_cache.MetricsDiskCache, optional
+        If given, the metrics are also loaded from and saved to this
+        directory, between runs. The default is None.
+    as_columns : bool, optional
+        If True, return the nodes and a dict of numpy columns instead of the
+        dataframes. The default is False.
+    return_metadata : bool, optional
+        If True, also return the metadata record of the call: the parameters,
+        the warnings and the measures of each step (see instrument).
+        The default is False.
+    budgets : dict, optional
+        The budget of the BOUNDED_METRICS, for instance
+        {'clique': {'max_work': 10000, 'time_budget': 60}}, see
+        network_tools.bounded_calculation. The nodes above the budget get a
+        sampled estimate, flagged in a clique_sampled / square_clustering_sampled
+        column. A metric sampled because of its time_budget depends on the
+        speed of the machine, it is not written in disk_cache. The default
+        is None (exact).
+
+    Raises
+    ------
+    ValueError
+        If the backend, one of the metrics or one of the budgets is unknown.
 
     Returns
     -------
     tuple
-        The tuple, containing dataframe for each metrics.
+        The tuple, containing dataframe for each metrics. In the approximate
+        mode, it also contains the betweeness_error, eccentricity_error and
+        closeness_error dataframes. With as_columns, the tuple (nodes, columns)
+        where columns is a dict of numpy arrays in the order of nodes.
+    metadata : dict
+        Only with return_metadata, the metadata record.
 
     """
+    if backend not in ('networkx', 'sparse'):
+        raise ValueError("Unknown backend {}, expected 'networkx' or 'sparse'".format(backend))
+    
+    if metrics is None:
+        metrics = INDIVIDUAL_METRICS
+    unknown_metrics = [name for name in metrics if name not in INDIVIDUAL_METRICS]
+    if unknown_metrics:
+        raise ValueError('Unknown metrics {}, expected some of {}'.format(unknown_metrics, INDIVIDUAL_METRICS))
+    selected = [name for name in INDIVIDUAL_METRICS if name in metrics]
+    if budgets is None:
+        budgets = {}
+    unknown_budgets = [name for name in budgets if name not in BOUNDED_METRICS]
+    if unknown_budgets:
+        raise ValueError('No budget for {}, expected some of {}'.format(unknown_budgets, list(BOUNDED_METRICS)))
+    metadata = _new_metadata('calculation_individual_metrics', network, backend=backend, n_jobs=n_jobs,
+                             pivots=pivots, epsilon=epsilon, seed=seed, metrics=selected, budgets=budgets)
+    
+    # on résout les dépendances entre metrics
+    needed = set(selected)
+    for name in selected:
+        needed.update(METRIC_DEPENDENCIES.get(name, []))
+    approximate = _approximate_key(pivots, epsilon, seed)
+    if 'eccentricity' in needed or 'closeness' in needed or ('betweeness' in needed and approximate is not None):
+        needed.add('distances')
+    # avec un budget, on garde aussi les noeuds estimés
+    bounded = [name for name in BOUNDED_METRICS if name in needed and name in budgets]
+    needed.update(name + '_sampled' for name in bounded)
+    
+    # on récupère ce qui est déjà en mémoire ou sur le disque
+    use_cache = cache is True or disk_cache is not None
+    fingerprint = graph_fingerprint(network) if use_cache else None
+    computed = {}
+    if distances is not None:
+        computed['distances'] = distances
+    if 'betweeness' in needed and distances is not None and 'betweeness' in distances:
+        computed['betweeness'] = distances['betweeness']
+    if use_cache:
+        for name in needed - set(computed):
+            value = _cache_get(_metric_cache_key(fingerprint, name, backend, approximate, budgets), network,
+                               cache, disk_cache)
+            if value is not _NOT_CACHED:
+                computed[name] = value
+                _report(metadata, name, cached=True)
+    
+    # en mode approché les distances et betweeness viennent des pivots
+    new = {}
+    if approximate is not None and 'distances' in needed and 'distances' not in computed:
+        from network_tools.approximate_calculation import approximate_distance_calculations
+        new['distances'], measures = _measure(approximate_distance_calculations, network, pivots, epsilon, seed,
+                                              trace_memory=_trace_memory)
+        _report(metadata, 'distances', measures)
+        computed['distances'] = new['distances']
+    if approximate is not None and 'betweeness' in needed and 'betweeness' not in computed:
+        computed['betweeness'] = computed['distances']['betweeness']
+    
+    # on prépare toutes les tâches, elles sont indépendantes
+    missing = [name for name in INDIVIDUAL_METRICS + ['distances'] if name in needed and name not in computed]
+    # un budget pour lequel il manque la metric ou ses noeuds estimés, on refait les deux
+    bounded = [name for name in bounded if name in missing or name + '_sampled' not in computed]
+    missing += [name for name in bounded if name not in missing]
+    chunks = _source_chunks(network)
+    tasks = []
+    steps = []
+    if 'betweeness' in missing:
+        tasks += [(_betweenness_chunk, (sources,)) for sources in chunks]
+        steps += len(chunks) * ['betweeness']
+    if 'distances' in missing:
+        tasks += [(_distance_chunk, (sources,)) for sources in chunks]
+        steps += len(chunks) * ['distances']
+    
+    if backend == 'sparse' and any(name in SPARSE_METRICS for name in missing):
+        tasks.append((_sparse_task, ('katz' in missing,)))
+        steps.append('sparse')
+    elif any(name in SPECTRAL_METRICS for name in missing):
+        tasks.append((_spectral_task, ('katz' in missing,)))
+        steps.append('spectral')
+    metric_names = [name for name in missing if name in NETWORKX_METRICS and name not in bounded
+                    and not (backend == 'sparse' and name in SPARSE_METRICS)]
+    tasks += [(_metric_task, (name,)) for name in metric_names]
+    steps += metric_names
+    tasks += [(_bounded_task, (name, budgets[name])) for name in bounded]
+    steps += bounded
+    
     # on recupère toutes les metrics interessantes
+    results, measures = _run_tasks(network, tasks, n_jobs)
+    _report_tasks(metadata, steps, measures)
     
-    degree = dict(nx.degree(network))
-    clustering = dict(nx.clustering(network))
-    betweeness = dict(nx.betweenness_centrality(network))
-    centrality = dict(nx.degree_centrality(network))
-    triangles = dict(nx.triangles(network))
-    eccentricity = dict(nx.eccentricity(network))
-    close = dict(nx.closeness_centrality(network))
-    page = dict(nx.pagerank(network))
-    eig = dict(nx.eigenvector_centrality_numpy(network, max_iter=200))
-    square = dict(nx.square_clustering(network))
-    mouloud_achour = dict(nx.number_of_cliques(network))
-    degree_average_voisin = dict(nx.average_neighbor_degree(network))
-    
-    # on fait des df pour chaque echantillon
-
-    degree_df = pd.DataFrame.from_dict(degree, orient='index', columns=['degree'])
-    clustering_df = pd.DataFrame.from_dict(clustering, orient='index', columns=['clustering'])
-    betweeness_df = pd.DataFrame.from_dict(betweeness, orient='index', columns=['betweeness'])
-    centrality_df = pd.DataFrame.from_dict(centrality, orient='index', columns=['centrality'])
-    triangles_df = pd.DataFrame.from_dict(triangles, orient='index', columns=['triangles'])
-    eccentricity_df = pd.DataFrame.from_dict(eccentricity, orient='index', columns=['eccentricity'])
-    close_df = pd.DataFrame.from_dict(close, orient='index', columns=['closeness'])
-    page_df = pd.DataFrame.from_dict(page, orient='index', columns=['page_rank'])
-    eig_df = pd.DataFrame.from_dict(eig, orient='index', columns=['eigen_centrality'])
-    square_df = pd.DataFrame.from_dict(square, orient='index', columns=['square_clustering'])
-    clic_df = pd.DataFrame.from_dict(mouloud_achour, orient='index', columns=['clique'])
-    degree_average_voisin_df = pd.DataFrame.from_dict(degree_average_voisin, orient='index',
-                                                      columns=['degree_average_voisin'])
-    
-    # on fait un try except pour le truc de KATZ car parfois ça ne converge pas
-    try:
-        katz = dict(nx.katz_centrality(network, max_iter=2000))
-        katz_df = pd.DataFrame.from_dict(katz, orient='index', columns=['katz'])
+    if 'betweeness' in missing:
+        new['betweeness'] = _merge_betweenness_chunks(network, results[:len(chunks)])
+        results = results[len(chunks):]
+    if 'distances' in missing:
+        new['distances'] = _merge_distance_chunks(network, results[:len(chunks)])
+        results = results[len(chunks):]
+    if 'sparse' in steps or 'spectral' in steps:
+        from network_tools.sparse_calculation import KATZ_ALPHA
+        new.update((name, value) for name, value in results[0].items() if name in missing)
+        # alpha est remplacé quand la série de katz diverge
+        if 'katz' in missing and results[0]['katz_alpha'] != KATZ_ALPHA:
+            _warn(metadata, 'Katz alpha {} is not below 1 / spectral radius ({:.4g}), katz computed with alpha {:.4g}'.format(
+                KATZ_ALPHA, 1 / results[0]['spectral_radius'], results[0]['katz_alpha']))
+        metadata['spectral_radius'] = results[0]['spectral_radius']
+        metadata['katz_alpha'] = results[0]['katz_alpha']
+        results = results[1:]
+    new.update(zip(metric_names, results[:len(metric_names)]))
+    for name, (values, sampled) in zip(bounded, results[len(metric_names):]):
+        new[name] = values
+        new[name + '_sampled'] = sampled
+    
+    # les metrics dérivées du degré et des triangles
+    computed.update(new)
+    for name in METRIC_DEPENDENCIES:
+        if name in missing and name not in computed:
+            new[name], measures = _measure(_derived_metric, network, name, computed, trace_memory=_trace_memory)
+            _report(metadata, name, measures)
+            computed[name] = new[name]
+    
+    if use_cache:
+        # avec un time_budget les noeuds échantillonnés dépendent de la machine, on ne les garde pas sur disque
+        timed = [name for name in bounded if budgets[name].get('time_budget') is not None
+                 and any(new[name + '_sampled'].values())]
+        for name, value in new.items():
+            bounded_name = name[:-len('_sampled')] if name.endswith('_sampled') else name
+            _cache_put(_metric_cache_key(fingerprint, name, backend, approximate, budgets), value, network,
+                       cache, None if bounded_name in timed else disk_cache)
+    
+    if 'distances' in computed:
+        computed['eccentricity'] = computed['distances']['eccentricity']
+        computed['closeness'] = computed['distances']['closeness']
+    
+    # on remplit directement des colonnes numpy, dans l'ordre des noeuds
+    nodes = list(network.nodes)
+    columns = {}
+    for name in selected:
         
-    except nx.PowerIterationFailedConvergence:
+        # le solveur de KATZ peut échouer sur les très gros réseaux, dans ce cas la tâche renvoie None
+        if name == 'katz' and computed['katz'] is None:
+            _warn(metadata, 'Convergence failed for katz metric')
+            columns['katz'] = np.full(len(nodes), np.nan)
+            continue
         
-        print('Warning : convergence failed for katz metric')
-        katz_df = pd.DataFrame({
-            'index':list(network.nodes),
-            'katz':len(list(network.nodes))*[np.NaN]
-        }).set_index('index', drop=True)
-
-    return tuple([degree_df, clustering_df, betweeness_df, centrality_df, triangles_df,
-                  eccentricity_df, close_df, page_df, eig_df, square_df, clic_df,
-                  degree_average_voisin_df, katz_df])
+        columns[name] = _metric_column(computed[name], nodes, name)
+    
+    # les erreurs estimées du mode approché
+    for name in ['betweeness', 'eccentricity', 'closeness']:
+        if name in selected and 'distances' in computed and name + '_error' in computed['distances']:
+            columns[name + '_error'] = _metric_column(computed['distances'][name + '_error'], nodes,
+                                                      name + '_error')
+    
+    # les noeuds au dessus du budget, estimés
+    for name in BOUNDED_METRICS:
+        if name in selected and name + '_sampled' in computed:
+            columns[name + '_sampled'] = _metric_column(computed[name + '_sampled'], nodes, name + '_sampled')
+            number_sampled = int(columns[name + '_sampled'].sum())
+            if number_sampled > 0:
+                _warn(metadata, '{} of {} nodes have a sampled estimate of {}, above the budget'.format(
+                    number_sampled, len(nodes), name))
+    
+    if as_columns is True:
+        result = nodes, columns
+    else:
+        result = tuple(pd.DataFrame({name: column}, index=nodes) for name, column in columns.items())
+    
+    if return_metadata is True:
+        return result, _finish_metadata(metadata)
+    return result
 
 
 def network_measures_to_dataframe(network, include_node_value=True, 
-                                  raise_node_value_error=False):
+                                  raise_node_value_error=False, distances=None,
+                                  backend='networkx', n_jobs=None, pivots=None,
+                                  epsilon=None, seed=None, metrics=None, cache=True,
+                                  disk_cache=None, return_metadata=False, budgets=None):
     """
     Functions that is tranforming all individual network metrics into a DataFrame.
 
@@ -88,6 +838,40 @@ def network_measures_to_dataframe(network, include_node_value=True,
         If you want to include the node value or not. The default is True.
     raise_node_value_error : bool, optional
         If you want to raise an error when there are missing node value. The default is False.
+    distances : dict, optional
+        The output of all_pairs_distance_calculations, to share it with
+        overall_calculations. The default is None.
+    backend : str, optional
+        The backend of calculation_individual_metrics, 'networkx' or 'sparse'.
+        The default is 'networkx'.
+    n_jobs : int, optional
+        The number of processes of calculation_individual_metrics, -1 for all
+        the cpus. The default is None (serial).
+    pivots : int, optional
+        The number of pivots of the approximate mode, which adds the
+        betweeness_error, eccentricity_error and closeness_error columns.
+        The default is None (exact).
+    epsilon : float, optional
+        The target error of the approximate mode, instead of pivots.
+        The default is None (exact).
+    seed : int, optional
+        The seed of the pivot sample. The default is None.
+    metrics : list, optional
+        The metrics to compute, see calculation_individual_metrics.
+        The default is None (all the metrics).
+    cache : bool, optional
+        If True, reuse and keep the metrics in the in-memory cache.
+        The default is True.
+    disk_cache : network_tools.metrics_cache.MetricsDiskCache, optional
+        If given, reuse and keep the metrics in this on-disk cache.
+        The default is None.
+    return_metadata : bool, optional
+        If True, also return the metadata record of the call, see
+        calculation_individual_metrics. The default is False.
+    budgets : dict, optional
+        The budget of the clique and square_clustering metrics, which adds
+        the clique_sampled / square_clustering_sampled columns, see
+        calculation_individual_metrics. The default is None (exact).
 
     Raises
     ------
@@ -101,11 +885,16 @@ def network_measures_to_dataframe(network, include_node_value=True,
     -------
     df : pd.DataFrame
         The DataFrame with all the individual metrics.
+    metadata : dict
+        Only with return_metadata, the metadata record.
 
     """
     # on check s'il s'agit du bon type 
     if isinstance(network, nx.classes.graph.Graph) is True:
         
+        node_values = None
+        node_value_warning = None
+        
         # on fait la condition pour récupérer les valeurs des noeuds:
         if include_node_value is True:
             # on charge avec la valeur des noeuds
@@ -118,53 +907,43 @@ def network_measures_to_dataframe(network, include_node_value=True,
                     break
             # on check s'il y a des fails dans la valeur des noeuds
             if no_data_count == 0:
-                node_df = pd.DataFrame.from_dict(node_with_value, orient='index', columns=['value'])
+                node_values = [node_with_value[node].get('value', np.nan) for node in network.nodes]
                 
-                values = calculation_individual_metrics(network)
-                # on merge les df
-                df = pd.concat([node_df, values[0], values[1], values[2], values[3], 
-                                values[4], values[5], values[6], values[7], values[8],
-                                values[9], values[10], values[11], values[12]], axis=1)
-                df.reset_index(drop=False, inplace=True)
-                df.rename(columns={'index': 'node'}, inplace=True)
-                
-            else:
-                if raise_node_value_error is False: 
-                    print('error in node value, node value not included in final result')
-                    
-                    # on calcul les metrics
-                    values = calculation_individual_metrics(network)
-                    
-                    # on merge les df
-                    df = pd.concat([values[0], values[1], values[2], values[3], values[4],
-                                    values[5], values[6], values[7], values[8], values[9],
-                                    values[10], values[11], values[12]], axis=1)
-                    df.reset_index(drop=False, inplace=True)
-                    df.rename(columns={'index': 'node'}, inplace=True)
-                
-                else:
-                    raise ValueError('Problem with node values, at least one of the node have no data')
-            
-        else:
-            # on calcul les metrics
-            values = calculation_individual_metrics(network)
+            elif raise_node_value_error is False: 
+                node_value_warning = 'Error in node value, node value not included in final result'
+                logger.warning(node_value_warning)
             
-            # on merge les df
-            df = pd.concat([values[0], values[1], values[2], values[3], values[4],
-                            values[5], values[6], values[7], values[8], values[9],
-                            values[10], values[11], values[12]], axis=1)
-            df.reset_index(drop=False, inplace=True)
-            df.rename(columns={'index': 'node'}, inplace=True)
+            else:
+                raise ValueError('Problem with node values, at least one of the node have no data')
+        
+        # on calcul les metrics, déjà en colonnes dans l'ordre des noeuds
+        (nodes, columns), metadata = calculation_individual_metrics(network, distances=distances, backend=backend,
+                                                                    n_jobs=n_jobs, pivots=pivots, epsilon=epsilon,
+                                                                    seed=seed, metrics=metrics, cache=cache,
+                                                                    disk_cache=disk_cache, as_columns=True,
+                                                                    return_metadata=True, budgets=budgets)
+        if node_value_warning is not None:
+            metadata['warnings'].insert(0, node_value_warning)
+        
+        # pas besoin d'aligner des index, on assemble les colonnes
+        data = {'node': nodes}
+        if node_values is not None:
+            data['value'] = node_values
+        data.update(columns)
+        df = pd.DataFrame(data, copy=False)
     
     else:
         error_message = str("Wrong network type !!, receive {}, instead of nx.classes.graph.Graph").format(
             str(type(network)))
         raise TypeError(error_message)
     
+    if return_metadata is True:
+        return df, metadata
     return df    
 
 
-def overall_calculations(network):
+def overall_calculations(network, distances=None, n_jobs=None, pivots=None, epsilon=None, seed=None,
+                         cache=True, disk_cache=None, return_metadata=False):
     """
     Compute all the overral metrics for the network.
 
@@ -172,6 +951,31 @@ def overall_calculations(network):
     ----------
     network : nx.classes.graph.Graph
         The network you wan to analyse.
+    distances : dict, optional
+        The output of all_pairs_distance_calculations, computed if not given.
+        The default is None.
+    n_jobs : int, optional
+        The number of processes of all_pairs_distance_calculations, -1 for all
+        the cpus. The default is None (serial).
+    pivots : int, optional
+        If given, the distance metrics are estimated from this number of
+        random pivots and average_shortest_path_error is added.
+        The default is None (exact).
+    epsilon : float, optional
+        The target error of the approximate mode, instead of pivots.
+        The default is None (exact).
+    seed : int, optional
+        The seed of the pivot sample. The default is None.
+    cache : bool, optional
+        If True, reuse and keep the distances in the in-memory cache shared
+        with calculation_individual_metrics. The default is True.
+    disk_cache : network_tools.metrics_cache.MetricsDiskCache, optional
+        If given, reuse and keep the distances in this on-disk cache.
+        The default is None.
+    return_metadata : bool, optional
+        If True, also return the metadata record of the call, with the
+        measures of the distances and of each overall statistic.
+        The default is False.
 
     Raises
     ------
@@ -182,32 +986,63 @@ def overall_calculations(network):
     -------
     calculation_dict : dict
         The dict containing all the calculations.
+    metadata : dict
+        Only with return_metadata, the metadata record.
 
     """
     # on check s'il s'agit du bon type 
     if isinstance(network, nx.classes.graph.Graph) is True:
         
+        metadata = _new_metadata('overall_calculations', network, n_jobs=n_jobs, pivots=pivots,
+                                 epsilon=epsilon, seed=seed)
+        approximate = _approximate_key(pivots, epsilon, seed)
+        given = distances is not None
+        use_cache = distances is None and (cache is True or disk_cache is not None)
+        if use_cache:
+            cache_key = _metric_cache_key(graph_fingerprint(network), 'distances', None, approximate)
+            distances = _cache_get(cache_key, network, cache, disk_cache)
+            if distances is _NOT_CACHED:
+                distances = None
+        
+        if distances is None:
+            if approximate is not None:
+                from network_tools.approximate_calculation import approximate_distance_calculations
+                distances, measures = _measure(approximate_distance_calculations, network, pivots, epsilon, seed,
+                                               trace_memory=_trace_memory)
+            else:
+                distances, measures = _measure(all_pairs_distance_calculations, network, n_jobs,
+                                               trace_memory=_trace_memory)
+            _report(metadata, 'distances', measures)
+            if use_cache:
+                _cache_put(cache_key, distances, network, cache, disk_cache)
+        elif not given:
+            _report(metadata, 'distances', cached=True)
+        
         calculation_dict = {}
         
         # on rempli le dict avec toutes les infos
         calculation_dict['number_of_nodes'] = network.number_of_nodes()
         calculation_dict['number_of_edges'] = network.number_of_edges()
         calculation_dict['average_degree'] = calculation_dict['number_of_edges']/calculation_dict['number_of_nodes']
-        calculation_dict['average_clustering'] = nx.average_clustering(network)
-        calculation_dict['diameter'] = nx.diameter(network)
-        calculation_dict['radius'] = nx.radius(network)
-        calculation_dict['barycenter'] = nx.barycenter(network)
-        calculation_dict['average_shortest_path'] = nx.average_shortest_path_length(network)
-        calculation_dict['transitivity'] = nx.transitivity(network)
+        calculation_dict['average_clustering'], measures = _measure(nx.average_clustering, network,
+                                                                    trace_memory=_trace_memory)
+        _report(metadata, 'average_clustering', measures)
+        calculation_dict['diameter'] = distances['diameter']
+        calculation_dict['radius'] = distances['radius']
+        calculation_dict['barycenter'] = distances['barycenter']
+        calculation_dict['average_shortest_path'] = distances['average_shortest_path']
+        if 'average_shortest_path_error' in distances:
+            calculation_dict['average_shortest_path_error'] = distances['average_shortest_path_error']
+        calculation_dict['transitivity'], measures = _measure(nx.transitivity, network, trace_memory=_trace_memory)
+        _report(metadata, 'transitivity', measures)
         calculation_dict['density'] = nx.density(network)
         
         if len(calculation_dict['barycenter']) > 1:
-            print("Warning more than one barycenter, average distance to barycenter is only for the first")
+            _warn(metadata, 'More than one barycenter, average distance to barycenter is only for the first')
         
-        all_shortest_path_to_barycenter = []
-        for node in network.nodes:
-            a = nx.shortest_path_length(network, source=node, target=nx.barycenter(network)[0])
-            all_shortest_path_to_barycenter.append(a)
+        # les distances au premier barycentre sont déjà calculées
+        first_barycenter = calculation_dict['barycenter'][0]
+        all_shortest_path_to_barycenter = list(distances['distance_to_barycenter'][first_barycenter].values())
         
         calculation_dict['average_distance_to_barycenter'] = mean(all_shortest_path_to_barycenter)
         
@@ -215,40 +1050,250 @@ def overall_calculations(network):
         error_message = str("Wrong network type !!, receive {}, instead of nx.classes.graph.Graph").format(
             str(type(network)))
         raise TypeError(error_message)
-        
+    
+    if return_metadata is True:
+        return calculation_dict, _finish_metadata(metadata)
     return calculation_dict
 
 
-def distance_to_barycenter_for_each_node(network):
+def distance_to_barycenter_for_each_node(network, barycenter=None, as_array=False, return_metadata=False):
     """
     Compute the disatnce to barycenter for each node.
+    
+    Only one BFS is done from each barycenter node, so once the barycenter is
+    known the cost is linear in the size of the network.
 
     Parameters
     ----------
     network : nx.classes.graph.Graph
         The network you wan to analyse.
+    barycenter : list, optional
+        The barycenter nodes, for instance overall_calculations(network)['barycenter'].
+        If None it is computed, on the largest connected component when the
+        network is not connected. The default is None.
+    as_array : bool, optional
+        If True return a dense array ordered like network.nodes instead of a
+        dict. The default is False.
+    return_metadata : bool, optional
+        If True, also return the metadata record of the call, with the
+        measures of the barycenter and of the BFS. The default is False.
 
     Returns
     -------
-    distance_to_barycenter : dict
-        The dict containing the distance for each node.
+    distance_to_barycenter : dict or np.ndarray
+        The dict containing the distance for each node (a list when there is
+        more than one barycenter, None when the node can't reach it). With
+        as_array, an array of shape (n,) or (n, len(barycenter)) with np.inf
+        for unreachable nodes.
+    metadata : dict
+        Only with return_metadata, the metadata record.
 
     """
-    # on calcule le barycentre
-    barycenter = nx.barycenter(network)
+    metadata = _new_metadata('distance_to_barycenter_for_each_node', network, as_array=as_array)
+    
+    # on calcule le barycentre si on ne l'a pas déjà
+    if barycenter is None:
+        if nx.is_connected(network):
+            barycenter, measures = _measure(nx.barycenter, network, trace_memory=_trace_memory)
+        else:
+            largest_component = max(nx.connected_components(network), key=len)
+            barycenter, measures = _measure(nx.barycenter, network.subgraph(largest_component),
+                                            trace_memory=_trace_memory)
+        _report(metadata, 'barycenter', measures)
+    
+    # un BFS par noeud du barycentre, il peut y en avoir plusieurs
+    distance_fields, measures = _measure(lambda: [nx.single_source_shortest_path_length(network, bary_node)
+                                                  for bary_node in barycenter], trace_memory=_trace_memory)
+    _report(metadata, 'distance_to_barycenter', measures, tasks=len(barycenter))
+    
+    if as_array is True:
+        node_index = {node: i for i, node in enumerate(network.nodes)}
+        distance_array = np.full((len(node_index), len(barycenter)), np.inf)
+        for j, lengths in enumerate(distance_fields):
+            for node, dist in lengths.items():
+                distance_array[node_index[node], j] = dist
+        
+        if len(barycenter) == 1:
+            distance_array = distance_array[:, 0]
+        
+        if return_metadata is True:
+            return distance_array, _finish_metadata(metadata)
+        return distance_array
     
     # on créer un dico que l'on va remplir
     distance_to_barycenter = {}
     
-    # on itere dessus car il peut y en avoir plusieurs
     if len(barycenter) > 1:
         for node in network.nodes:
-            distance_to_barycenter[node] = []
-            for bary_node in barycenter:
-                dist = nx.shortest_path_length(network, source=node, target=bary_node)
-                distance_to_barycenter[node].append(dist)
+            distance_to_barycenter[node] = [lengths.get(node) for lengths in distance_fields]
     else:
         for node in network.nodes:
-            distance_to_barycenter[node] = nx.shortest_path_length(network, source=node, target=barycenter[0])
-                
+            distance_to_barycenter[node] = distance_fields[0].get(node)
+    
+    if return_metadata is True:
+        return distance_to_barycenter, _finish_metadata(metadata)
     return distance_to_barycenter
+
+
+def ego_network(network, node, radius=2, max_nodes=None):
+    """
+    Extract the network around a node, with a BFS stopped at radius.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network.
+    node : object
+        The center of the ego network.
+    radius : int, optional
+        The maximum number of hops from node. The default is 2.
+    max_nodes : int, optional
+        Stop the BFS at this number of nodes, the closest nodes are kept
+        (in the order of the BFS). The default is None (no limit).
+
+    Raises
+    ------
+    TypeError
+        If network is not an nx.classes.graph.Graph object.
+    KeyError
+        If node is not in the network.
+
+    Returns
+    -------
+    ego : nx.classes.graph.Graph
+        The subgraph of the nodes at most radius hops from node, connected.
+    hops : dict
+        The number of hops of each node of ego from node.
+    truncated : bool
+        True if max_nodes stopped the BFS before radius.
+
+    """
+    if isinstance(network, nx.classes.graph.Graph) is False:
+        error_message = str("Wrong network type !!, receive {}, instead of nx.classes.graph.Graph").format(
+            str(type(network)))
+        raise TypeError(error_message)
+    if node not in network:
+        raise KeyError('Unknown node {}'.format(node))
+    
+    hops = {node: 0}
+    frontier = [node]
+    truncated = False
+    for hop in range(1, radius + 1):
+        next_frontier = []
+        for current in frontier:
+            for neighbor in network[current]:
+                if neighbor in hops:
+                    continue
+                if max_nodes is not None and len(hops) >= max_nodes:
+                    truncated = True
+                    break
+                hops[neighbor] = hop
+                next_frontier.append(neighbor)
+            if truncated:
+                break
+        frontier = next_frontier
+        if truncated or not frontier:
+            break
+    
+    return network.subgraph(hops).copy(), hops, truncated
+
+
+def ego_network_metrics(network, node, radius=2, metrics=None, max_nodes=None, budgets=None,
+                        return_metadata=False):
+    """
+    Compute the individual metrics of the network around a node.
+    
+    Only the ego network is analysed, so the cost depends on the size of the
+    neighbourhood and not of the whole network. The results are kept in an
+    LRU cache of EGO_CACHE_SIZE (node, radius), checked against the
+    graph_fingerprint of the ego network, so a change of the network around
+    the node is taken into account.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network.
+    node : object
+        The center of the ego network.
+    radius : int, optional
+        The maximum number of hops from node. The default is 2.
+    metrics : list, optional
+        The metrics to compute, see calculation_individual_metrics.
+        The default is None (all the metrics).
+    max_nodes : int, optional
+        The maximum size of the ego network, see ego_network. The default is None.
+    budgets : dict, optional
+        The budget of the clique and square_clustering metrics, see
+        calculation_individual_metrics. The default is None (exact).
+    return_metadata : bool, optional
+        If True, also return the metadata record, with the size of the ego
+        network. The default is False.
+
+    Raises
+    ------
+    TypeError
+        If network is not an nx.classes.graph.Graph object.
+    KeyError
+        If node is not in the network.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The node, hops (from the center) and metrics columns of each node of
+        the ego network, the center first.
+    metadata : dict
+        Only with return_metadata, the metadata record.
+
+    """
+    if isinstance(network, nx.classes.graph.Graph) is False:
+        error_message = str("Wrong network type !!, receive {}, instead of nx.classes.graph.Graph").format(
+            str(type(network)))
+        raise TypeError(error_message)
+    
+    metadata = _new_metadata('ego_network_metrics', network, node=node, radius=radius, metrics=metrics,
+                             max_nodes=max_nodes, budgets=budgets)
+    
+    (ego, hops, truncated), measures = _measure(ego_network, network, node, radius, max_nodes,
+                                                trace_memory=_trace_memory)
+    _report(metadata, 'ego_network', measures)
+    metadata['ego'] = {'nodes': ego.number_of_nodes(), 'edges': ego.number_of_edges(), 'truncated': truncated}
+    if truncated:
+        _warn(metadata, 'Ego network of {} truncated to {} nodes'.format(node, max_nodes))
+    
+    budget_key = tuple(sorted((name, tuple(sorted(budget.items()))) for name, budget in (budgets or {}).items()))
+    key = (node, radius, max_nodes, None if metrics is None else tuple(metrics), budget_key)
+    fingerprint = graph_fingerprint(ego)
+    
+    with _ego_cache_lock:
+        cached = _ego_cache.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            _ego_cache.move_to_end(key)
+    
+    if cached is not None and cached[0] == fingerprint:
+        df = cached[1]
+        _report(metadata, 'metrics', cached=True)
+    else:
+        # le cache des metrics est réservé aux réseaux entiers, les réseaux ego ont le leur
+        (nodes, columns), individual_metadata = calculation_individual_metrics(
+            ego, metrics=metrics, cache=False, as_columns=True, return_metadata=True, budgets=budgets)
+        for step in individual_metadata['steps']:
+            metadata['steps'].append(step)
+        metadata['warnings'].extend(individual_metadata['warnings'])
+        
+        data = {'node': nodes, 'hops': np.fromiter((hops[ego_node] for ego_node in nodes), dtype=np.int64,
+                                                   count=len(nodes))}
+        data.update(columns)
+        df = pd.DataFrame(data, copy=False).sort_values('hops', kind='stable', ignore_index=True)
+        
+        with _ego_cache_lock:
+            _ego_cache[key] = (fingerprint, df)
+            _ego_cache.move_to_end(key)
+            while len(_ego_cache) > EGO_CACHE_SIZE:
+                _ego_cache.popitem(last=False)
+    
+    # une copie, l'entrée du cache ne doit pas être modifiée par l'appelant
+    df = df.copy()
+    
+    if return_metadata is True:
+        return df, _finish_metadata(metadata)
+    return df
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:05:12 2026
+
+@author: gabri
+
+Plotly figure of the network, built from the positions and the metrics.
+
+All the edges are one Scattergl trace (the segments separated by a gap) and
+all the nodes another one, coloured by a metric, so the browser draws the
+figure with WebGL in two calls whatever the size of the graph. The
+coordinates are numpy arrays, the gaps are NaN (written null in the json).
+
+For the big graphs, max_nodes keeps the nodes with the highest value of the
+metric and max_edges a random sample of the edges between them, so that the
+payload stays bounded.
+"""
+
+import networkx as nx
+import numpy as np
+import plotly.graph_objects as go
+
+
+# la palette de la figure d'origine
+COLORSCALE = 'YlGnBu'
+
+
+def _node_values(network, nodes, metrics, color):
+    """
+    The value of the colour metric for each node, the degree if it is not in the metrics.
+    """
+    if metrics is not None and color in metrics.columns:
+        values = metrics.set_index('node')[color]
+        return np.array([values.get(node, np.nan) for node in nodes], dtype=np.float64)
+    if color != 'degree':
+        raise ValueError('The metric {} is not in the metrics table'.format(color))
+
+    return np.array([degree for _, degree in network.degree(nodes)], dtype=np.float64)
+
+
+def decimate(values, edges, max_nodes=None, max_edges=None, seed=0):
+    """
+    Choose the nodes and the edges to draw.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The value of the colour metric of each node, the highest are kept.
+    edges : np.ndarray
+        The (source, target) indices of the edges.
+    max_nodes : int, optional
+        The maximum number of nodes. The default is None (all).
+    max_edges : int, optional
+        The maximum number of edges, sampled at random among the edges
+        between the kept nodes. The default is None (all).
+    seed : int, optional
+        The seed of the sampling of the edges. The default is 0.
+
+    Returns
+    -------
+    kept_nodes : np.ndarray
+        The indices of the kept nodes.
+    kept_edges : np.ndarray
+        The kept edges.
+
+    """
+    number_of_nodes = len(values)
+    kept_nodes = np.arange(number_of_nodes)
+    if max_nodes is not None and max_nodes < number_of_nodes:
+        # NaN en dernier, à égalité on garde l'ordre des noeuds
+        kept_nodes = np.sort(np.argsort(-np.nan_to_num(values, nan=-np.inf), kind='stable')[:max_nodes])
+        kept = np.zeros(number_of_nodes, dtype=bool)
+        kept[kept_nodes] = True
+        edges = edges[kept[edges[:, 0]] & kept[edges[:, 1]]]
+
+    if max_edges is not None and max_edges < len(edges):
+        rng = np.random.default_rng(seed)
+        edges = edges[np.sort(rng.choice(len(edges), size=max_edges, replace=False))]
+
+    return kept_nodes, edges
+
+
+def network_figure(network, metrics=None, positions=None, color='degree', max_nodes=None, max_edges=None,
+                   seed=0, title='<br>Réseau des rappeurs français :'):
+    """
+    Build the figure of the network.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network you want to draw.
+    metrics : pd.DataFrame, optional
+        The metrics table, with a node column. The default is None (the
+        degree is computed from the network).
+    positions : dict, optional
+        The [x, y] of each node. The default is None (the pos attributes).
+    color : str, optional
+        The metric colouring the nodes. The default is 'degree'.
+    max_nodes : int, optional
+        Draw only the nodes with the highest values of color. The default is None (all).
+    max_edges : int, optional
+        Draw only a random sample of the edges. The default is None (all).
+    seed : int, optional
+        The seed of the sampling of the edges. The default is 0.
+    title : str, optional
+        The title of the figure.
+
+    Raises
+    ------
+    TypeError
+        If network is not a networkx graph.
+    ValueError
+        If color is not in the metrics or a node has no position.
+
+    Returns
+    -------
+    go.Figure
+        The figure, with an edge trace and a node trace.
+
+    """
+    if not isinstance(network, nx.classes.graph.Graph):
+        raise TypeError("Wrong network type !!, receive {}, instead of nx.classes.graph.Graph".format(type(network)))
+
+    nodes = list(network.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    if positions is None:
+        positions = nx.get_node_attributes(network, 'pos')
+    missing = [node for node in nodes if node not in positions]
+    if missing:
+        raise ValueError('{} nodes have no position, for instance {}'.format(len(missing), missing[0]))
+
+    coordinates = np.array([positions[node][:2] for node in nodes], dtype=np.float64).reshape(len(nodes), 2)
+    edges = np.array([(index[source], index[target]) for source, target in network.edges()],
+                     dtype=np.int64).reshape(-1, 2)
+    values = _node_values(network, nodes, metrics, color)
+    kept_nodes, edges = decimate(values, edges, max_nodes=max_nodes, max_edges=max_edges, seed=seed)
+
+    # chaque arête est source, cible, trou
+    edge_x = np.full(3 * len(edges), np.nan)
+    edge_y = np.full(3 * len(edges), np.nan)
+    edge_x[0::3], edge_x[1::3] = coordinates[edges[:, 0], 0], coordinates[edges[:, 1], 0]
+    edge_y[0::3], edge_y[1::3] = coordinates[edges[:, 0], 1], coordinates[edges[:, 1], 1]
+
+    edge_trace = go.Scattergl(x=edge_x, y=edge_y, mode='lines', line=dict(width=0.5, color='#888'),
+                              hoverinfo='none')
+
+    label = 'nombre de connexions' if color == 'degree' else color
+    node_trace = go.Scattergl(
+        x=coordinates[kept_nodes, 0], y=coordinates[kept_nodes, 1], mode='markers', hoverinfo='text',
+        text=['{} {}: {:g}'.format(nodes[i], label, values[i]) for i in kept_nodes],
+        marker=dict(showscale=True, colorscale=COLORSCALE, reversescale=True, color=values[kept_nodes],
+                    size=10 if len(kept_nodes) <= 10000 else 4,
+                    colorbar=dict(thickness=15, title=dict(text='Nombre de connexions par noeuds'
+                                                           if color == 'degree' else color, side='right'),
+                                  xanchor='left'),
+                    line=dict(width=2 if len(kept_nodes) <= 10000 else 0)))
+
+    return go.Figure(data=[edge_trace, node_trace],
+                     layout=go.Layout(title=dict(text=title, font=dict(size=16)), showlegend=False,
+                                      hovermode='closest', margin=dict(b=20, l=5, r=5, t=40),
+                                      annotations=[dict(text='Rappeur Français', showarrow=False, xref='paper',
+                                                        yref='paper', x=0.005, y=-0.002)],
+                                      xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+                                      yaxis=dict(showgrid=False, zeroline=False, showticklabels=False)))
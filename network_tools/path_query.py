@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:20:37 2026
+
+@author: gabri
+
+Degrees of separation between two rappers.
+
+The shortest paths are found with a bidirectional BFS: the smallest of the
+two frontiers is expanded one level at a time, so only the nodes at about
+half the distance from each end are visited, instead of the whole network
+for nx.shortest_path_length from a hub. The predecessors of each side are
+kept, so all the shortest paths can be listed from the same search, up to a
+limit (their number grows fast on a dense scene).
+
+The landmark table, computed by the batch, holds the distances from a few
+hubs (the landmarks) to every node and the connected component of each
+node. By the triangle inequality, for any landmark l:
+
+    |d(s, l) - d(t, l)| <= d(s, t) <= d(s, l) + d(l, t)
+
+so LandmarkTable.distance_bounds gives bounds of the distance without any
+search, and two rappers of different components are answered at once.
+"""
+
+import json
+import math
+import os
+import threading
+from itertools import islice
+
+import networkx as nx
+import numpy as np
+import pyarrow as pa
+import scipy as sp
+import scipy.sparse.csgraph  # noqa: F401
+
+from data_tools.arrow_io import read_table, write_table
+
+
+# nombre de hubs dont on garde les distances
+NUMBER_OF_LANDMARKS = 16
+
+# nombre maximum de plus courts chemins listés par défaut
+PATHS_LIMIT = 10
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+class LandmarkTable:
+    """
+    The distances from the landmarks to every node.
+
+    Parameters
+    ----------
+    nodes : list
+        The nodes.
+    landmarks : list
+        The landmarks, among the nodes.
+    distances : np.ndarray
+        The (len(nodes), len(landmarks)) distances, -1 when the node can't
+        reach the landmark.
+    components : np.ndarray
+        The connected component of each node.
+
+    """
+
+    def __init__(self, nodes, landmarks, distances, components):
+        self.nodes = list(nodes)
+        self.landmarks = list(landmarks)
+        self.distances = distances
+        self.components = components
+        self._row = {node: row for row, node in enumerate(self.nodes)}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node):
+        return node in self._row
+
+    def _position(self, node):
+        """
+        The row of a node.
+        """
+        try:
+            return self._row[node]
+        except KeyError:
+            raise KeyError('Unknown node {}'.format(node)) from None
+
+    def connected(self, source, target):
+        """
+        Tell if there is a path between two nodes.
+        """
+        return bool(self.components[self._position(source)] == self.components[self._position(target)])
+
+    def distance_bounds(self, source, target):
+        """
+        Give the bounds of the distance between two nodes, from the landmarks.
+
+        Parameters
+        ----------
+        source, target : str
+            The nodes.
+
+        Raises
+        ------
+        KeyError
+            If a node is not in the table.
+
+        Returns
+        -------
+        lower : int or float
+            A lower bound of the distance, math.inf if the nodes are not connected.
+        upper : int or float
+            An upper bound of the distance, math.inf if the nodes are not
+            connected or if no landmark is in their component.
+
+        """
+        source_row, target_row = self._position(source), self._position(target)
+        if source_row == target_row:
+            return 0, 0
+        if self.components[source_row] != self.components[target_row]:
+            return math.inf, math.inf
+
+        source_distances, target_distances = self.distances[source_row], self.distances[target_row]
+        # les landmarks d'une autre composante ne donnent rien
+        reached = source_distances >= 0
+        if not reached.any():
+            return 1, math.inf
+        source_distances, target_distances = source_distances[reached], target_distances[reached]
+
+        lower = max(int(np.abs(source_distances - target_distances).max()), 1)
+        upper = int((source_distances + target_distances).min())
+
+        return lower, upper
+
+
+def landmark_table(network, number_of_landmarks=NUMBER_OF_LANDMARKS):
+    """
+    Compute the landmark table of a network.
+
+    The landmarks are the nodes with the highest degrees, most shortest
+    paths go through them so their bounds are tight.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network.
+    number_of_landmarks : int, optional
+        The number of landmarks. The default is NUMBER_OF_LANDMARKS.
+
+    Raises
+    ------
+    TypeError
+        If network is not an nx.classes.graph.Graph object.
+
+    Returns
+    -------
+    LandmarkTable
+        The table.
+
+    """
+    if isinstance(network, nx.classes.graph.Graph) is False:
+        error_message = str("Wrong network type !!, receive {}, instead of nx.classes.graph.Graph").format(
+            str(type(network)))
+        raise TypeError(error_message)
+
+    nodes = list(network.nodes)
+    degrees = np.fromiter((degree for _, degree in network.degree(nodes)), dtype=np.int64, count=len(nodes))
+    # à égalité, l'ordre des noeuds
+    rows = np.argsort(-degrees, kind='stable')[:number_of_landmarks]
+
+    # un BFS par landmark sur la matrice d'adjacence
+    adjacency = nx.to_scipy_sparse_array(network, nodelist=nodes, weight=None, format='csr')
+    distances = sp.sparse.csgraph.shortest_path(adjacency, directed=False, unweighted=True, indices=rows)
+    distances = np.where(np.isinf(distances), -1, distances).astype(np.int32).T.copy()
+    _, components = sp.sparse.csgraph.connected_components(adjacency, directed=False)
+
+    return LandmarkTable(nodes, [nodes[row] for row in rows], distances, components.astype(np.int32))
+
+
+def write_landmarks(table, path):
+    """
+    Write a landmark table in Arrow IPC.
+
+    Parameters
+    ----------
+    table : LandmarkTable
+        The table.
+    path : str
+        The .arrow file.
+
+    Raises
+    ------
+    ValueError
+        If path is not an .arrow file.
+
+    """
+    if not path.endswith('.arrow'):
+        raise ValueError('The landmark table is memory mapped, use .arrow instead of {}'.format(path))
+
+    columns = {'node': pa.array([str(node) for node in table.nodes], pa.string()),
+               'component': pa.array(table.components, pa.int32())}
+    for i in range(len(table.landmarks)):
+        columns['landmark_{}'.format(i)] = pa.array(table.distances[:, i], pa.int32())
+    # les noms des landmarks dans les metadata, les colonnes sont dans le même ordre
+    arrow_table = pa.table(columns).replace_schema_metadata(
+        {'landmarks': json.dumps([str(landmark) for landmark in table.landmarks], ensure_ascii=False)})
+
+    write_table(arrow_table, path)
+
+
+def load_landmarks(path):
+    """
+    Read the landmark table of write_landmarks, memory mapped.
+
+    Parameters
+    ----------
+    path : str
+        The .arrow file.
+
+    Returns
+    -------
+    LandmarkTable
+        The table.
+
+    """
+    arrow_table = read_table(path).combine_chunks()
+    landmarks = json.loads(arrow_table.schema.metadata[b'landmarks'])
+    distances = np.column_stack([arrow_table.column('landmark_{}'.format(i)).to_numpy()
+                                 for i in range(len(landmarks))]).reshape(arrow_table.num_rows, len(landmarks))
+
+    return LandmarkTable(arrow_table.column('node').to_pylist(), landmarks, distances,
+                         arrow_table.column('component').to_numpy())
+
+
+def get_landmarks(path):
+    """
+    Give the landmark table of a file, loaded once per process (and again if the file changes).
+
+    Parameters
+    ----------
+    path : str
+        The .arrow file.
+
+    Returns
+    -------
+    LandmarkTable
+        The table.
+
+    """
+    key = (os.path.abspath(path), os.path.getmtime(path))
+    with _tables_lock:
+        if key not in _tables:
+            _tables[key] = load_landmarks(path)
+        return _tables[key]
+
+
+def _bidirectional_search(network, source, target, all_paths=False):
+    """
+    Meet a BFS from source and a BFS from target.
+
+    Returns the distance, the meeting nodes (all the nodes at the meeting
+    level of the shortest paths with all_paths, the first one otherwise) and
+    the predecessors of each side, or None if there is no path.
+    """
+    if source == target:
+        return 0, [source], {source: []}, {target: []}
+
+    # les prédécesseurs et la profondeur de chaque côté, le côté 0 part de source
+    predecessors = ({source: []}, {target: []})
+    depths = ({source: 0}, {target: 0})
+    frontiers = ([source], [target])
+
+    while frontiers[0] and frontiers[1]:
+        # on étend le plus petit côté
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        side_predecessors, side_depths, other_depths = predecessors[side], depths[side], depths[1 - side]
+        level = side_depths[frontiers[side][0]] + 1
+
+        next_frontier = []
+        meeting = []
+        for node in frontiers[side]:
+            for neighbor in network[node]:
+                if neighbor not in side_depths:
+                    side_depths[neighbor] = level
+                    side_predecessors[neighbor] = [node]
+                    next_frontier.append(neighbor)
+                    if neighbor in other_depths:
+                        meeting.append(neighbor)
+                        if not all_paths:
+                            return level + other_depths[neighbor], meeting, predecessors[0], predecessors[1]
+                elif side_depths[neighbor] == level:
+                    # un autre plus court chemin vers neighbor
+                    side_predecessors[neighbor].append(node)
+
+        # le niveau est complet, les prédécesseurs des points de rencontre aussi
+        if meeting:
+            return level + other_depths[meeting[0]], meeting, predecessors[0], predecessors[1]
+        frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+
+    return None
+
+
+def _paths_to(predecessors, node):
+    """
+    The shortest paths from the root of a BFS to node, through the predecessors.
+    """
+    if not predecessors[node]:
+        yield [node]
+        return
+    for predecessor in predecessors[node]:
+        for path in _paths_to(predecessors, predecessor):
+            path.append(node)
+            yield path
+
+
+def _count_paths(predecessors, node, counts):
+    """
+    The number of shortest paths from the root of a BFS to node.
+    """
+    if node not in counts:
+        counts[node] = sum(_count_paths(predecessors, predecessor, counts)
+                           for predecessor in predecessors[node]) if predecessors[node] else 1
+    return counts[node]
+
+
+def _check_nodes(network, source, target):
+    """
+    Check the network and the two nodes.
+    """
+    if isinstance(network, nx.classes.graph.Graph) is False:
+        error_message = str("Wrong network type !!, receive {}, instead of nx.classes.graph.Graph").format(
+            str(type(network)))
+        raise TypeError(error_message)
+    for node in (source, target):
+        if node not in network:
+            raise KeyError('Unknown node {}'.format(node))
+
+
+def shortest_path(network, source, target):
+    """
+    Find one shortest path between two nodes, with a bidirectional BFS.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network.
+    source, target : str
+        The nodes.
+
+    Raises
+    ------
+    TypeError
+        If network is not an nx.classes.graph.Graph object.
+    KeyError
+        If a node is not in the network.
+
+    Returns
+    -------
+    list or None
+        The nodes of the path, from source to target, None if there is no path.
+
+    """
+    _check_nodes(network, source, target)
+    search = _bidirectional_search(network, source, target)
+    if search is None:
+        return None
+
+    _, meeting, forward, backward = search
+    head = next(_paths_to(forward, meeting[0]))
+    tail = next(_paths_to(backward, meeting[0]))
+
+    return head + tail[-2::-1]
+
+
+def all_shortest_paths(network, source, target, limit=PATHS_LIMIT):
+    """
+    List the shortest paths between two nodes, with a bidirectional BFS.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network.
+    source, target : str
+        The nodes.
+    limit : int, optional
+        The maximum number of paths, None for all of them. The default is PATHS_LIMIT.
+
+    Raises
+    ------
+    TypeError
+        If network is not an nx.classes.graph.Graph object.
+    KeyError
+        If a node is not in the network.
+
+    Returns
+    -------
+    paths : list
+        The paths (lists of nodes from source to target), empty if there is no path.
+    number_of_paths : int
+        The number of shortest paths, even those above the limit.
+
+    """
+    _check_nodes(network, source, target)
+    search = _bidirectional_search(network, source, target, all_paths=True)
+    if search is None:
+        return [], 0
+
+    _, meeting, forward, backward = search
+
+    def paths():
+        for node in meeting:
+            for tail in _paths_to(backward, node):
+                for head in _paths_to(forward, node):
+                    yield head + tail[-2::-1]
+
+    forward_counts, backward_counts = {}, {}
+    number_of_paths = sum(_count_paths(forward, node, forward_counts) * _count_paths(backward, node, backward_counts)
+                          for node in meeting)
+
+    return list(islice(paths(), limit)), number_of_paths
+
+
+def path_query(network, source, target, landmarks=None, all_paths=False, limit=PATHS_LIMIT, weight='weight'):
+    """
+    Answer how two rappers are connected.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network.
+    source, target : str
+        The rappers.
+    landmarks : LandmarkTable, optional
+        The landmark table of the network, to give the distance bounds and
+        to skip the search between two components. The default is None.
+    all_paths : bool, optional
+        List all the shortest paths (up to limit) instead of one. The default is False.
+    limit : int, optional
+        The maximum number of paths with all_paths. The default is PATHS_LIMIT.
+    weight : str, optional
+        The edge attribute giving the number of collaborations. The default is 'weight'.
+
+    Raises
+    ------
+    TypeError
+        If network is not an nx.classes.graph.Graph object.
+    KeyError
+        If a node is not in the network.
+
+    Returns
+    -------
+    dict
+        - distance : the number of featurings between the two rappers, None if they are not connected.
+        - bounds : the (lower, upper) bounds of the landmark table, None without it.
+        - paths : the paths, each path being the list of its hops, a hop
+          being a dict with source, target and collaborations (the weight
+          of the edge, None if the edges have no weight).
+        - number_of_paths : the number of shortest paths, even those above the
+          limit, None without all_paths (they are not counted).
+
+    """
+    _check_nodes(network, source, target)
+
+    bounds = None
+    if landmarks is not None and source in landmarks and target in landmarks:
+        bounds = landmarks.distance_bounds(source, target)
+        # deux composantes différentes, pas besoin de chercher
+        if bounds[0] == math.inf:
+            return {'distance': None, 'bounds': bounds, 'paths': [], 'number_of_paths': 0}
+
+    if all_paths:
+        paths, number_of_paths = all_shortest_paths(network, source, target, limit=limit)
+    else:
+        path = shortest_path(network, source, target)
+        paths, number_of_paths = ([path], None) if path is not None else ([], 0)
+
+    hops = [[{'source': u, 'target': v, 'collaborations': network[u][v].get(weight)}
+             for u, v in zip(path, path[1:])] for path in paths]
+
+    return {'distance': len(paths[0]) - 1 if paths else None, 'bounds': bounds, 'paths': hops,
+            'number_of_paths': number_of_paths}
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:48:05 2026
+
+@author: gabri
+
+Metrics of each node with their ranks, computed once by the batch.
+
+write_ranked_metrics adds to the metrics dataframe, for each numeric column:
+
+- <metric>_order : the row of the n-th node by decreasing value (NaN last).
+- <metric>_rank : the rank of the node, 1 for the highest value, the ties
+  sharing the best rank.
+- <metric>_percentile : the percentage of the nodes with a lower or equal
+  value (100 for the first).
+
+and writes it in Arrow IPC. RankedMetrics reads it memory mapped, without
+copying the columns, and answers the lookups of a node, its rank, its
+percentile and the top-k of a metric without sorting nor scanning the rows.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_tools.arrow_io import read_table
+from network_tools.metrics_io import write_metrics_table
+
+
+# les suffixes des colonnes ajoutées pour chaque metric
+RANK_SUFFIXES = ['_order', '_rank', '_percentile']
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _ranked_columns(df):
+    """
+    The numeric columns of the metrics dataframe (without node and the bool *_sampled flags).
+    """
+    return [column for column in df.columns
+            if column != 'node' and pd.api.types.is_numeric_dtype(df[column])
+            and not pd.api.types.is_bool_dtype(df[column])]
+
+
+def rank_values(values):
+    """
+    Sort the values by decreasing order and rank them.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The values of a metric, NaN allowed.
+
+    Returns
+    -------
+    order : np.ndarray
+        The indices of the values from the highest to the lowest, NaN last.
+    rank : np.ndarray
+        The rank of each value, starting at 1, the ties sharing the best rank.
+    percentile : np.ndarray
+        The percentage of the values lower or equal to each value.
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+    number = len(values)
+    # tri stable, à égalité on garde l'ordre des lignes
+    order = np.argsort(-values, kind='stable')
+    ordered = values[order]
+
+    positions = np.arange(number)
+    first_of_tie = np.ones(number, dtype=bool)
+    first_of_tie[1:] = ordered[1:] != ordered[:-1]
+    # la position du premier de chaque groupe d'égalité
+    tie_start = np.maximum.accumulate(np.where(first_of_tie, positions, 0))
+
+    rank = np.empty(number, dtype=np.int64)
+    rank[order] = tie_start + 1
+    percentile = 100.0 * (number - rank + 1) / max(number, 1)
+
+    return order.astype(np.int64), rank, percentile
+
+
+def write_ranked_metrics(df, path):
+    """
+    Write the metrics dataframe with the order, rank and percentile of each metric.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The dataframe of network_measures_to_dataframe, with a node column.
+    path : str
+        The .arrow file.
+
+    Raises
+    ------
+    ValueError
+        If path is not an .arrow file or if a node appears twice.
+
+    """
+    if not path.endswith('.arrow'):
+        raise ValueError('The ranked metrics are memory mapped, use .arrow instead of {}'.format(path))
+    if df['node'].duplicated().any():
+        raise ValueError('The nodes of the metrics dataframe must be unique')
+
+    columns = {'node': df['node'].astype(str).to_numpy()}
+    for metric in _ranked_columns(df):
+        columns[metric] = df[metric].to_numpy()
+        columns[metric + '_order'], columns[metric + '_rank'], columns[metric + '_percentile'] = \
+            rank_values(df[metric].to_numpy())
+
+    write_metrics_table(pd.DataFrame(columns), path)
+
+
+class RankedMetrics:
+    """
+    Lookups of the metrics written by write_ranked_metrics.
+
+    Parameters
+    ----------
+    table : pa.Table
+        The table read from the .arrow file.
+
+    """
+
+    def __init__(self, table):
+        self.nodes = table.column('node').to_pylist()
+        self._row = {node: row for row, node in enumerate(self.nodes)}
+
+        names = table.column_names
+        self.metrics = [name for name in names
+                        if name != 'node' and all(name + suffix in names for suffix in RANK_SUFFIXES)]
+
+        # les colonnes numériques sans null sont des vues sur le memory map
+        self._columns = {name: table.column(name).to_numpy() for name in names if name != 'node'}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node):
+        return node in self._row
+
+    def _position(self, node):
+        """
+        The row of a node.
+        """
+        try:
+            return self._row[node]
+        except KeyError:
+            raise KeyError('Unknown node {}'.format(node)) from None
+
+    def value(self, node, metric):
+        """
+        Give the value of a metric for a node.
+        """
+        return self._columns[metric][self._position(node)].item()
+
+    def rank(self, node, metric):
+        """
+        Give the rank of a node for a metric, 1 for the highest value.
+        """
+        return int(self._columns[metric + '_rank'][self._position(node)])
+
+    def percentile(self, node, metric):
+        """
+        Give the percentage of the nodes with a lower or equal value of a metric.
+        """
+        return float(self._columns[metric + '_percentile'][self._position(node)])
+
+    def row(self, node):
+        """
+        Give all the metrics of a node.
+
+        Parameters
+        ----------
+        node : str
+            The node.
+
+        Raises
+        ------
+        KeyError
+            If the node is not in the metrics.
+
+        Returns
+        -------
+        dict
+            The value of each metric.
+
+        """
+        position = self._position(node)
+        return {metric: self._columns[metric][position].item() for metric in self.metrics}
+
+    def top(self, metric, k=30):
+        """
+        Give the k nodes with the highest values of a metric.
+
+        Parameters
+        ----------
+        metric : str
+            The metric.
+        k : int, optional
+            The number of nodes. The default is 30.
+
+        Returns
+        -------
+        pd.DataFrame
+            The node and metric columns of the k first nodes, by decreasing value.
+
+        """
+        rows = self._columns[metric + '_order'][:k]
+        return pd.DataFrame({'node': [self.nodes[row] for row in rows], metric: self._columns[metric][rows]})
+
+
+def load_ranked_metrics(path):
+    """
+    Read the ranked metrics of write_ranked_metrics, memory mapped.
+
+    Parameters
+    ----------
+    path : str
+        The .arrow file.
+
+    Returns
+    -------
+    RankedMetrics
+        The lookups.
+
+    """
+    return RankedMetrics(read_table(path))
+
+
+def get_ranked_metrics(path):
+    """
+    Give the ranked metrics of a file, loaded once per process (and again if the file changes).
+
+    Parameters
+    ----------
+    path : str
+        The .arrow file.
+
+    Returns
+    -------
+    RankedMetrics
+        The lookups.
+
+    """
+    key = (os.path.abspath(path), os.path.getmtime(path))
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = load_ranked_metrics(path)
+        return _stores[key]
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:44 2026
+
+@author: gabri
+
+Metrics of a sequence of snapshots of the network (the featurings up to each
+year for instance), in one long table.
+
+snapshot_measures computes network_measures_to_dataframe and
+overall_calculations for every snapshot, reusing what it can:
+
+- the all pairs distances are maintained with NetworkMetrics from one
+  snapshot to the next when the next one only adds nodes and at most
+  INCREMENTAL_MAX_EDGES edges, instead of a BFS from every node of every
+  snapshot. It keeps the n² distances in memory, so only up to
+  INCREMENTAL_MAX_NODES nodes. The other snapshots are computed as with
+  incremental=False.
+- two identical snapshots (same fingerprint) are computed once.
+- the disk cache, if given, keeps the metrics of the snapshots already
+  computed by a previous run.
+
+The remaining metrics of the snapshots are computed in parallel, one process
+per snapshot.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import pandas as pd
+
+from network_tools.incremental_calculation import NetworkMetrics
+from network_tools.network_calculation import graph_fingerprint, network_measures_to_dataframe, overall_calculations
+
+
+logger = logging.getLogger(__name__)
+
+
+# au delà de ce nombre d'arêtes nouvelles, on refait les BFS plutôt que de mettre à jour les distances :
+# mesuré sur powerlaw_cluster_graph(1500, 3, 0.3), les BFS de tous les noeuds prennent 1.8 s et
+# NetworkMetrics.add_edge 2.4 ms, soit un équilibre vers 750 arêtes, on garde une marge
+INCREMENTAL_MAX_EDGES = 500
+
+# NetworkMetrics garde les n² distances en dicts, au delà de ce nombre de noeuds on refait les BFS
+INCREMENTAL_MAX_NODES = 2000
+
+
+def cumulative_snapshots(edge_batches, node_attributes=None):
+    """
+    Build the cumulative snapshots of a network from its edges added at each step.
+
+    Parameters
+    ----------
+    edge_batches : iterable
+        The (snapshot, edges) in chronological order, edges being (u, v) or
+        (u, v, attributes) tuples.
+    node_attributes : dict, optional
+        The attributes of the nodes, {node: dict}. The default is None.
+
+    Yields
+    ------
+    snapshot : object
+        The label of the snapshot.
+    network : nx.classes.graph.Graph
+        All the edges up to this snapshot.
+
+    """
+    network = nx.Graph()
+    for snapshot, edges in edge_batches:
+        network.add_edges_from(edges)
+        if node_attributes is not None:
+            nx.set_node_attributes(network, {node: node_attributes[node] for node in network.nodes
+                                             if node in node_attributes})
+        yield snapshot, network.copy()
+
+
+def snapshots_by_edge_attribute(network, attribute='year'):
+    """
+    Build the cumulative snapshots of a network whose edges have a date attribute.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network, the edges without the attribute are ignored.
+    attribute : str, optional
+        The edge attribute giving the snapshot. The default is 'year'.
+
+    Returns
+    -------
+    generator
+        The (value of the attribute, network) of cumulative_snapshots, by
+        increasing value.
+
+    """
+    groups = {}
+    for u, v, data in network.edges(data=True):
+        if attribute in data:
+            groups.setdefault(data[attribute], []).append((u, v, data))
+
+    return cumulative_snapshots(((value, groups[value]) for value in sorted(groups)),
+                                node_attributes=dict(network.nodes(data=True)))
+
+
+def _largest_component(network):
+    """
+    The largest connected component of the network, the distance metrics need a connected network.
+    """
+    if network.number_of_nodes() == 0 or nx.is_connected(network):
+        return network
+    return network.subgraph(max(nx.connected_components(network), key=len)).copy()
+
+
+def _new_edges(previous, network):
+    """
+    The edges added from previous to network, None if network is not a superset of previous.
+    """
+    if previous is None or network is None:
+        return None
+    new_edges = [(u, v) for u, v in network.edges if not previous.has_edge(u, v)]
+    superset = (all(node in network for node in previous.nodes)
+                and previous.number_of_edges() + len(new_edges) == network.number_of_edges())
+    return new_edges if superset else None
+
+
+def _reusable(previous, network):
+    """
+    Whether the distances of previous are worth updating to network rather than recomputed.
+    """
+    new_edges = _new_edges(previous, network)
+    return new_edges is not None and len(new_edges) <= INCREMENTAL_MAX_EDGES
+
+
+def _advance(tracker, network):
+    """
+    Bring the NetworkMetrics of the previous snapshot to this one, or start a new one.
+    """
+    if tracker is not None and _reusable(tracker.network, network):
+        for node in network.nodes:
+            if node not in tracker.network:
+                tracker.add_node(node)
+        for u, v in _new_edges(tracker.network, network):
+            tracker.add_edge(u, v)
+        return tracker
+
+    return NetworkMetrics(network)
+
+
+def _snapshot_task(network, distances, options):
+    """
+    Compute the individual and overall metrics of one snapshot.
+    """
+    cache, disk_cache, include_node_value, individual = options
+    overall = overall_calculations(network, distances=distances, pivots=individual['pivots'],
+                                   epsilon=individual['epsilon'], seed=individual['seed'], cache=cache,
+                                   disk_cache=disk_cache)
+    df = network_measures_to_dataframe(network, include_node_value=include_node_value, distances=distances,
+                                       cache=cache, disk_cache=disk_cache, **individual)
+
+    return df, overall
+
+
+def snapshot_measures(snapshots, n_jobs=None, largest_component=True, incremental=True,
+                      include_node_value=False, backend='networkx', pivots=None, epsilon=None, seed=None,
+                      metrics=None, budgets=None, cache=True, disk_cache=None):
+    """
+    Compute the individual and overall metrics of every snapshot.
+
+    Parameters
+    ----------
+    snapshots : iterable
+        The (snapshot, network) pairs, in chronological order, see
+        cumulative_snapshots. The labels must be unique.
+    n_jobs : int, optional
+        The number of processes, one snapshot per process, -1 for all the
+        cpus. The default is None (serial).
+    largest_component : bool, optional
+        Compute the metrics of the largest connected component of each
+        snapshot, the first years are rarely connected. The default is True.
+    incremental : bool, optional
+        Maintain the distances from one snapshot to the next instead of
+        recomputing them, when the next one adds at most
+        INCREMENTAL_MAX_EDGES edges (exact mode only, and only for the
+        snapshots of at most INCREMENTAL_MAX_NODES nodes). The other
+        snapshots are computed as with False. The default is True.
+    include_node_value : bool, optional
+        See network_measures_to_dataframe. The default is False.
+    backend, pivots, epsilon, seed, metrics, budgets : optional
+        See calculation_individual_metrics.
+    cache : bool, optional
+        Use the in-memory cache of network_calculation. The default is True.
+    disk_cache : network_tools.metrics_cache.MetricsDiskCache, optional
+        If given, reuse and keep the metrics of each snapshot on disk,
+        shared with the previous runs. The default is None.
+
+    Raises
+    ------
+    TypeError
+        If a snapshot is not a networkx graph.
+    ValueError
+        If two snapshots have the same label.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The long table of the individual metrics, one row per (snapshot,
+        node), with the snapshot and node columns first.
+    overall : dict
+        The overall_calculations of each snapshot.
+
+    """
+    prepared = []
+    for snapshot, network in snapshots:
+        if isinstance(network, nx.classes.graph.Graph) is False:
+            error_message = str("Wrong network type !!, receive {}, instead of nx.classes.graph.Graph").format(
+                str(type(network)))
+            raise TypeError(error_message)
+        if network.number_of_nodes() == 0:
+            logger.warning('Snapshot %s is empty, it is skipped', snapshot)
+            continue
+        prepared.append((snapshot, _largest_component(network) if largest_component else network))
+
+    labels = [snapshot for snapshot, _ in prepared]
+    if len(set(labels)) != len(labels):
+        raise ValueError('The labels of the snapshots must be unique')
+
+    # un seul calcul par réseau différent
+    fingerprints = [graph_fingerprint(network) for _, network in prepared]
+    unique = {}
+    for fingerprint, (_, network) in zip(fingerprints, prepared):
+        unique.setdefault(fingerprint, network)
+
+    # les distances suivies d'un snapshot à l'autre
+    distances = dict.fromkeys(unique)
+    if incremental and pivots is None and epsilon is None:
+        networks = [network if network.number_of_nodes() <= INCREMENTAL_MAX_NODES else None
+                    for network in unique.values()]
+        tracker = None
+        for index, fingerprint in enumerate(unique):
+            network = networks[index]
+            if network is None:
+                # trop gros pour garder les n² distances, on libère celles du snapshot précédent
+                tracker = None
+                continue
+            previous = networks[index - 1] if index > 0 else None
+            following = networks[index + 1] if index + 1 < len(networks) else None
+            # le suivi ne vaut que s'il sert d'un snapshot à l'autre, sinon les BFS habituels
+            if not _reusable(previous, network) and not _reusable(network, following):
+                tracker = None
+                continue
+            tracker = _advance(tracker, network)
+            if tracker.is_connected():
+                distances[fingerprint] = tracker.distances()
+
+    individual = {'backend': backend, 'pivots': pivots, 'epsilon': epsilon, 'seed': seed, 'metrics': metrics,
+                  'budgets': budgets}
+    options = (cache, disk_cache, include_node_value, individual)
+    tasks = [(unique[fingerprint], distances[fingerprint]) for fingerprint in unique]
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs is None or n_jobs <= 1 or len(tasks) <= 1:
+        outputs = [_snapshot_task(network, network_distances, options) for network, network_distances in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as executor:
+            futures = [executor.submit(_snapshot_task, network, network_distances, options)
+                       for network, network_distances in tasks]
+            outputs = [future.result() for future in futures]
+    results = dict(zip(unique, outputs))
+
+    frames = []
+    overall = {}
+    for snapshot, fingerprint in zip(labels, fingerprints):
+        snapshot_df, overall[snapshot] = results[fingerprint]
+        frames.append(snapshot_df.assign(snapshot=snapshot))
+        logger.info('Snapshot %s : %d nodes', snapshot, len(snapshot_df))
+
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        df = pd.DataFrame(columns=['snapshot', 'node'])
+    df = df[['snapshot'] + [column for column in df.columns if column != 'snapshot']]
+
+    return df, overall
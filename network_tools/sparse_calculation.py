@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:03 2026
+
+@author: gabri
+
+Sparse (CSR) backend for the individual metrics of network_calculation.
+
+The graph is converted once into a scipy CSR adjacency matrix and the local
+and spectral metrics are computed with vectorized operations on it.
+
+Tolerance against the networkx backend:
+
+- degree, centrality, triangles, clustering and degree_average_voisin are
+  exactly the same values.
+- page_rank uses the same power iteration and stopping rule as networkx, it
+  matches to about 1e-12 (only the summation order differs).
+- eigen_centrality starts ARPACK from a vector of ones (networkx starts
+  from a random vector), both match to about 1e-9 and the result is the
+  same from one run to the other.
+- katz solves (I - alpha A^T) x = beta by conjugate gradient instead of the
+  power iteration of networkx, to a tolerance much tighter than the one of
+  networkx (the two match to about 1e-6). The eigen solve of eigen_centrality gives the
+  spectral radius, and when alpha >= 1 / spectral radius (the series of
+  katz diverges, networkx never converges) alpha is replaced by
+  KATZ_ALPHA_FRACTION / spectral radius.
+"""
+
+import networkx as nx
+import numpy as np
+import scipy as sp
+import scipy.sparse.linalg  # noqa: F401
+
+
+# nombre de lignes traitées à la fois pour les triangles, pour borner la mémoire de A @ A
+TRIANGLES_CHUNK_SIZE = 4096
+
+# alpha de katz par défaut, celui de nx.katz_centrality
+KATZ_ALPHA = 0.1
+
+# la fraction de 1 / rayon spectral prise quand alpha fait diverger katz
+KATZ_ALPHA_FRACTION = 0.9
+
+# nombre maximum d'itérations du gradient conjugué de katz
+KATZ_MAX_ITER = 1000
+
+
+def adjacency_matrix(network, weight=None):
+    """
+    Convert the network into a CSR adjacency matrix.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network you want to convert.
+    weight : str, optional
+        The edge attribute used as weight, 1 for every edge if None.
+        The default is None.
+
+    Returns
+    -------
+    nodes : list
+        The nodes, in the order of the rows of the matrix.
+    adjacency : sp.sparse.csr_array
+        The adjacency matrix.
+
+    """
+    nodes = list(network.nodes)
+    adjacency = nx.to_scipy_sparse_array(network, nodelist=nodes, weight=weight, dtype=float, format='csr')
+
+    return nodes, adjacency
+
+
+def sparse_degree(adjacency):
+    """
+    Compute the degree of each node, a self loop counting twice like networkx.
+    """
+    return np.asarray(adjacency.sum(axis=1)).ravel() + adjacency.diagonal()
+
+
+def sparse_triangles(adjacency):
+    """
+    Compute the number of triangles of each node, self loops are ignored.
+    """
+    adjacency = adjacency.copy()
+    adjacency.setdiag(0)
+    adjacency.eliminate_zeros()
+
+    triangles = np.zeros(adjacency.shape[0])
+    # on fait par paquet de lignes, sinon A @ A explose sur les gros hubs
+    for start in range(0, adjacency.shape[0], TRIANGLES_CHUNK_SIZE):
+        rows = adjacency[start:start + TRIANGLES_CHUNK_SIZE]
+        paths = (rows @ adjacency).multiply(rows)
+        triangles[start:start + TRIANGLES_CHUNK_SIZE] = np.asarray(paths.sum(axis=1)).ravel() / 2
+
+    return triangles
+
+
+def sparse_clustering(triangles, degree):
+    """
+    Compute the clustering coefficient from the triangles and the degree.
+    """
+    clustering = np.zeros(len(degree))
+    mask = (triangles > 0) & (degree > 1)
+    clustering[mask] = 2 * triangles[mask] / (degree[mask] * (degree[mask] - 1))
+
+    return clustering
+
+
+def sparse_average_neighbor_degree(adjacency, degree):
+    """
+    Compute the average degree of the neighbours of each node.
+    """
+    average = np.zeros(len(degree))
+    mask = degree > 0
+    average[mask] = (adjacency @ degree)[mask] / degree[mask]
+
+    return average
+
+
+def sparse_pagerank(adjacency, alpha=0.85, max_iter=100, tol=1.0e-6):
+    """
+    Compute the page rank with the same power iteration as nx.pagerank.
+
+    Raises
+    ------
+    nx.PowerIterationFailedConvergence
+        If the power iteration doesn't converge in max_iter iterations.
+    """
+    number_of_nodes = adjacency.shape[0]
+    out_weight = np.asarray(adjacency.sum(axis=1)).ravel()
+    inverse = np.zeros(number_of_nodes)
+    inverse[out_weight != 0] = 1.0 / out_weight[out_weight != 0]
+    transition = sp.sparse.dia_array((inverse, 0), shape=adjacency.shape).tocsr() @ adjacency
+
+    x = np.repeat(1.0 / number_of_nodes, number_of_nodes)
+    p = np.repeat(1.0 / number_of_nodes, number_of_nodes)
+    is_dangling = np.where(out_weight == 0)[0]
+
+    for _ in range(max_iter):
+        xlast = x
+        x = alpha * (x @ transition + sum(x[is_dangling]) * p) + (1 - alpha) * p
+        if np.absolute(x - xlast).sum() < number_of_nodes * tol:
+            return x
+
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+def leading_eigenpair(adjacency, max_iter=200):
+    """
+    Compute the largest eigenvalue (the spectral radius) and its eigenvector.
+
+    Returns
+    -------
+    spectral_radius : float
+        The largest eigenvalue of the adjacency matrix.
+    eigenvector : np.ndarray
+        The eigenvector, with a positive sum and a norm of 1, as
+        nx.eigenvector_centrality_numpy.
+
+    """
+    if adjacency.shape[0] < 3:
+        # ARPACK demande plus de noeuds que de valeurs propres cherchées
+        eigenvalues, eigenvectors = np.linalg.eigh(adjacency.toarray())
+        eigenvalue, largest = eigenvalues[-1:], eigenvectors[:, -1]
+    else:
+        # départ fixe (le vecteur de Perron est positif), pour que le résultat ne change pas d'un run à l'autre
+        start = np.ones(adjacency.shape[0])
+        eigenvalue, eigenvector = sp.sparse.linalg.eigsh(adjacency, k=1, which='LA', maxiter=max_iter, v0=start)
+        largest = eigenvector.ravel()
+
+    sign = np.sign(largest.sum()) or 1.0
+    return float(eigenvalue[0]), largest / (sign * np.linalg.norm(largest))
+
+
+def sparse_eigenvector_centrality(adjacency, max_iter=200):
+    """
+    Compute the eigenvector centrality, as nx.eigenvector_centrality_numpy.
+    """
+    return leading_eigenpair(adjacency, max_iter=max_iter)[1]
+
+
+def katz_alpha(spectral_radius, alpha=KATZ_ALPHA):
+    """
+    Check alpha against the spectral radius, the series of katz only converges below 1 / spectral radius.
+
+    Returns
+    -------
+    float
+        alpha if it is valid, else KATZ_ALPHA_FRACTION / spectral_radius.
+
+    """
+    if alpha * spectral_radius < 1:
+        return alpha
+    return KATZ_ALPHA_FRACTION / spectral_radius
+
+
+def sparse_katz_centrality(adjacency, alpha=KATZ_ALPHA, beta=1.0, tol=1.0e-10, max_iter=KATZ_MAX_ITER):
+    """
+    Compute the katz centrality by solving (I - alpha A^T) x = beta.
+
+    alpha must be below 1 / spectral radius (see katz_alpha), so the matrix
+    is symmetric positive definite for an undirected graph and the system
+    is solved by conjugate gradient, without the fill-in of a LU
+    factorization on the hubs of a power law graph. Its condition number is
+    at most (1 + alpha rho) / (1 - alpha rho), about 19 with
+    KATZ_ALPHA_FRACTION, so it converges in a few dozen products.
+
+    Raises
+    ------
+    nx.PowerIterationFailedConvergence
+        If the conjugate gradient doesn't converge.
+    """
+    number_of_nodes = adjacency.shape[0]
+    system = sp.sparse.identity(number_of_nodes, format='csr') - alpha * adjacency.T.tocsr()
+    constant = np.full(number_of_nodes, beta, dtype=float)
+
+    x, info = sp.sparse.linalg.cg(system, constant, rtol=tol, maxiter=max_iter)
+    if info != 0:
+        raise nx.PowerIterationFailedConvergence(max_iter)
+
+    norm = np.linalg.norm(x)
+    if norm == 0:
+        return x
+    return x / norm
+
+
+def spectral_metrics(adjacency, alpha=KATZ_ALPHA, beta=1.0, katz=True):
+    """
+    Compute eigen_centrality and katz from a single eigen solve.
+
+    Parameters
+    ----------
+    adjacency : sp.sparse.csr_array
+        The adjacency matrix.
+    alpha : float, optional
+        The attenuation factor of katz, replaced if it is not below
+        1 / spectral radius. The default is KATZ_ALPHA.
+    beta : float, optional
+        The weight of each node in katz. The default is 1.0.
+    katz : bool, optional
+        If False, only the eigen solve is done. The default is True.
+
+    Returns
+    -------
+    metrics : dict
+        eigen_centrality and katz (None if the solver fails or katz is
+        False) as arrays, the spectral_radius and the katz_alpha really used.
+
+    """
+    spectral_radius, eigenvector = leading_eigenpair(adjacency)
+    alpha = katz_alpha(spectral_radius, alpha)
+
+    values = None
+    if katz:
+        try:
+            values = sparse_katz_centrality(adjacency, alpha=alpha, beta=beta)
+        except nx.PowerIterationFailedConvergence:
+            values = None
+
+    return {'eigen_centrality': eigenvector, 'katz': values, 'spectral_radius': spectral_radius,
+            'katz_alpha': alpha}
+
+
+def sparse_individual_metrics(network, katz=True):
+    """
+    Compute the metrics of calculation_individual_metrics that can be done on the CSR matrix.
+
+    Parameters
+    ----------
+    network : nx.classes.graph.Graph
+        The network you want to analyse.
+    katz : bool, optional
+        If False, katz is not solved (None). The default is True.
+
+    Returns
+    -------
+    metrics : dict
+        The dict containing a {node: value} dict for degree, centrality,
+        triangles, clustering, degree_average_voisin, page_rank and
+        eigen_centrality, and katz when it converges (None otherwise), plus
+        the spectral_radius and katz_alpha of spectral_metrics.
+
+    """
+    nodes, adjacency = adjacency_matrix(network)
+    number_of_nodes = len(nodes)
+
+    degree = sparse_degree(adjacency)
+    triangles = sparse_triangles(adjacency)
+
+    metrics = {}
+    metrics['degree'] = degree.astype(int)
+    if number_of_nodes > 1:
+        metrics['centrality'] = degree * (1.0 / (number_of_nodes - 1.0))
+    else:
+        metrics['centrality'] = np.ones(number_of_nodes)
+    metrics['triangles'] = triangles.astype(int)
+    metrics['clustering'] = sparse_clustering(triangles, degree)
+    metrics['degree_average_voisin'] = sparse_average_neighbor_degree(adjacency, degree)
+
+    # page rank avec les poids des liens, comme networkx
+    _, weighted_adjacency = adjacency_matrix(network, weight='weight')
+    metrics['page_rank'] = sparse_pagerank(weighted_adjacency)
+    spectral = spectral_metrics(adjacency, katz=katz)
+    metrics['eigen_centrality'] = spectral['eigen_centrality']
+    metrics['katz'] = spectral['katz']
+
+    metrics = {name: None if values is None else dict(zip(nodes, values.tolist()))
+               for name, values in metrics.items()}
+    metrics['spectral_radius'] = spectral['spectral_radius']
+    metrics['katz_alpha'] = spectral['katz_alpha']
+
+    return metrics
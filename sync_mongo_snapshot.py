@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 12:05:47 2026
+
+@author: gabri
+
+Copy the collections read by the app into data/snapshot, so that the app
+runs from local files (and without Mongo at all):
+
+    python sync_mongo_snapshot.py --uri "mongodb+srv://..." --db-name rap
+    python sync_mongo_snapshot.py --full
+
+The uri and the name of the database can also be given by the MONGO_URI
+and MONGO_DB_NAME environment variables. Only the new and deleted
+documents are synchronised, --full exports everything again.
+"""
+
+import argparse
+import os
+import sys
+
+import data_tools.mongo_access as mongo
+from data_tools.mongo_snapshot import sync_snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uri', default=os.environ.get('MONGO_URI'))
+    parser.add_argument('--db-name', default=os.environ.get('MONGO_DB_NAME'))
+    parser.add_argument('--directory', default='./data/snapshot')
+    parser.add_argument('--full', action='store_true', help='export all the documents again')
+    args = parser.parse_args(argv)
+
+    if args.uri is None or args.db_name is None:
+        parser.error('the uri and the name of the database are needed (--uri / --db-name or MONGO_URI / MONGO_DB_NAME)')
+
+    result = sync_snapshot(mongo.get_database(args.uri, args.db_name), args.directory, full=args.full)
+    for name, counts in result.items():
+        print('{:<20} {added} added, {removed} removed, {kept} kept'.format(name, **counts))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
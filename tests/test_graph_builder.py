@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:14:52 2026
+
+@author: gabri
+
+Tests of network_tools.graph_builder against an in-memory stand-in of the
+artist_all_details collection.
+"""
+
+import numpy as np
+
+from network_tools.graph_builder import (BATCH_SIZE, FEATURING_PROJECTION, build_featuring_network,
+                                         featuring_arrays)
+from network_tools.graph_loader import load_network
+
+
+class FakeCollection:
+    """
+    The find of a pymongo collection on a list of documents, recording its arguments.
+    """
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.calls = []
+
+    def find(self, filter, projection, batch_size=None):
+        self.calls.append({'filter': filter, 'projection': projection, 'batch_size': batch_size})
+        for document in self.documents:
+            yield {field: document[field] for field in projection if projection[field] and field in document}
+
+
+def _edges(network):
+    return {frozenset((u, v)): data.get('weight') for u, v, data in network.edges(data=True)}
+
+
+def test_cursor_asks_only_the_featurings():
+    collection = FakeCollection([{'_id': 1, 'name': 'A', 'featuring_repartition': {'B': 1}, 'all_unique_song': []}])
+    featuring_arrays(collection, batch_size=250)
+    featuring_arrays(collection)
+
+    assert collection.calls[0] == {'filter': {}, 'projection': FEATURING_PROJECTION, 'batch_size': 250}
+    assert collection.calls[1]['batch_size'] == BATCH_SIZE
+
+
+def test_pair_seen_from_both_sides_keeps_the_max():
+    collection = FakeCollection([
+        {'name': 'A', 'featuring_repartition': {'B': 3, 'C': 1}},
+        {'name': 'B', 'featuring_repartition': {'A': 2}},
+        {'name': 'C', 'featuring_repartition': {'A': 5}},
+    ])
+    network = build_featuring_network(collection)
+
+    assert list(network.nodes) == ['A', 'B', 'C']
+    assert _edges(network) == {frozenset(('A', 'B')): 3.0, frozenset(('A', 'C')): 5.0}
+
+
+def test_self_loops_and_zero_counts_are_dropped():
+    collection = FakeCollection([
+        {'name': 'A', 'featuring_repartition': {'A': 4, 'B': 0, 'C': 2}},
+        {'name': 'B', 'featuring_repartition': {'A': 0}},
+        {'name': 'C', 'featuring_repartition': {}},
+    ])
+    network = build_featuring_network(collection)
+
+    assert list(network.nodes) == ['A', 'C']
+    assert _edges(network) == {frozenset(('A', 'C')): 2.0}
+
+
+def test_artists_only_drops_the_people_outside_the_collection():
+    documents = [
+        {'name': 'A', 'featuring_repartition': {'B': 1, 'Chanteuse': 2}},
+        {'name': 'B', 'featuring_repartition': None},
+    ]
+
+    network = build_featuring_network(FakeCollection(documents))
+    assert list(network.nodes) == ['A', 'B']
+    assert _edges(network) == {frozenset(('A', 'B')): 1.0}
+
+    network = build_featuring_network(FakeCollection(documents), artists_only=False)
+    assert list(network.nodes) == ['A', 'B', 'Chanteuse']
+    assert _edges(network) == {frozenset(('A', 'B')): 1.0, frozenset(('A', 'Chanteuse')): 2.0}
+
+
+def test_empty_collection(tmp_path):
+    output_path = str(tmp_path / 'empty.npz')
+    network = build_featuring_network(FakeCollection([]), output_path=output_path)
+
+    assert network.number_of_nodes() == 0
+    assert network.number_of_edges() == 0
+    assert np.load(output_path)['indptr'].tolist() == [0]
+    assert load_network(output_path).number_of_nodes() == 0
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 10:22:37 2026
+
+@author: gabri
+
+Smoke tests of network_tools.network_figure on a small graph.
+"""
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('plotly')
+
+from network_tools.network_figure import decimate, network_figure  # noqa: E402
+
+
+def _network():
+    network = nx.star_graph(5)
+    nx.add_path(network, [1, 2, 3])
+    nx.set_node_attributes(network, {node: [np.cos(node), np.sin(node)] for node in network}, 'pos')
+    return network
+
+
+def test_figure_draws_every_node_and_edge():
+    network = _network()
+    figure = network_figure(network)
+    edge_trace, node_trace = figure.data
+
+    assert len(edge_trace.x) == 3 * network.number_of_edges()
+    assert len(node_trace.x) == network.number_of_nodes()
+    assert list(node_trace.marker.color) == [degree for _, degree in network.degree()]
+    # la figure doit passer en json, c'est ce que reçoit le navigateur
+    assert figure.to_json()
+
+
+def test_figure_colored_by_a_metric_and_decimated():
+    network = _network()
+    metrics = pd.DataFrame({'node': list(network.nodes), 'page_rank': np.linspace(1, 0, 6)})
+    figure = network_figure(network, metrics=metrics, color='page_rank', max_nodes=3, max_edges=1)
+    edge_trace, node_trace = figure.data
+
+    # les 3 plus hauts page_rank sont les noeuds 0, 1 et 2, reliés par 3 arêtes dont une est gardée
+    assert list(node_trace.marker.color) == [1.0, 0.8, 0.6]
+    assert len(edge_trace.x) == 3
+    assert {edge_trace.x[0], edge_trace.x[1]} <= {np.cos(0), np.cos(1), np.cos(2)}
+
+
+def test_decimate():
+    values = np.array([3.0, np.nan, 5.0, 1.0])
+    edges = np.array([[0, 1], [0, 2], [2, 3], [1, 3]])
+
+    kept_nodes, kept_edges = decimate(values, edges)
+    assert kept_nodes.tolist() == [0, 1, 2, 3]
+    assert kept_edges.tolist() == edges.tolist()
+
+    # NaN en dernier
+    kept_nodes, kept_edges = decimate(values, edges, max_nodes=3)
+    assert kept_nodes.tolist() == [0, 2, 3]
+    assert kept_edges.tolist() == [[0, 2], [2, 3]]
+
+    kept_nodes, kept_edges = decimate(values, edges, max_edges=2, seed=1)
+    assert len(kept_edges) == 2
+    assert kept_edges.tolist() == decimate(values, edges, max_edges=2, seed=1)[1].tolist()
+
+
+def test_missing_position():
+    network = _network()
+    network.add_node('sans position')
+    with pytest.raises(ValueError):
+        network_figure(network)
+    with pytest.raises(TypeError):
+        network_figure({'A': ['B']})
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 15:02:44 2026
+
+@author: gabri
+
+Tests of data_tools.word_index on a few spellings.
+"""
+
+import pytest
+
+from data_tools.word_index import WordIndex, normalize
+
+
+RECORDS = [('Paris', 3), ('paris', 5), ('PÀRIS', 1), ('parisien', 4), ('Élève', 2), ('eleve', 7), ('cœur', 6)]
+
+
+def test_normalize():
+    assert normalize(' Élève ') == 'eleve'
+    assert normalize('CŒUR') == 'coeur'
+
+
+def test_counts_and_spellings():
+    index = WordIndex(RECORDS)
+
+    assert len(index) == 7
+    assert index.count('paris') == 9
+    assert index.count('Paris', exact=True) == 3
+    assert index.count('pàris', exact=True) is None
+    assert index.count('absent') is None
+    assert index.spellings('PARIS') == [('paris', 5), ('Paris', 3), ('PÀRIS', 1)]
+    assert index.spellings('absent') == []
+
+
+def test_complete():
+    index = WordIndex(RECORDS)
+
+    assert index.complete('Par') == [('paris', 9), ('parisien', 4)]
+    assert index.complete('e', limit=1) == [('eleve', 9)]
+    assert index.complete('coe') == [('cœur', 6)]
+    assert index.complete('q') == []
+    assert index.complete('p', limit=0) == []
+
+
+def test_repeated_words_are_counted_once():
+    index = WordIndex([('Paris', 3), ('paris', 2), ('Paris', 3), ('Paris', 1)])
+
+    assert len(index) == 2
+    assert index.count('Paris', exact=True) == 3
+    assert index.count('paris') == 5
+
+
+@pytest.mark.parametrize('extension', ['.arrow', '.parquet'])
+def test_dump(tmp_path, extension):
+    path = str(tmp_path / ('words' + extension))
+    WordIndex(RECORDS).save(path)
+    index = WordIndex.from_dump(path)
+
+    assert len(index) == 7
+    assert index.complete('par') == [('paris', 9), ('parisien', 4)]
+    assert [entry.name for entry in tmp_path.iterdir()] == ['words' + extension]